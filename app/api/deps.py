@@ -0,0 +1,42 @@
+# file: app/api/deps.py
+
+import secrets
+from dataclasses import dataclass
+
+from fastapi import Header, HTTPException, Query
+
+from app.core.settings import settings
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+
+# ============================================================
+# Paginação (keyset)
+# ============================================================
+
+@dataclass(frozen=True, slots=True)
+class PageParams:
+    cursor: str | None
+    limit: int
+    fields: str | None
+
+
+def page_params(
+    cursor: str | None = Query(None, description="next_cursor da página anterior"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: str | None = Query(None, description="Colunas separadas por vírgula (padrão: todas)"),
+) -> PageParams:
+    return PageParams(cursor=cursor, limit=limit, fields=fields)
+
+
+# ============================================================
+# Admin (endpoints de diagnóstico)
+# ============================================================
+
+def require_admin(x_admin_token: str | None = Header(None)) -> None:
+    """
+    Sem ADMIN_TOKEN configurado os endpoints ficam indisponíveis.
+    """
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="not_found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="invalid_admin_token")
@@ -1,4 +1,6 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+
+from app.api.deps import require_admin
 
 # Webhooks
 from .webhooks_zapi import router as webhooks_zapi_router
@@ -11,6 +13,22 @@ from .file_proxy import router as file_proxy_router
 from .customers import router as customers_router
 from .bot_sessions import router as bot_sessions_router
 
+# CRUDs (leitura paginada)
+from .vendors import router as vendors_router
+from .conversations import router as conversations_router
+from .sessions import router as sessions_router
+from .messages import router as messages_router
+
+# Analytics
+from .analytics import router as analytics_router
+from .vendor_metrics import router as vendor_metrics_router
+
+# Entregas de saída (retry / dead-letter)
+from .outbound import router as outbound_router
+
+# Diagnóstico
+from .debug import router as debug_router
+
 api_router = APIRouter()
 
 # ========== Webhooks (funcionam agora) ==========
@@ -24,13 +42,22 @@ api_router.include_router(file_proxy_router, prefix="/files", tags=["proxy"])
 api_router.include_router(customers_router, prefix="/customer", tags=["customers"])
 api_router.include_router(bot_sessions_router, prefix="/bot_sessions", tags=["bot_sessions"])
 
-# ========== CRUDs (ativaremos depois) ===========
-# from .vendors import router as vendors_router
-# from .conversations import router as conversations_router
-# from .sessions import router as sessions_router
-# from .messages import router as messages_router
-#
-# api_router.include_router(vendors_router, prefix="/vendors", tags=["vendors"])
-# api_router.include_router(conversations_router, prefix="/conversations", tags=["conversations"])
-# api_router.include_router(sessions_router, prefix="/sessions", tags=["sessions"])
-# api_router.include_router(messages_router, prefix="/messages", tags=["messages"])
+# ========== CRUDs (leitura, keyset; X-Admin-Token) =
+# telefones e conteúdo das mensagens: nunca sem autenticação
+_admin = [Depends(require_admin)]
+api_router.include_router(vendors_router, prefix="/vendors", tags=["vendors"], dependencies=_admin)
+api_router.include_router(conversations_router, prefix="/conversations", tags=["conversations"], dependencies=_admin)
+api_router.include_router(sessions_router, prefix="/sessions", tags=["sessions"], dependencies=_admin)
+api_router.include_router(messages_router, prefix="/messages", tags=["messages"], dependencies=_admin)
+
+# ========== Analytics (DuckDB; X-Admin-Token) ===
+# cada cache miss é uma varredura do banco + arquivo
+api_router.include_router(analytics_router, prefix="/analytics", tags=["analytics"], dependencies=_admin)
+# nomes dos vendedores e números ao vivo: mesma proteção de /vendors
+api_router.include_router(vendor_metrics_router, prefix="/metrics", tags=["metrics"], dependencies=_admin)
+
+# ========== Entregas (X-Admin-Token) ============
+api_router.include_router(outbound_router, prefix="/outbound", tags=["outbound"], dependencies=[Depends(require_admin)])
+
+# ========== Diagnóstico (X-Admin-Token) ==========
+api_router.include_router(debug_router, prefix="/debug", tags=["debug"], dependencies=[Depends(require_admin)])
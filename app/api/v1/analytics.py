@@ -0,0 +1,61 @@
+# file: app/api/v1/analytics.py
+
+import logging
+from datetime import datetime
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Query
+
+from app.services.analytics_service import AnalyticsUnavailable, get_metric, to_utc_naive
+
+router = APIRouter()
+logger = logging.getLogger("analytics")
+
+
+async def _metric(metric: str, since, until, bucket, vendor_id) -> dict:
+    # ?since=...Z / +03:00 → UTC sem fuso (created_at é naive)
+    since = to_utc_naive(since) if since else None
+    until = to_utc_naive(until) if until else None
+    if since and until and since >= until:
+        raise HTTPException(status_code=400, detail="invalid_range")
+    try:
+        return await get_metric(metric, since=since, until=until, bucket=bucket, vendor_id=vendor_id)
+    except AnalyticsUnavailable:
+        raise HTTPException(status_code=503, detail="analytics_unavailable")
+
+
+@router.get("/volume")
+async def volume_endpoint(
+    since: datetime | None = Query(None, description="UTC (padrão: últimos 7 dias)"),
+    until: datetime | None = Query(None, description="UTC (padrão: agora)"),
+    bucket: Literal["hour", "day"] = Query("day"),
+    vendor_id: str | None = Query(None),
+):
+    """
+    Mensagens por vendedor, bucket de tempo e direção.
+    """
+    return await _metric("volume", since, until, bucket, vendor_id)
+
+
+@router.get("/first-response")
+async def first_response_endpoint(
+    since: datetime | None = Query(None),
+    until: datetime | None = Query(None),
+    vendor_id: str | None = Query(None),
+):
+    """
+    Tempo até a primeira resposta do vendedor por sessão (média, p50, p90).
+    """
+    return await _metric("first_response", since, until, None, vendor_id)
+
+
+@router.get("/media-mix")
+async def media_mix_endpoint(
+    since: datetime | None = Query(None),
+    until: datetime | None = Query(None),
+    vendor_id: str | None = Query(None),
+):
+    """
+    Distribuição de tipos de mensagem (texto, imagem, áudio…) por vendedor.
+    """
+    return await _metric("media_mix", since, until, None, vendor_id)
@@ -30,11 +30,8 @@ async def get_active_bot_session_endpoint(
             status_code=status.HTTP_200_OK,
             content=None,
         )
-    
-    print(
-        f"[DEBUG] type(session)={type(session)} value={session}"
-    )
 
+    logger.debug(f"[BotSession] type(session)={type(session)} value={session}")
 
     logger.info(f"[BotSession] Sessão ativa encontrada: session_id={session.session_id}")
     return session
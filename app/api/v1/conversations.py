@@ -0,0 +1,84 @@
+# file: app/api/v1/conversations.py
+
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import PageParams, page_params
+from app.db.session import get_async_db
+from app.schemas.conversations import ConversationRead
+from app.services.archive_service import get_message_history_async
+from app.services.conversations_service import (
+    CONVERSATION_KEYSET,
+    export_conversations,
+    get_conversation_async,
+    list_conversations_async,
+)
+from app.services.messages_service import MESSAGE_KEYSET, list_messages_async
+from app.utils.pagination import MAX_PAGE_SIZE, ndjson_response
+
+router = APIRouter()
+
+
+@router.get("")
+async def list_conversations_endpoint(
+    page: PageParams = Depends(page_params),
+    vendor_id: str | None = Query(None),
+    status: str | None = Query(None),
+    phone: str | None = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    fields = CONVERSATION_KEYSET.parse_fields(page.fields)
+    return await list_conversations_async(
+        db, fields, page.cursor, page.limit,
+        vendor_id=vendor_id, status=status, phone=phone,
+    )
+
+
+@router.get("/export")
+async def export_conversations_endpoint(
+    fields: str | None = Query(None),
+    vendor_id: str | None = Query(None),
+    status: str | None = Query(None),
+    phone: str | None = Query(None),
+):
+    """
+    Todas as conversas do filtro em NDJSON (streaming, memória constante).
+    """
+    chunks = export_conversations(
+        CONVERSATION_KEYSET.parse_fields(fields),
+        vendor_id=vendor_id, status=status, phone=phone,
+    )
+    return ndjson_response(chunks, filename="conversations.ndjson")
+
+
+@router.get("/{conversation_id}", response_model=ConversationRead)
+async def get_conversation_endpoint(conversation_id: str, db: AsyncSession = Depends(get_async_db)):
+    conv = await get_conversation_async(db, conversation_id)
+    if conv is None:
+        raise HTTPException(status_code=404, detail="conversation_not_found")
+    return conv
+
+
+@router.get("/{conversation_id}/messages")
+async def list_conversation_messages_endpoint(
+    conversation_id: str,
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_async_db),
+):
+    fields = MESSAGE_KEYSET.parse_fields(page.fields)
+    return await list_messages_async(db, fields, page.cursor, page.limit, conversation_id=conversation_id)
+
+
+@router.get("/{conversation_id}/history")
+async def get_conversation_history_endpoint(
+    conversation_id: str,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    before: datetime | None = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Histórico completo (banco + arquivo Parquet), mais recentes primeiro.
+    """
+    return await get_message_history_async(db, conversation_id, limit=limit, before=before)
@@ -0,0 +1,239 @@
+# file: app/api/v1/debug.py
+
+import asyncio
+import threading
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from app.core.circuit_breaker import circuit_breakers
+from app.core.fault_injection import fault_injector, publish_fault_config
+from app.core.logging_setup import apply_logging_config, get_logging_config, publish_logging_config
+from app.schemas.fault_injection import FaultConfigUpdate
+from app.schemas.logging_config import LoggingConfigUpdate
+from app.utils.loop_watchdog import MAX_STALLS_KEPT, loop_watchdog
+from app.utils.memory_profiler import DEFAULT_TRACE_FRAMES, KEY_TYPES, memory_profiler
+from app.utils.profiler import PROFILE_MAX_WINDOW_SECONDS, profiler
+from app.utils.stack_sampler import DEFAULT_HZ, MAX_HZ, MAX_SAMPLE_SECONDS, stack_sampler
+from app.utils.traffic_capture import traffic_capture
+
+router = APIRouter()
+
+
+# ============================================================
+# Profiler (latência por label)
+# ============================================================
+
+@router.get("/profile")
+def profile_endpoint(
+    window: int | None = Query(
+        None, ge=1, le=PROFILE_MAX_WINDOW_SECONDS,
+        description="Janela deslizante em segundos (padrão: desde o startup)",
+    ),
+    prefix: str | None = Query(None, description="Ex.: zapi. ou chatwoot."),
+):
+    """
+    p50/p95/p99/max por label (stages dos webhooks, @timed, timer()).
+    """
+    return profiler.report(window, prefix)
+
+
+@router.delete("/profile")
+def reset_profile_endpoint():
+    profiler.reset()
+    return {"status": "ok"}
+
+
+# ============================================================
+# Sampler de pilhas (flamegraph)
+# ============================================================
+
+@router.get("/sampler")
+async def sampler_endpoint(
+    seconds: float = Query(10, gt=0, le=MAX_SAMPLE_SECONDS),
+    hz: int = Query(DEFAULT_HZ, ge=1, le=MAX_HZ),
+    format: str = Query("json", pattern="^(json|collapsed)$"),
+    include_idle: bool = Query(False, description="Inclui threads paradas em select/wait"),
+):
+    """
+    Amostra as pilhas de todas as threads por N segundos.
+    format=collapsed → texto para flamegraph.pl / speedscope.
+    """
+    if stack_sampler.busy:
+        raise HTTPException(status_code=409, detail="sampler_busy")
+
+    # este handler roda na thread do event loop
+    loop_thread_id = threading.get_ident()
+    try:
+        result = await asyncio.to_thread(
+            stack_sampler.sample, seconds, hz, loop_thread_id, include_idle
+        )
+    except RuntimeError:
+        raise HTTPException(status_code=409, detail="sampler_busy")
+
+    if format == "collapsed":
+        return PlainTextResponse(result["collapsed"] + "\n")
+    return result
+
+
+# ============================================================
+# Watchdog do event loop
+# ============================================================
+
+@router.get("/loop")
+def loop_endpoint(limit: int = Query(20, ge=1, le=MAX_STALLS_KEPT)):
+    """
+    Lag do event loop desde o startup + últimos travamentos com a pilha.
+    """
+    return loop_watchdog.report(limit)
+
+
+# ============================================================
+# Memória (tracemalloc)
+# ============================================================
+
+KEY_TYPE_PATTERN = f"^({'|'.join(KEY_TYPES)})$"
+
+
+@router.get("/memory")
+def memory_status_endpoint():
+    return memory_profiler.status()
+
+
+@router.post("/memory/start")
+def memory_start_endpoint(frames: int = Query(DEFAULT_TRACE_FRAMES, ge=1, le=50)):
+    """
+    Liga o tracemalloc (deixa alocações mais lentas enquanto ligado).
+    """
+    return memory_profiler.start(frames)
+
+
+@router.post("/memory/stop")
+def memory_stop_endpoint():
+    return memory_profiler.stop()
+
+
+@router.post("/memory/snapshot")
+def memory_snapshot_endpoint(
+    limit: int = Query(20, ge=1, le=200),
+    key_type: str = Query("lineno", pattern=KEY_TYPE_PATTERN),
+):
+    try:
+        return memory_profiler.snapshot(limit, key_type)
+    except RuntimeError:
+        raise HTTPException(status_code=409, detail="tracemalloc_not_running")
+
+
+@router.get("/memory/diff")
+def memory_diff_endpoint(
+    from_id: str = Query(..., alias="from"),
+    to_id: str | None = Query(None, alias="to", description="Padrão: snapshot novo"),
+    limit: int = Query(20, ge=1, le=200),
+    key_type: str = Query("lineno", pattern=KEY_TYPE_PATTERN),
+):
+    """
+    Maiores crescimentos entre dois snapshots + buffers grandes vivos.
+    """
+    try:
+        return memory_profiler.diff(from_id, to_id, limit, key_type)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="snapshot_not_found")
+    except RuntimeError:
+        raise HTTPException(status_code=409, detail="tracemalloc_not_running")
+
+
+# ============================================================
+# Logging em runtime
+# ============================================================
+
+@router.get("/logging")
+def logging_config_endpoint():
+    return get_logging_config()
+
+
+@router.put("/logging")
+async def update_logging_config_endpoint(change: LoggingConfigUpdate):
+    """
+    Aplica neste worker e publica para os demais (Redis).
+    Ex.: {"levels": {"chatwoot_service": "DEBUG"}, "sample_rates": {"webhooks_zapi": 1.0}}
+    """
+    data = change.model_dump()
+    try:
+        apply_logging_config(data)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    await publish_logging_config(data)
+    return get_logging_config()
+
+
+# ============================================================
+# Captura de tráfego (replay)
+# ============================================================
+
+@router.get("/capture")
+def capture_status_endpoint():
+    return traffic_capture.status()
+
+
+@router.post("/capture/start")
+def capture_start_endpoint():
+    """
+    Grava os webhooks recebidos por este worker em CAPTURE_PATH
+    (NDJSON, sem tokens).
+    """
+    return traffic_capture.start()
+
+
+@router.post("/capture/stop")
+async def capture_stop_endpoint():
+    # espera a fila ser gravada (fora do event loop)
+    return await asyncio.to_thread(traffic_capture.stop)
+
+
+# ============================================================
+# Injeção de falhas nos upstreams (só testes)
+# ============================================================
+
+@router.get("/faults")
+def faults_endpoint():
+    return fault_injector.config()
+
+
+@router.put("/faults")
+async def update_faults_endpoint(change: FaultConfigUpdate):
+    """
+    Substitui as regras neste worker e publica para os demais.
+    Ex.: {"rules": [{"target": "chatwoot", "latency": "fixed:5000"}]}
+    Exige FAULT_INJECTION_ENABLED=true.
+    """
+    if not fault_injector.enabled:
+        raise HTTPException(status_code=409, detail="fault_injection_disabled")
+
+    rules = [rule.model_dump() for rule in change.rules]
+    try:
+        fault_injector.configure(rules)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    await publish_fault_config(rules)
+    return fault_injector.config()
+
+
+@router.delete("/faults")
+async def clear_faults_endpoint():
+    fault_injector.configure([])
+    await publish_fault_config([])
+    return fault_injector.config()
+
+
+# ============================================================
+# Circuit breakers
+# ============================================================
+
+@router.get("/circuits")
+def circuits_endpoint():
+    """
+    Estado de cada breaker neste worker (chatwoot:<host>, zapi:<instância>).
+    """
+    return circuit_breakers.status()
@@ -0,0 +1,94 @@
+# file: app/api/v1/messages.py
+
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import PageParams, page_params
+from app.db.session import get_async_db
+from app.schemas.messages_log import MessageLogRead
+from app.services.messages_service import (
+    MESSAGE_KEYSET,
+    export_messages,
+    get_message_async,
+    list_messages_async,
+)
+from app.services.search_service import MAX_SEARCH_OFFSET, SearchUnavailable, search_messages_async
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, ndjson_response
+
+router = APIRouter()
+
+
+@router.get("")
+async def list_messages_endpoint(
+    page: PageParams = Depends(page_params),
+    conversation_id: str | None = Query(None),
+    session_id: str | None = Query(None),
+    vendor_id: str | None = Query(None),
+    direction: str | None = Query(None),
+    since: datetime | None = Query(None),
+    until: datetime | None = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    fields = MESSAGE_KEYSET.parse_fields(page.fields)
+    return await list_messages_async(
+        db, fields, page.cursor, page.limit,
+        conversation_id=conversation_id, session_id=session_id, vendor_id=vendor_id,
+        direction=direction, since=since, until=until,
+    )
+
+
+@router.get("/export")
+async def export_messages_endpoint(
+    fields: str | None = Query(None),
+    conversation_id: str | None = Query(None),
+    session_id: str | None = Query(None),
+    vendor_id: str | None = Query(None),
+    direction: str | None = Query(None),
+    since: datetime | None = Query(None),
+    until: datetime | None = Query(None),
+):
+    """
+    Ex.: histórico inteiro de um vendedor em NDJSON, sem carregar tudo em memória.
+    """
+    chunks = export_messages(
+        MESSAGE_KEYSET.parse_fields(fields),
+        conversation_id=conversation_id, session_id=session_id, vendor_id=vendor_id,
+        direction=direction, since=since, until=until,
+    )
+    return ndjson_response(chunks, filename="messages.ndjson")
+
+
+@router.get("/search")
+async def search_messages_endpoint(
+    q: str = Query(..., min_length=2, description="Texto buscado no conteúdo das mensagens"),
+    vendor_id: str | None = Query(None),
+    direction: str | None = Query(None),
+    source: str | None = Query(None),
+    since: datetime | None = Query(None),
+    until: datetime | None = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0, le=MAX_SEARCH_OFFSET),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Busca full-text (FTS5 no SQLite, tsvector no Postgres), por relevância.
+    """
+    try:
+        return await search_messages_async(
+            db, q, limit, offset,
+            vendor_id=vendor_id, direction=direction, source=source, since=since, until=until,
+        )
+    except SearchUnavailable:
+        # banco criado sem a migração a3c5e8f19b27 (create_all)
+        raise HTTPException(status_code=503, detail="fulltext_index_missing")
+
+
+# deve ficar por último: /{log_id} capturaria /search e /export
+@router.get("/{log_id}", response_model=MessageLogRead)
+async def get_message_endpoint(log_id: str, db: AsyncSession = Depends(get_async_db)):
+    msg = await get_message_async(db, log_id)
+    if msg is None:
+        raise HTTPException(status_code=404, detail="message_not_found")
+    return msg
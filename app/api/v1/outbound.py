@@ -0,0 +1,42 @@
+# file: app/api/v1/outbound.py
+
+from fastapi import APIRouter, HTTPException, Query
+
+from app.services.outbound_service import outbound
+
+router = APIRouter()
+
+
+@router.get("")
+async def outbound_stats_endpoint():
+    """
+    Jobs agendados para retry, na dead-letter e em voo neste worker.
+    """
+    return await outbound.stats()
+
+
+@router.get("/dead")
+async def dead_letters_endpoint(limit: int = Query(100, ge=1, le=1000)):
+    # mais antigos primeiro
+    return await outbound.dead_letters(limit)
+
+
+@router.post("/dead/replay")
+async def replay_dead_letters_endpoint(
+    job_id: str | None = Query(None, description="Só este job (padrão: os mais antigos)"),
+    limit: int = Query(100, ge=1, le=1000),
+):
+    """
+    Devolve jobs da dead-letter para a fila de retry (tentativas zeradas).
+    """
+    replayed = await outbound.replay(job_id, limit)
+    if job_id and not replayed:
+        raise HTTPException(status_code=404, detail="job_not_found")
+    return {"replayed": replayed}
+
+
+@router.delete("/dead/{job_id}")
+async def discard_dead_letter_endpoint(job_id: str):
+    if not await outbound.discard(job_id):
+        raise HTTPException(status_code=404, detail="job_not_found")
+    return {"discarded": job_id}
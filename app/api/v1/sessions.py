@@ -0,0 +1,54 @@
+# file: app/api/v1/sessions.py
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import PageParams, page_params
+from app.db.session import get_async_db
+from app.schemas.conversation_sessions import ConversationSessionRead
+from app.services.sessions_service import (
+    SESSION_KEYSET,
+    export_sessions,
+    get_session_async,
+    list_sessions_async,
+)
+from app.utils.pagination import ndjson_response
+
+router = APIRouter()
+
+
+@router.get("")
+async def list_sessions_endpoint(
+    page: PageParams = Depends(page_params),
+    conversation_id: str | None = Query(None),
+    vendor_id: str | None = Query(None),
+    active: bool | None = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    fields = SESSION_KEYSET.parse_fields(page.fields)
+    return await list_sessions_async(
+        db, fields, page.cursor, page.limit,
+        conversation_id=conversation_id, vendor_id=vendor_id, active=active,
+    )
+
+
+@router.get("/export")
+async def export_sessions_endpoint(
+    fields: str | None = Query(None),
+    conversation_id: str | None = Query(None),
+    vendor_id: str | None = Query(None),
+    active: bool | None = Query(None),
+):
+    chunks = export_sessions(
+        SESSION_KEYSET.parse_fields(fields),
+        conversation_id=conversation_id, vendor_id=vendor_id, active=active,
+    )
+    return ndjson_response(chunks, filename="sessions.ndjson")
+
+
+@router.get("/{session_id}", response_model=ConversationSessionRead)
+async def get_session_endpoint(session_id: str, db: AsyncSession = Depends(get_async_db)):
+    session = await get_session_async(db, session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="session_not_found")
+    return session
@@ -0,0 +1,41 @@
+# file: app/api/v1/vendor_metrics.py
+
+import logging
+
+from fastapi import APIRouter, HTTPException, Query
+
+from app.services.vendor_metrics_service import DEFAULT_WINDOW_MINUTES, get_vendor_metrics
+from app.services.vendor_registry import vendor_registry
+
+router = APIRouter()
+logger = logging.getLogger("vendor_metrics")
+
+
+@router.get("/vendors")
+async def vendor_metrics_endpoint(
+    vendor_id: str | None = Query(None),
+    window_minutes: int = Query(DEFAULT_WINDOW_MINUTES, ge=1, le=120),
+    include_inactive: bool = Query(False),
+):
+    """
+    Números ao vivo por vendedor: mensagens/minuto, contatos únicos
+    no dia (UTC) e conversas aguardando resposta.
+    """
+    vendors = await vendor_registry.list_all()
+    if vendor_id:
+        vendors = [v for v in vendors if v.vendor_id == vendor_id]
+        if not vendors:
+            raise HTTPException(status_code=404, detail="vendor_not_found")
+    elif not include_inactive:
+        vendors = [v for v in vendors if v.active]
+
+    try:
+        metrics = await get_vendor_metrics([v.vendor_id for v in vendors], window_minutes)
+    except Exception as e:
+        logger.error(f"❌ Erro lendo métricas dos vendedores: {e}")
+        raise HTTPException(status_code=503, detail="metrics_unavailable")
+
+    return [
+        {"vendor_id": v.vendor_id, "name": v.name, **metrics[v.vendor_id]}
+        for v in vendors
+    ]
@@ -0,0 +1,29 @@
+# file: app/api/v1/vendors.py
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import PageParams, page_params
+from app.db.session import get_async_db
+from app.schemas.vendors import VendorRead
+from app.services.vendors_service import VENDOR_KEYSET, get_vendor_async, list_vendors_page_async
+
+router = APIRouter()
+
+
+@router.get("")
+async def list_vendors_endpoint(
+    page: PageParams = Depends(page_params),
+    active: bool | None = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    fields = VENDOR_KEYSET.parse_fields(page.fields)
+    return await list_vendors_page_async(db, fields, page.cursor, page.limit, active=active)
+
+
+@router.get("/{vendor_id}", response_model=VendorRead)
+async def get_vendor_endpoint(vendor_id: str, db: AsyncSession = Depends(get_async_db)):
+    vendor = await get_vendor_async(db, vendor_id)
+    if vendor is None:
+        raise HTTPException(status_code=404, detail="vendor_not_found")
+    return vendor
@@ -1,15 +1,23 @@
 # file: app/api/v1/webhooks_chatwoot.py
 
 import logging
-from fastapi import APIRouter, Depends, BackgroundTasks
-from sqlalchemy.orm import Session
-
-from app.db.session import get_db
-from app.services.vendors_service import get_vendor_by_agent_id
-from app.services.conversations_service import ensure_conversation
-from app.services.sessions_service import ensure_session
-from app.services.messages_service import log_message
-from app.services.zapi_service import zapi_client, ZAPIError
+import time
+from fastapi import APIRouter, BackgroundTasks
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.metrics import count_outcome, stage
+from app.core.tracing import span
+from app.db.session import AsyncSessionLocal
+from app.db.writer import run_write
+from app.services.vendor_registry import vendor_registry
+from app.services.conversations_service import (
+    ensure_conversation_async,
+    get_conversation_async,
+)
+from app.services.sessions_service import ensure_session_async
+from app.services.messages_service import log_message_async
+from app.services.vendor_metrics_service import record_message_nowait
+from app.services.outbound_service import outbound
 from app.schemas.messages_log import MessageLogCreate
 
 from app.services.cache_service import (
@@ -17,9 +25,9 @@ from app.services.cache_service import (
     save_cached_session,
 )
 
-from app.models.conversations import Conversation
 from app.utils.file_proxy import download_and_push_to_r2
-from app.utils.profiler import now, step
+from app.utils.memory_profiler import media_memory
+from app.utils.traffic_capture import traffic_capture
 
 router = APIRouter()
 logger = logging.getLogger("webhooks_chatwoot")
@@ -72,10 +80,9 @@ async def _prepare_media_for_zapi(att: dict):
         logger.warning("⚠️ attachment sem data_url")
         return None
 
-    T = now()
     try:
-        blob_url, mime = await download_and_push_to_r2(data_url)
-        step(T, "download + upload para R2")
+        with media_memory("chatwoot", att.get("file_type")), stage("chatwoot", "r2_upload"):
+            blob_url, mime = await download_and_push_to_r2(data_url)
         logger.info(f"[CW->ZAPI] mídia enviada ao R2: {blob_url}")
         return blob_url, mime
 
@@ -88,10 +95,32 @@ async def _prepare_media_for_zapi(att: dict):
 # PROCESSAMENTO ASSÍNCRONO
 # ============================================================
 
-async def process_message_async(payload: dict, db: Session):
+async def process_message_async(payload: dict):
+    """
+    Roda após a resposta do webhook, com sessão de banco própria
+    (a sessão do request já foi encerrada nesse ponto).
+    """
+    conversation = payload.get("conversation") or {}
+    with span(
+        "chatwoot_webhook",
+        chatwoot_conversation_id=conversation.get("id"),
+        message_id=payload.get("id"),
+        message_type=payload.get("content_type"),
+    ):
+        async with AsyncSessionLocal() as db:
+            try:
+                with stage("chatwoot", "total"):
+                    await _process_message(payload, db)
+            except Exception:
+                count_outcome("chatwoot", "error", "exception")
+                raise
+
+
+async def _process_message(payload: dict, db: AsyncSession):
 
     if payload.get("private"):
         logger.info("🛑 Mensagem privada ignorada")
+        count_outcome("chatwoot", "ignored", "private_message")
         return
 
     # --------------------------------------------------------
@@ -100,6 +129,7 @@ async def process_message_async(payload: dict, db: Session):
     contact_id = _extract_contact_id(payload)
     if not contact_id:
         logger.warning("⚠️ [CW->ZAPI] sem contact_id")
+        count_outcome("chatwoot", "ignored", "missing_contact_id")
         return
 
     # Na Z-API, grupos = xxx-group
@@ -111,21 +141,26 @@ async def process_message_async(payload: dict, db: Session):
     agent_id = payload.get("sender", {}).get("id")
     if not agent_id:
         logger.warning("⚠️ [CW->ZAPI] missing agent_id")
+        count_outcome("chatwoot", "ignored", "missing_agent_id")
         return
 
-    vendor = get_vendor_by_agent_id(db, agent_id)
+    with stage("chatwoot", "vendor_lookup"):
+        vendor = await vendor_registry.get_by_agent_id(agent_id)
     if not vendor:
         logger.warning("⚠️ [CW->ZAPI] vendor not found")
+        count_outcome("chatwoot", "ignored", "vendor_not_found")
         return
 
     # --------------------------------------------------------
     # 3) Garantir conversa interna
     # --------------------------------------------------------
-    conversation = ensure_conversation(
-        db,
-        phone=contact_id,
-        vendor_id=vendor.vendor_id
-    )
+    with stage("chatwoot", "ensure_conversation"):
+        conversation = await run_write(db, lambda s: ensure_conversation_async(
+            s,
+            phone=contact_id,
+            vendor_id=vendor.vendor_id,
+            commit=False,
+        ))
 
     # Destino para Z-API
     if is_group:
@@ -137,6 +172,7 @@ async def process_message_async(payload: dict, db: Session):
 
     if not target:
         logger.warning("⚠️ [CW->ZAPI] target vazio")
+        count_outcome("chatwoot", "ignored", "empty_target")
         return
 
     # --------------------------------------------------------
@@ -147,7 +183,7 @@ async def process_message_async(payload: dict, db: Session):
     if session_cached:
         conversation_id = session_cached["conversation_id"]
         chatwoot_conv_id = session_cached["chatwoot_conv_id"]
-        conversation = db.get(Conversation, conversation_id)
+        conversation = await get_conversation_async(db, conversation_id)
     else:
         conversation_id = conversation.conversation_id
         chatwoot_conv_id = str(payload.get("conversation", {}).get("id"))
@@ -161,13 +197,15 @@ async def process_message_async(payload: dict, db: Session):
     # --------------------------------------------------------
     # 5) Criar session
     # --------------------------------------------------------
-    session = ensure_session(
-        db,
-        conversation_id=conversation_id,
-        vendor_id=vendor.vendor_id,
-        chatwoot_conv_id=chatwoot_conv_id,
-        zapi_lid=""
-    )
+    with stage("chatwoot", "ensure_session"):
+        session = await run_write(db, lambda s: ensure_session_async(
+            s,
+            conversation_id=conversation_id,
+            vendor_id=vendor.vendor_id,
+            chatwoot_conv_id=chatwoot_conv_id,
+            zapi_lid="",
+            commit=False,
+        ))
 
     # --------------------------------------------------------
     # 6) Conteúdo
@@ -181,59 +219,71 @@ async def process_message_async(payload: dict, db: Session):
     # Para grupo, vai mandar exatamente o que o atendente escreveu.
 
     # --------------------------------------------------------
-    # 7) Envio para Z-API
+    # 7) Envio para Z-API (falha retentável → retry em background)
     # --------------------------------------------------------
-    try:
-        if msg_type == "text":
-            result = zapi_client.send_text(
+    if msg_type == "text":
+        with stage("chatwoot", "zapi_send"):
+            result = await outbound.send_zapi(
                 vendor.instance_id,
-                vendor.instance_token,
+                "send_text",
                 target,
                 content or ""
             )
 
-        elif msg_type in ["image", "video", "audio", "document"]:
-            prepared = await _prepare_media_for_zapi(att)
-            if not prepared:
-                logger.error("❌ [CW->ZAPI] falha preparando mídia")
-                return
+    elif msg_type in ["image", "video", "audio", "document"]:
+        prepared = await _prepare_media_for_zapi(att)
+        if not prepared:
+            logger.error("❌ [CW->ZAPI] falha preparando mídia")
+            count_outcome("chatwoot", "error", "media_prepare_failed")
+            return
 
-            blob_url, mime = prepared
+        blob_url, mime = prepared
 
+        with stage("chatwoot", "zapi_send"):
             if msg_type == "image":
-                result = zapi_client.send_image(
-                    vendor.instance_id, vendor.instance_token,
+                result = await outbound.send_zapi(
+                    vendor.instance_id, "send_image",
                     target, blob_url, caption=content or ""
                 )
 
             elif msg_type == "video":
-                result = zapi_client.send_video(
-                    vendor.instance_id, vendor.instance_token,
+                result = await outbound.send_zapi(
+                    vendor.instance_id, "send_video",
                     target, blob_url, caption=content or ""
                 )
 
             elif msg_type == "audio":
-                result = zapi_client.send_audio(
-                    vendor.instance_id, vendor.instance_token,
+                result = await outbound.send_zapi(
+                    vendor.instance_id, "send_audio",
                     target, blob_url
                 )
 
             elif msg_type == "document":
                 ext = (att.get("file_type") or "pdf").split("/")[-1]
-                result = zapi_client.send_document(
-                    vendor.instance_id, vendor.instance_token,
+                result = await outbound.send_zapi(
+                    vendor.instance_id, "send_document",
                     target, blob_url, extension=ext
                 )
-        else:
-            logger.info(f"ℹ️ [CW->ZAPI] tipo não suportado: {msg_type}")
-            return
+    else:
+        logger.info(f"ℹ️ [CW->ZAPI] tipo não suportado: {msg_type}")
+        count_outcome("chatwoot", "ignored", "unsupported_type")
+        return
 
-        logger.info(f"✅ [CW->ZAPI] enviado → {result}")
+    # corpo da Z-API vem como veio (lista, escalar...): só o dict do
+    # outbound traz dead_letter/deferred
+    delivery = result if isinstance(result, dict) else {}
 
-    except ZAPIError as e:
-        logger.error(f"❌ erro enviando para z-api: {e}")
+    if delivery.get("dead_letter"):
+        logger.error(f"❌ erro enviando para z-api: {delivery['error']}")
+        count_outcome("chatwoot", "error", "zapi_error")
         return
 
+    deferred = bool(delivery.get("deferred"))
+    if deferred:
+        logger.warning(f"⏳ [CW->ZAPI] envio adiado → job={delivery['job_id']} ({delivery['error']})")
+    else:
+        logger.info(f"✅ [CW->ZAPI] enviado → {result}")
+
     # --------------------------------------------------------
     # 8) Log interno
     # --------------------------------------------------------
@@ -246,28 +296,44 @@ async def process_message_async(payload: dict, db: Session):
         message_type=msg_type,
         content=content,
     )
-    log_message(db, msg_log)
+    with stage("chatwoot", "log_write"):
+        await run_write(db, lambda s: log_message_async(s, msg_log, commit=False))
+
+    record_message_nowait(vendor.vendor_id, "outgoing", conversation_id)
+    if deferred:
+        count_outcome("chatwoot", "deferred", "zapi_error")
+    else:
+        count_outcome("chatwoot", "ok")
 
 
 # ============================================================
 # Webhook principal
 # ============================================================
 
+def _ignored(payload: dict, received_at: float, reason: str) -> dict:
+    count_outcome("chatwoot", "ignored", reason)
+    traffic_capture.record("chatwoot", payload, received_at, "ignored", reason)
+    return {"ignored": True, "reason": reason}
+
+
 @router.post("")
 async def chatwoot_webhook(
     payload: dict,
     background: BackgroundTasks,
-    db: Session = Depends(get_db)
 ):
+    received_at = time.time()
+
     if payload.get("event") != "message_created":
-        return {"ignored": True, "reason": "not_message_created"}
+        return _ignored(payload, received_at, "not_message_created")
 
     if payload.get("message_type") != "outgoing":
-        return {"ignored": True, "reason": "not_outgoing"}
+        return _ignored(payload, received_at, "not_outgoing")
 
     if payload.get("private"):
-        return {"ignored": True, "reason": "private_message"}
+        return _ignored(payload, received_at, "private_message")
 
-    background.add_task(process_message_async, payload, db)
+    background.add_task(process_message_async, payload)
 
+    # resultado do envio sai no processamento em background (métricas)
+    traffic_capture.record("chatwoot", payload, received_at, "accepted")
     return {"status": "accepted"}
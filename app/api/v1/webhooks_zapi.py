@@ -1,18 +1,25 @@
 # file: app/api/v1/webhooks_zapi.py
 
 import logging
+import time
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-
-from app.db.session import get_db
-from app.services.vendors_service import get_vendor_by_instance
-from app.services.conversations_service import ensure_conversation
-from app.services.sessions_service import ensure_session
-from app.services.messages_service import log_message
-from app.services.chatwoot_service import chatwoot_client, ChatwootError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.logging_setup import log_payload
+from app.core.metrics import count_outcome, stage
+from app.core.tracing import span
+from app.db.session import get_async_db
+from app.db.writer import run_write
+from app.services.routing_service import resolve_routing_context_async
+from app.services.vendor_registry import vendor_registry
+from app.services.messages_service import log_message_async
+from app.services.vendor_metrics_service import record_message_nowait
+from app.services.outbound_service import outbound
 from app.schemas.messages_log import MessageLogCreate
 
 from app.utils.file_proxy import download_and_push_to_r2
+from app.utils.memory_profiler import MediaMemoryProbe
+from app.utils.traffic_capture import traffic_capture
 
 router = APIRouter()
 logger = logging.getLogger("webhooks_zapi")
@@ -75,12 +82,9 @@ def _extract_media_url(payload: dict, msg_type: str) -> str | None:
 # WEBHOOK PRINCIPAL
 # ============================================================
 
-@router.post("")
-async def zapi_webhook(payload: dict, db: Session = Depends(get_db)):
+async def _handle_webhook(payload: dict, db: AsyncSession) -> dict:
 
-    print("\n\n========== ZAPI WEBHOOK RECEBIDO ==========")
-    print(payload)
-    print("===========================================\n\n")
+    log_payload(logger, "[ZAPI] webhook recebido", payload)
 
     if payload.get("type") not in ("ReceivedCallback", "SentCallback", None):
         return {"ignored": True}
@@ -89,7 +93,8 @@ async def zapi_webhook(payload: dict, db: Session = Depends(get_db)):
     if not instance_id:
         return {"ignored": True, "reason": "missing_instance_id"}
 
-    vendor = get_vendor_by_instance(db, instance_id)
+    with stage("zapi", "vendor_lookup"):
+        vendor = await vendor_registry.get_by_instance(instance_id)
     if not vendor:
         return {"ignored": True, "reason": "vendor_not_found"}
 
@@ -101,21 +106,17 @@ async def zapi_webhook(payload: dict, db: Session = Depends(get_db)):
     if not contact_identifier:
         return {"ignored": True, "reason": "missing_contact_identifier"}
 
-    # Criar conversa interna
-    conversation = ensure_conversation(
-        db,
-        phone=contact_identifier,
-        vendor_id=vendor.vendor_id,
-    )
-
-    # Session
-    session = ensure_session(
-        db,
-        conversation_id=conversation.conversation_id,
-        vendor_id=vendor.vendor_id,
-        zapi_lid=payload.get("participantLid") or "",
-        chatwoot_conv_id="",
-    )
+    # Conversa interna + session (1 SELECT, 1 COMMIT)
+    with stage("zapi", "routing"):
+        ctx = await run_write(db, lambda s: resolve_routing_context_async(
+            s,
+            instance_id=instance_id,
+            phone=contact_identifier,
+            zapi_lid=payload.get("participantLid") or "",
+            chatwoot_conv_id="",
+            commit=False,
+            vendor=vendor,
+        ))
 
     msg_type = _detect_msg_type(payload)
     message_text = payload.get("text", {}).get("message")
@@ -123,74 +124,129 @@ async def zapi_webhook(payload: dict, db: Session = Depends(get_db)):
     # =====================================================
     # ENVIAR PARA CHATWOOT
     # =====================================================
-    try:
-        inbox_identifier = vendor.inbox_identifier
+    inbox_identifier = ctx.inbox_identifier
 
-        # → TEXT
-        if msg_type == "text":
-            result = await chatwoot_client.send_from_zapi_payload(
+    # → TEXT
+    if msg_type == "text":
+        # falha retentável → retry em background (result.deferred)
+        with stage("zapi", "chatwoot_send"):
+            result = await outbound.send_chatwoot(
                 payload,
                 inbox_identifier
             )
 
-        # → MEDIA
-        else:
-            media_url = _extract_media_url(payload, msg_type)
-            if not media_url:
-                return {"ignored": True, "reason": "missing_media_url"}
+    # → MEDIA
+    else:
+        media_url = _extract_media_url(payload, msg_type)
+        if not media_url:
+            return {"ignored": True, "reason": "missing_media_url"}
+
+        # --- CORREÇÃO AQUI: Capturar a legenda original da mídia ---
+        original_media_data = payload.get(msg_type, {})
+        original_caption = original_media_data.get("caption") or ""
+        # -----------------------------------------------------------
 
-            # --- CORREÇÃO AQUI: Capturar a legenda original da mídia ---
-            original_media_data = payload.get(msg_type, {})
-            original_caption = original_media_data.get("caption") or ""
-            # -----------------------------------------------------------
+        # download + R2 + reenvio ao Chatwoot mantêm o arquivo em memória
+        memory_probe = MediaMemoryProbe("zapi", msg_type)
 
+        with stage("zapi", "r2_upload"):
             r2_url, mime = await download_and_push_to_r2(media_url)
 
-            patched = payload.copy()
-            
-            if msg_type == "image":
-                patched["image"] = {
-                    "imageUrl": r2_url,
-                    "caption": original_caption  # <--- Usando a variável correta
-                }
-            elif msg_type == "video":
-                patched["video"] = {
-                    "videoUrl": r2_url,
-                    "caption": original_caption  # <--- Serve para vídeo também
-                }
-            elif msg_type == "audio":
-                patched["audio"] = {"audioUrl": r2_url} # Áudio geralmente não tem caption, ok
-            elif msg_type == "document":
-                patched["document"] = {
-                    "documentUrl": r2_url,
-                    "mimeType": mime,
-                    "caption": original_caption # Documento as vezes tem caption
-                }
-
-            result = await chatwoot_client.send_from_zapi_payload(
+        patched = payload.copy()
+        
+        if msg_type == "image":
+            patched["image"] = {
+                "imageUrl": r2_url,
+                "caption": original_caption  # <--- Usando a variável correta
+            }
+        elif msg_type == "video":
+            patched["video"] = {
+                "videoUrl": r2_url,
+                "caption": original_caption  # <--- Serve para vídeo também
+            }
+        elif msg_type == "audio":
+            patched["audio"] = {"audioUrl": r2_url} # Áudio geralmente não tem caption, ok
+        elif msg_type == "document":
+            patched["document"] = {
+                "documentUrl": r2_url,
+                "mimeType": mime,
+                "caption": original_caption # Documento as vezes tem caption
+            }
+
+        with stage("zapi", "chatwoot_send"):
+            result = await outbound.send_chatwoot(
                 patched,
                 inbox_identifier
             )
 
-    except ChatwootError:
-        raise HTTPException(status_code=500, detail="failed_to_forward_to_chatwoot")
+        memory_probe.log()
 
     # =====================================================
     # LOG INTERNO
     # =====================================================
     msg_log = MessageLogCreate(
-        conversation_id=conversation.conversation_id,
-        session_id=session.session_id,
-        vendor_id=vendor.vendor_id,
+        conversation_id=ctx.conversation_id,
+        session_id=ctx.session_id,
+        vendor_id=ctx.vendor_id,
         direction="incoming",
         source="zapi",
         message_type=msg_type,
         content=payload.get("text", {}).get("message") or "",
     )
-    log_message(db, msg_log)
+    with stage("zapi", "log_write"):
+        await run_write(db, lambda s: log_message_async(s, msg_log, commit=False))
+
+    # contadores em tempo real (fromMe = vendedor respondeu pelo celular)
+    record_message_nowait(
+        ctx.vendor_id,
+        "outgoing" if payload.get("fromMe") else "incoming",
+        ctx.conversation_id,
+        contact=contact_identifier,
+    )
 
     return {
         "status": "ok",
-        "conversation_id": conversation.conversation_id,
+        "conversation_id": ctx.conversation_id,
         "result": result,
     }
+
+
+def _delivery_outcome(result) -> str:
+    # entrega ao Chatwoot adiada (retry) ou já na dead-letter
+    if isinstance(result, dict):
+        if result.get("deferred"):
+            return "deferred"
+        if result.get("dead_letter"):
+            return "dead_letter"
+    return "ok"
+
+
+@router.post("")
+async def zapi_webhook(payload: dict, db: AsyncSession = Depends(get_async_db)):
+    received_at = time.time()
+    with span(
+        "zapi_webhook",
+        instance_id=payload.get("instanceId"),
+        callback=payload.get("type"),
+        message_id=payload.get("messageId"),
+    ) as root:
+        try:
+            with stage("zapi", "total"):
+                result = await _handle_webhook(payload, db)
+        except HTTPException as e:
+            count_outcome("zapi", "error", str(e.detail))
+            traffic_capture.record("zapi", payload, received_at, "error", str(e.detail), e.status_code)
+            root.set("outcome", "error")
+            raise
+        except Exception:
+            count_outcome("zapi", "error", "exception")
+            traffic_capture.record("zapi", payload, received_at, "error", "exception", 500)
+            root.set("outcome", "error")
+            raise
+
+        outcome = "ignored" if result.get("ignored") else _delivery_outcome(result.get("result"))
+        count_outcome("zapi", outcome, result.get("reason", ""))
+        traffic_capture.record("zapi", payload, received_at, outcome, result.get("reason", ""))
+        root.set("outcome", outcome)
+        root.set("conversation_id", result.get("conversation_id"))
+        return result
@@ -0,0 +1,207 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from app.core.metrics import CIRCUIT_REJECTED, CIRCUIT_STATE, CIRCUIT_TRANSITIONS
+from app.core.settings import settings
+
+logger = logging.getLogger("circuit_breaker")
+
+
+# ============================================================
+# ⚡ Circuit breakers por upstream
+# ============================================================
+#
+# Um breaker por host do Chatwoot e por instância da Z-API:
+# - closed   : chamadas passam; erros (sem resposta, 408, 429, 5xx)
+#              numa janela deslizante de CIRCUIT_WINDOW_SECONDS
+# - open     : taxa de erro >= CIRCUIT_ERROR_RATE com pelo menos
+#              CIRCUIT_MIN_CALLS chamadas → falha na hora
+#              (CircuitOpenError) por CIRCUIT_OPEN_SECONDS
+# - half_open: passado o tempo, 1 chamada de prova por vez; sucesso
+#              fecha, erro reabre
+#
+# Quem recebe CircuitOpenError adia o trabalho (outbound_service
+# reagenda o job para quando o breaker puder reabrir).
+#
+# Uso (sync ou async):
+#   with breaker.call() as call:
+#       resp = ...
+#       call.status(resp.status)
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+FAILURE_STATUS = {408, 429}
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, name: str, retry_after: float) -> None:
+        super().__init__(f"circuito aberto: {name} (nova tentativa em {retry_after:.1f}s)")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class _Call:
+    __slots__ = ("ok",)
+
+    def __init__(self) -> None:
+        self.ok = True
+
+    def status(self, code: int | None) -> None:
+        self.ok = code is not None and code not in FAILURE_STATUS and code < 500
+
+
+class CircuitBreaker:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.state = CLOSED
+        self.opened_until = 0.0
+        self._probing = False
+        # [segundo, ok, erros] por segundo da janela
+        self._buckets: deque[list[int]] = deque()
+        self._lock = threading.Lock()
+        CIRCUIT_STATE.labels(name).set(STATE_VALUES[CLOSED])
+
+    # --------------------------------------------------------
+    # Janela deslizante
+    # --------------------------------------------------------
+    def _counts(self, now: float) -> tuple[int, int]:
+        horizon = int(now - settings.CIRCUIT_WINDOW_SECONDS)
+        while self._buckets and self._buckets[0][0] <= horizon:
+            self._buckets.popleft()
+        ok = sum(b[1] for b in self._buckets)
+        failed = sum(b[2] for b in self._buckets)
+        return ok, failed
+
+    def _add(self, now: float, ok: bool) -> None:
+        second = int(now)
+        if not self._buckets or self._buckets[-1][0] != second:
+            self._buckets.append([second, 0, 0])
+        self._buckets[-1][1 if ok else 2] += 1
+
+    def _transition(self, state: str, now: float) -> None:
+        self.state = state
+        if state == OPEN:
+            self.opened_until = now + settings.CIRCUIT_OPEN_SECONDS
+            logger.warning(f"⚡ [circuit] {self.name} ABERTO por {settings.CIRCUIT_OPEN_SECONDS:g}s")
+        elif state == CLOSED:
+            self._buckets.clear()
+            logger.info(f"⚡ [circuit] {self.name} fechado")
+        CIRCUIT_STATE.labels(self.name).set(STATE_VALUES[state])
+        CIRCUIT_TRANSITIONS.labels(self.name, state).inc()
+
+    # --------------------------------------------------------
+    # Chamadas
+    # --------------------------------------------------------
+    def before(self) -> bool:
+        """
+        Libera a chamada (True = é a prova do half-open) ou levanta
+        CircuitOpenError.
+        """
+        now = time.time()
+        with self._lock:
+            if self.state == CLOSED:
+                return False
+            if self.state == OPEN:
+                if now < self.opened_until:
+                    CIRCUIT_REJECTED.labels(self.name).inc()
+                    raise CircuitOpenError(self.name, self.opened_until - now)
+                self._transition(HALF_OPEN, now)
+            if self._probing:
+                CIRCUIT_REJECTED.labels(self.name).inc()
+                # a prova em voo decide; volta logo
+                raise CircuitOpenError(self.name, 1.0)
+            self._probing = True
+            return True
+
+    def check(self) -> None:
+        """
+        Só falha se aberto; não consome a prova do half-open (para
+        fluxos com várias chamadas, antes da primeira).
+        """
+        if not settings.CIRCUIT_BREAKER_ENABLED or self.state != OPEN:
+            return
+        retry_after = self.opened_until - time.time()
+        if retry_after > 0:
+            CIRCUIT_REJECTED.labels(self.name).inc()
+            raise CircuitOpenError(self.name, retry_after)
+
+    def record(self, ok: bool, probe: bool = False) -> None:
+        now = time.time()
+        with self._lock:
+            if probe:
+                self._probing = False
+                if self.state == HALF_OPEN:
+                    self._transition(CLOSED if ok else OPEN, now)
+                return
+            if self.state != CLOSED:
+                # resposta de chamada iniciada antes de abrir
+                return
+
+            self._add(now, ok)
+            if ok:
+                return
+            succeeded, failed = self._counts(now)
+            total = succeeded + failed
+            if total >= settings.CIRCUIT_MIN_CALLS and failed / total >= settings.CIRCUIT_ERROR_RATE:
+                self._transition(OPEN, now)
+
+    def release(self, probe: bool) -> None:
+        # chamada cancelada: não conta, mas libera a vaga de prova
+        if probe:
+            with self._lock:
+                self._probing = False
+
+    @contextmanager
+    def call(self):
+        if not settings.CIRCUIT_BREAKER_ENABLED:
+            yield _Call()
+            return
+
+        probe = self.before()
+        outcome = _Call()
+        try:
+            yield outcome
+        except asyncio.CancelledError:
+            self.release(probe)
+            raise
+        except Exception:
+            self.record(False, probe)
+            raise
+        else:
+            self.record(outcome.ok, probe)
+
+    def status(self) -> dict:
+        now = time.time()
+        with self._lock:
+            succeeded, failed = self._counts(now)
+            return {
+                "state": self.state,
+                "calls": succeeded + failed,
+                "errors": failed,
+                "retry_after": round(max(self.opened_until - now, 0.0), 1) if self.state == OPEN else 0.0,
+            }
+
+
+class CircuitBreakers:
+    def __init__(self) -> None:
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> CircuitBreaker:
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.get(name)
+                if breaker is None:
+                    breaker = self._breakers[name] = CircuitBreaker(name)
+        return breaker
+
+    def status(self) -> dict:
+        return {name: b.status() for name, b in sorted(self._breakers.items())}
+
+
+circuit_breakers = CircuitBreakers()
@@ -0,0 +1,26 @@
+# file: app/core/duckdb_conn.py
+
+import duckdb
+from pathlib import Path
+
+# ============================================================
+# 🦆 DuckDB — conexão única em memória
+# ============================================================
+#
+# Views/tabelas criadas em duckdb_conn ficam visíveis para todos
+# os cursores. Cada thread/consulta deve usar o próprio cursor():
+# o objeto de conexão não é thread-safe.
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+DATA_DIR = BASE_DIR / "data"
+
+# extensões só por INSTALL explícito (startup do analytics): nunca
+# download implícito no meio de uma consulta
+duckdb_conn = duckdb.connect(database=":memory:", config={"autoinstall_known_extensions": False})
+
+
+def get_cursor() -> duckdb.DuckDBPyConnection:
+    """
+    Cursor próprio sobre a conexão compartilhada (uso por chamada).
+    """
+    return duckdb_conn.cursor()
@@ -0,0 +1,257 @@
+import asyncio
+import fnmatch
+import json
+import logging
+import random
+import time
+
+from app.core.metrics import FAULTS_INJECTED
+from app.core.redis import get_redis, publish
+from app.core.settings import settings
+
+logger = logging.getLogger("fault_injection")
+
+
+# ============================================================
+# 💥 Injeção de falhas/latência nos clientes de upstream
+# ============================================================
+#
+# Só para testes (staging / benchmarks.load): desligado a menos que
+# FAULT_INJECTION_ENABLED=true. Regras por upstream + endpoint:
+#
+#   {"target": "chatwoot", "endpoint": "send_*",
+#    "latency": "fixed:5000", "error_rate": 0.1, "error_status": 503,
+#    "slow_body_kbps": 64}
+#
+# - target  : chatwoot | zapi | r2
+# - endpoint: padrão fnmatch sobre o nome da chamada
+#     chatwoot: create_contact, get_open_conversation, create_conversation,
+#               send_text_message, send_media_message, download_file
+#     zapi    : send-text, send-image, send-video, send-audio, send-document, ...
+#     r2      : put_object, download
+# - latency : ms → "5000" | "fixed:5000" | "uniform:100-500" |
+#             "normal:300,50" | "exp:200" (média)
+# - error_rate: fração das chamadas que falham com InjectedFault
+#   (tratada pelo cliente como erro de transporte)
+# - slow_body_kbps: corpo (download/upload) entregue a N KB/s
+#
+# A 1ª regra que casa vale. O cliente Z-API e o R2 são síncronos:
+# a latência injetada neles usa time.sleep e segura a thread que
+# chamou, exatamente como um upstream lento real faria.
+#
+# Configuração: FAULT_INJECTION (JSON com a lista de regras) ou
+# PUT /debug/faults (aplica e publica para os demais workers).
+
+FAULTS_CHANNEL = "faults:config"
+TARGETS = ("chatwoot", "zapi", "r2")
+
+
+class InjectedFault(Exception):
+    def __init__(self, target: str, endpoint: str, status: int) -> None:
+        super().__init__(f"falha injetada {target}.{endpoint} (status {status})")
+        self.status_code = status
+
+
+def _parse_latency(spec: str | int | float | None):
+    """
+    Retorna um sorteador () -> segundos, ou None.
+    """
+    if spec in (None, "", 0):
+        return None
+
+    kind, _, args = str(spec).partition(":")
+    if not args:
+        kind, args = "fixed", kind
+
+    try:
+        if kind == "fixed":
+            value = float(args) / 1000
+            return lambda: value
+        if kind == "uniform":
+            low, high = (float(x) / 1000 for x in args.split("-", 1))
+            return lambda: random.uniform(low, high)
+        if kind == "normal":
+            mean, std = (float(x) / 1000 for x in args.split(",", 1))
+            return lambda: max(random.gauss(mean, std), 0.0)
+        if kind == "exp":
+            rate = 1000 / float(args)
+            return lambda: random.expovariate(rate)
+    except (ValueError, ZeroDivisionError):
+        pass
+
+    raise ValueError(f"latência inválida: {spec}")
+
+
+class FaultRule:
+    __slots__ = ("target", "endpoint", "latency", "error_rate", "error_status", "slow_body_kbps", "spec", "_sample")
+
+    def __init__(self, spec: dict) -> None:
+        self.target = spec.get("target")
+        if self.target not in TARGETS:
+            raise ValueError(f"target inválido: {self.target} (use {', '.join(TARGETS)})")
+
+        self.endpoint = spec.get("endpoint") or "*"
+        self.latency = spec.get("latency")
+        self._sample = _parse_latency(self.latency)
+
+        self.error_rate = float(spec.get("error_rate") or 0.0)
+        if not 0.0 <= self.error_rate <= 1.0:
+            raise ValueError(f"error_rate inválido: {self.error_rate}")
+        self.error_status = int(spec.get("error_status") or 503)
+
+        kbps = spec.get("slow_body_kbps")
+        self.slow_body_kbps = float(kbps) if kbps else None
+        if self.slow_body_kbps is not None and self.slow_body_kbps <= 0:
+            raise ValueError(f"slow_body_kbps inválido: {kbps}")
+
+        self.spec = {
+            "target": self.target,
+            "endpoint": self.endpoint,
+            "latency": self.latency,
+            "error_rate": self.error_rate,
+            "error_status": self.error_status,
+            "slow_body_kbps": self.slow_body_kbps,
+        }
+
+    def matches(self, target: str, endpoint: str) -> bool:
+        return target == self.target and fnmatch.fnmatchcase(endpoint, self.endpoint)
+
+    def delay(self) -> float:
+        return self._sample() if self._sample else 0.0
+
+    def fails(self) -> bool:
+        return self.error_rate > 0 and random.random() < self.error_rate
+
+    def body_delay(self, nbytes: int) -> float:
+        if not self.slow_body_kbps:
+            return 0.0
+        return nbytes / (self.slow_body_kbps * 1024)
+
+
+class FaultInjector:
+    def __init__(self, enabled: bool) -> None:
+        self.enabled = enabled
+        self.rules: list[FaultRule] = []
+
+    def configure(self, rules: list[dict]) -> None:
+        """
+        Substitui todas as regras (lista vazia = sem falhas).
+        """
+        if rules and not self.enabled:
+            raise RuntimeError("fault_injection_disabled")
+        compiled = [FaultRule(r) for r in rules]
+        self.rules = compiled
+        if compiled:
+            logger.warning(f"💥 Injeção de falhas ativa: {[r.spec for r in compiled]}")
+        else:
+            logger.info("💥 Injeção de falhas limpa")
+
+    def config(self) -> dict:
+        return {"enabled": self.enabled, "rules": [r.spec for r in self.rules]}
+
+    def _match(self, target: str, endpoint: str) -> FaultRule | None:
+        for rule in self.rules:
+            if rule.matches(target, endpoint):
+                return rule
+        return None
+
+    # --------------------------------------------------------
+    # Antes da chamada: latência + erro
+    # --------------------------------------------------------
+    async def before(self, target: str, endpoint: str) -> None:
+        if not self.rules:
+            return
+        rule = self._match(target, endpoint)
+        if rule is None:
+            return
+        delay = rule.delay()
+        if delay:
+            FAULTS_INJECTED.labels(target, "latency").inc()
+            await asyncio.sleep(delay)
+        if rule.fails():
+            FAULTS_INJECTED.labels(target, "error").inc()
+            raise InjectedFault(target, endpoint, rule.error_status)
+
+    def before_sync(self, target: str, endpoint: str) -> None:
+        if not self.rules:
+            return
+        rule = self._match(target, endpoint)
+        if rule is None:
+            return
+        delay = rule.delay()
+        if delay:
+            FAULTS_INJECTED.labels(target, "latency").inc()
+            time.sleep(delay)
+        if rule.fails():
+            FAULTS_INJECTED.labels(target, "error").inc()
+            raise InjectedFault(target, endpoint, rule.error_status)
+
+    # --------------------------------------------------------
+    # Corpo lento (download/upload de mídia)
+    # --------------------------------------------------------
+    async def body(self, target: str, endpoint: str, nbytes: int) -> None:
+        if not self.rules:
+            return
+        rule = self._match(target, endpoint)
+        delay = rule.body_delay(nbytes) if rule else 0.0
+        if delay:
+            FAULTS_INJECTED.labels(target, "slow_body").inc()
+            await asyncio.sleep(delay)
+
+    def body_sync(self, target: str, endpoint: str, nbytes: int) -> None:
+        if not self.rules:
+            return
+        rule = self._match(target, endpoint)
+        delay = rule.body_delay(nbytes) if rule else 0.0
+        if delay:
+            FAULTS_INJECTED.labels(target, "slow_body").inc()
+            time.sleep(delay)
+
+
+def _initial_rules() -> list[dict]:
+    if not settings.FAULT_INJECTION:
+        return []
+    rules = json.loads(settings.FAULT_INJECTION)
+    return rules if isinstance(rules, list) else [rules]
+
+
+fault_injector = FaultInjector(settings.FAULT_INJECTION_ENABLED)
+if settings.FAULT_INJECTION_ENABLED:
+    fault_injector.configure(_initial_rules())
+
+
+# ============================================================
+# Configuração em runtime (todos os workers)
+# ============================================================
+
+async def publish_fault_config(rules: list[dict]) -> None:
+    await publish(FAULTS_CHANNEL, json.dumps(rules))
+
+
+async def run_fault_config_listener() -> None:
+    """
+    Loop de background: aplica regras publicadas por qualquer worker.
+    """
+    while True:
+        pubsub = None
+        try:
+            redis = await get_redis()
+            pubsub = redis.pubsub()
+            await pubsub.subscribe(FAULTS_CHANNEL)
+
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                try:
+                    fault_injector.configure(json.loads(message["data"]))
+                except (ValueError, TypeError, RuntimeError) as e:
+                    logger.error(f"❌ [faults] regras inválidas recebidas: {e}")
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ [faults] listener falhou: {e}")
+            await asyncio.sleep(5)
+        finally:
+            if pubsub is not None:
+                await pubsub.aclose()
@@ -0,0 +1,415 @@
+# file: app/core/logging_setup.py
+
+import asyncio
+import copy
+import json
+import logging
+import queue
+import random
+import re
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any
+
+from app.core.redis import get_redis, publish
+from app.core.settings import settings
+from app.core.tracing import install_log_record_factory
+
+logger = logging.getLogger("logging_setup")
+
+
+# ============================================================
+# 🪵 Logging estruturado e não bloqueante
+# ============================================================
+#
+# - Quem loga só enfileira o record (QueueHandler, fila limitada:
+#   cheia → descarta e conta); formatação, redação e escrita no
+#   stdout rodam na thread do QueueListener
+# - LOG_FORMAT=json → 1 objeto JSON por linha (com trace_id/span_id)
+# - Redação automática de tokens/segredos e telefones, no texto e
+#   em payloads estruturados
+# - log_payload(): dumps de payload amostrados por logger
+# - Níveis e taxas de amostragem mudam em runtime (endpoint admin →
+#   canal Redis → todos os workers)
+
+LOG_QUEUE_MAX = 10_000
+LOGGING_CONFIG_CHANNEL = "logging:config"
+
+# atributos padrão do LogRecord (o resto vai como campo extra no JSON)
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {
+    "message", "asctime", "trace_id", "span_id", "payload",
+}
+
+
+# ============================================================
+# Redação
+# ============================================================
+
+SECRET_KEYS = {
+    "token", "client-token", "client_token", "clienttoken", "instance_token",
+    "api_access_token", "api_key", "apikey", "authorization", "password",
+    "secret", "access_key", "secret_access_key",
+}
+PHONE_KEYS = {
+    "phone", "phone_number", "senderphone", "participantphone",
+    "connectedphone", "contact_identifier", "identifier",
+}
+
+_SECRET_TEXT = re.compile(
+    r"(?i)(\"?(?:client[-_]?token|api[-_]?access[-_]?token|instance[-_]?token|token|password|secret|api[-_]?key)\"?"
+    r"\s*[:=]\s*[\"']?)([^\"'\s,}&]+)"
+)
+_URL_TOKEN = re.compile(r"(/token/)[^/\s\"']+")
+_BEARER = re.compile(r"(?i)(bearer\s+)[\w.\-~+/]+=*")
+# +5547999991234 / 5547999991234 (DDI 55) — não pega ids de grupo (...-group)
+_PHONE_TEXT = re.compile(r"(?<![\w-])(\+\d{10,15}|55\d{10,11})(?![\w-])")
+
+_REDACTED = "***"
+
+
+def _mask_phone(value: str) -> str:
+    digits = "".join(ch for ch in value if ch.isdigit())
+    if len(digits) < 8:
+        return value
+    prefix = "+" if value.startswith("+") else ""
+    return f"{prefix}{'*' * (len(digits) - 4)}{digits[-4:]}"
+
+
+def known_secrets() -> list[str]:
+    values = [
+        settings.CHATWOOT_API_KEY,
+        settings.ZAPI_CLIENT_TOKEN,
+        settings.R2_ACCESS_KEY_ID,
+        settings.R2_SECRET_ACCESS_KEY,
+        settings.REDIS_PASSWORD,
+        settings.ADMIN_TOKEN,
+    ]
+    return [v for v in values if v and len(v) >= 8]
+
+
+class Redactor:
+    def __init__(self, secrets: list[str], phones: bool = True) -> None:
+        self.secrets = secrets
+        self.phones = phones
+
+    def text(self, value: str) -> str:
+        for secret in self.secrets:
+            if secret in value:
+                value = value.replace(secret, _REDACTED)
+        value = _URL_TOKEN.sub(rf"\g<1>{_REDACTED}", value)
+        value = _BEARER.sub(rf"\g<1>{_REDACTED}", value)
+        value = _SECRET_TEXT.sub(rf"\g<1>{_REDACTED}", value)
+        if self.phones:
+            value = _PHONE_TEXT.sub(lambda m: _mask_phone(m.group(0)), value)
+        return value
+
+    def value(self, obj: Any, key: str | None = None) -> Any:
+        """
+        Redação recursiva de dict/list (por nome de chave + texto).
+        """
+        if key is not None:
+            lowered = key.lower()
+            if lowered in SECRET_KEYS and obj:
+                return _REDACTED
+            if self.phones and lowered in PHONE_KEYS and isinstance(obj, (str, int)):
+                text = str(obj)
+                return text if text.endswith("-group") else _mask_phone(text)
+
+        if isinstance(obj, dict):
+            return {k: self.value(v, str(k)) for k, v in obj.items()}
+        if isinstance(obj, (list, tuple)):
+            return [self.value(v) for v in obj]
+        if isinstance(obj, str):
+            return self.text(obj)
+        return obj
+
+
+_redactor = Redactor(known_secrets(), phones=settings.LOG_REDACT_PHONES)
+
+
+def redact(value: Any) -> Any:
+    return _redactor.value(value)
+
+
+# ============================================================
+# Formatters
+# ============================================================
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": _redactor.text(record.getMessage()),
+        }
+
+        trace_id = getattr(record, "trace_id", "")
+        if trace_id:
+            data["trace_id"] = trace_id
+            data["span_id"] = record.span_id
+
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                data[key] = _redactor.value(value, key)
+
+        payload = getattr(record, "payload", None)
+        if payload is not None:
+            data["payload"] = _redactor.value(payload)
+
+        if record.exc_info:
+            data["exc"] = _redactor.text(self.formatException(record.exc_info))
+
+        return json.dumps(data, default=str, ensure_ascii=False)
+
+
+class RedactingFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        payload = getattr(record, "payload", None)
+        if payload is not None:
+            text += " " + json.dumps(_redactor.value(payload), default=str, ensure_ascii=False)
+        return _redactor.text(text)
+
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s [%(name)s] %(trace_id)s %(message)s"
+
+
+# ============================================================
+# Handler não bloqueante
+# ============================================================
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Enfileira sem esperar. A formatação fica para o listener; aqui
+    só resolve msg % args (args podem mudar depois da chamada).
+    """
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: QueueListener | None = None
+_queue_handler: NonBlockingQueueHandler | None = None
+_stream_handler: logging.StreamHandler | None = None
+
+
+def setup_logging() -> None:
+    """
+    Configura o root logger (idempotente). Chamar no import do app,
+    depois da configuração de logging do uvicorn, e no startup
+    (reativa a fila após um shutdown_logging).
+    """
+    global _listener, _queue_handler, _stream_handler
+
+    if _listener is not None:
+        return
+
+    install_log_record_factory()
+    first_setup = _stream_handler is None
+
+    if first_setup:
+        _stream_handler = logging.StreamHandler(sys.stdout)
+        if settings.LOG_FORMAT.lower() == "json":
+            _stream_handler.setFormatter(JsonFormatter())
+        else:
+            _stream_handler.setFormatter(RedactingFormatter(TEXT_FORMAT))
+
+    log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_MAX)
+    _queue_handler = NonBlockingQueueHandler(log_queue)
+    _listener = QueueListener(log_queue, _stream_handler, respect_handler_level=True)
+    _listener.start()
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+
+    if not first_setup:
+        return
+
+    root.setLevel(settings.LOG_LEVEL.upper())
+
+    # uvicorn escreve direto no stdout: passa pelo mesmo pipeline
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uv_logger = logging.getLogger(name)
+        uv_logger.handlers.clear()
+        uv_logger.propagate = True
+
+    apply_logging_config({
+        "levels": _parse_map(settings.LOG_LEVELS),
+        "sample_rates": {k: float(v) for k, v in _parse_map(settings.LOG_PAYLOAD_SAMPLE_RATES).items()},
+    })
+
+
+def shutdown_logging() -> None:
+    """
+    Escreve o que restou na fila; logs posteriores vão direto
+    (síncronos) para o stdout.
+    """
+    global _listener
+    if _listener is None:
+        return
+
+    root = logging.getLogger()
+    root.addHandler(_stream_handler)
+    root.removeHandler(_queue_handler)
+    _listener.stop()
+    _listener = None
+
+
+def dropped_records() -> int:
+    return _queue_handler.dropped if _queue_handler else 0
+
+
+def _parse_map(raw: str) -> dict[str, str]:
+    """
+    "chatwoot_service=DEBUG,webhooks_zapi=INFO" → dict
+    """
+    result = {}
+    for item in raw.split(","):
+        if "=" in item:
+            key, value = item.split("=", 1)
+            result[key.strip()] = value.strip()
+    return result
+
+
+# ============================================================
+# Amostragem de payloads
+# ============================================================
+
+class PayloadSampler:
+    def __init__(self, default_rate: float) -> None:
+        self.default_rate = default_rate
+        self.rates: dict[str, float] = {}
+        self._resolved: dict[str, float] = {}
+
+    def set_rates(self, rates: dict[str, float]) -> None:
+        self.rates.update(rates)
+        self._resolved.clear()
+
+    def rate_for(self, name: str) -> float:
+        rate = self._resolved.get(name)
+        if rate is None:
+            # mais específico ganha: "a.b.c" → "a.b" → "a" → padrão
+            rate = self.default_rate
+            parts = name.split(".")
+            for i in range(len(parts), 0, -1):
+                candidate = ".".join(parts[:i])
+                if candidate in self.rates:
+                    rate = self.rates[candidate]
+                    break
+            self._resolved[name] = rate
+        return rate
+
+    def should_log(self, name: str) -> bool:
+        rate = self.rate_for(name)
+        return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+
+
+payload_sampler = PayloadSampler(settings.LOG_PAYLOAD_SAMPLE_RATE)
+
+
+def log_payload(log: logging.Logger, message: str, payload: Any, level: int = logging.INFO) -> None:
+    """
+    Dump de payload amostrado: decide antes de montar o record,
+    então o custo quando não amostrado é só o sorteio.
+    """
+    if log.isEnabledFor(level) and payload_sampler.should_log(log.name):
+        log.log(level, message, extra={"payload": payload})
+
+
+# ============================================================
+# Configuração em runtime
+# ============================================================
+
+def _level_value(level: str) -> int:
+    value = logging.getLevelName(level.upper())
+    if not isinstance(value, int):
+        raise ValueError(f"nível inválido: {level}")
+    return value
+
+
+def apply_logging_config(change: dict) -> None:
+    """
+    {"levels": {"logger": "DEBUG", ...}, "sample_rates": {"logger": 0.1, ...}}
+    "root" (ou "") altera o root logger.
+    """
+    levels = {
+        name: _level_value(level)
+        for name, level in (change.get("levels") or {}).items()
+    }
+    rates = {}
+    for name, rate in (change.get("sample_rates") or {}).items():
+        rate = float(rate)
+        if not 0.0 <= rate <= 1.0:
+            raise ValueError(f"taxa inválida para {name}: {rate}")
+        rates[name] = rate
+
+    for name, level in levels.items():
+        logging.getLogger(None if name in ("", "root") else name).setLevel(level)
+    if rates:
+        payload_sampler.set_rates(rates)
+
+
+def get_logging_config() -> dict:
+    loggers = {
+        name: logging.getLevelName(lg.level)
+        for name, lg in sorted(logging.root.manager.loggerDict.items())
+        if isinstance(lg, logging.Logger) and lg.level != logging.NOTSET
+    }
+    return {
+        "root": logging.getLevelName(logging.getLogger().level),
+        "levels": loggers,
+        "payload_sample_rate": payload_sampler.default_rate,
+        "sample_rates": dict(payload_sampler.rates),
+        "dropped_records": dropped_records(),
+    }
+
+
+async def publish_logging_config(change: dict) -> None:
+    await publish(LOGGING_CONFIG_CHANNEL, json.dumps(change))
+
+
+async def run_logging_config_listener() -> None:
+    """
+    Loop de background: aplica mudanças publicadas por qualquer worker.
+    """
+    while True:
+        pubsub = None
+        try:
+            redis = await get_redis()
+            pubsub = redis.pubsub()
+            await pubsub.subscribe(LOGGING_CONFIG_CHANNEL)
+
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                try:
+                    apply_logging_config(json.loads(message["data"]))
+                    logger.info(f"🪵 configuração de log aplicada: {message['data']}")
+                except (ValueError, TypeError) as e:
+                    logger.error(f"❌ [logging] configuração inválida recebida: {e}")
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ [logging] listener falhou: {e}")
+            await asyncio.sleep(5)
+        finally:
+            if pubsub is not None:
+                await pubsub.aclose()
@@ -0,0 +1,288 @@
+# file: app/core/metrics.py
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Callable, Mapping
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    disable_created_metrics,
+    generate_latest,
+)
+from prometheus_client.core import CounterMetricFamily
+from prometheus_client.registry import Collector
+
+from app.utils.profiler import profiler
+
+logger = logging.getLogger("metrics")
+
+# ============================================================
+# 📈 Métricas Prometheus
+# ============================================================
+#
+# - Histogramas por etapa do pipeline (stage)
+# - Contadores de resultado por pipeline/motivo (count_outcome)
+# - Gauges lidos só no scrape (set_function): custo zero no fluxo
+#
+# Em produção com vários workers, defina PROMETHEUS_MULTIPROC_DIR.
+# Nesse modo só vale o que cada processo grava nos arquivos mmap:
+# set_function e collectors próprios não chegam lá. Então bind_gauge
+# e CounterDictCollector passam a gravar valores explícitos em
+# refresh_metrics() — no scrape (worker que responde) e a cada
+# MULTIPROC_REFRESH_SECONDS (run_metrics_refresher, demais workers).
+# Cada gauge diz como somar os processos (multiprocess_mode).
+
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+MULTIPROC_REFRESH_SECONDS = 10.0
+
+# séries *_created só aumentam o scrape
+disable_created_metrics()
+
+# etapas vão de ~1 ms (lookup em memória) a dezenas de s (upload de mídia)
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+STAGE_SECONDS = Histogram(
+    "omnichannel_stage_duration_seconds",
+    "Duração de cada etapa do pipeline de mensagens",
+    ["pipeline", "stage"],
+    buckets=STAGE_BUCKETS,
+)
+
+OUTCOMES = Counter(
+    "omnichannel_webhook_outcomes_total",
+    "Resultado do processamento de cada webhook",
+    ["pipeline", "outcome", "reason"],
+)
+
+LOOP_LAG = Histogram(
+    "omnichannel_event_loop_lag_seconds",
+    "Atraso do heartbeat do event loop",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+LOOP_BLOCKS = Counter(
+    "omnichannel_event_loop_blocks_total",
+    "Travamentos do event loop acima do limite, por call site",
+    ["site"],
+)
+
+WRITER_QUEUE_DEPTH = Gauge(
+    "omnichannel_db_writer_queue_depth",
+    "Jobs aguardando na fila do writer SQLite",
+    multiprocess_mode="livesum",
+)
+
+ACTIVITY_PENDING = Gauge(
+    "omnichannel_activity_pending",
+    "Conversas com atividade ainda não gravada (write-behind)",
+    multiprocess_mode="livesum",
+)
+
+VENDORS_LOADED = Gauge(
+    "omnichannel_vendor_registry_size",
+    "Vendedores no registro em memória",
+    multiprocess_mode="livemax",
+)
+
+DB_POOL_CHECKED_OUT = Gauge(
+    "omnichannel_db_pool_checked_out",
+    "Conexões em uso no pool",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+
+DB_POOL_SIZE = Gauge(
+    "omnichannel_db_pool_size",
+    "Tamanho configurado do pool",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+
+DB_POOL_OVERFLOW = Gauge(
+    "omnichannel_db_pool_overflow",
+    "Conexões abertas além do tamanho do pool",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+
+FAULTS_INJECTED = Counter(
+    "omnichannel_faults_injected_total",
+    "Falhas/latências injetadas nos clientes de upstream (só testes)",
+    ["target", "kind"],
+)
+
+OUTBOUND_RETRIES = Counter(
+    "omnichannel_outbound_retries_total",
+    "Reenvios feitos pelo worker de entregas, por resultado (ok, retry, dead)",
+    ["target", "result"],
+)
+
+OUTBOUND_DEAD_LETTERS = Counter(
+    "omnichannel_outbound_dead_letters_total",
+    "Envios que foram para a dead-letter",
+    ["target"],
+)
+
+OUTBOUND_QUEUE_DEPTH = Gauge(
+    "omnichannel_outbound_queue_depth",
+    "Jobs de entrega no Redis (retry agendado / dead-letter)",
+    ["queue"],
+    multiprocess_mode="livemax",
+)
+
+CIRCUIT_STATE = Gauge(
+    "omnichannel_circuit_state",
+    "Estado do circuit breaker (0 fechado, 1 half-open, 2 aberto)",
+    ["breaker"],
+    multiprocess_mode="livemax",
+)
+
+CIRCUIT_TRANSITIONS = Counter(
+    "omnichannel_circuit_transitions_total",
+    "Mudanças de estado do circuit breaker",
+    ["breaker", "state"],
+)
+
+CIRCUIT_REJECTED = Counter(
+    "omnichannel_circuit_rejected_total",
+    "Chamadas recusadas na hora com o circuito aberto",
+    ["breaker"],
+)
+
+# filhos já resolvidos: evita .labels() (lock + dict) a cada chamada
+_stage_children: dict[tuple[str, str], Histogram] = {}
+
+
+def _stage_child(pipeline: str, name: str):
+    child = _stage_children.get((pipeline, name))
+    if child is None:
+        child = _stage_children[(pipeline, name)] = STAGE_SECONDS.labels(pipeline, name)
+    return child
+
+
+@contextmanager
+def stage(pipeline: str, name: str):
+    """
+    with stage("zapi", "chatwoot_send"): ...
+    Registra a duração mesmo se a etapa levantar exceção
+    (Prometheus + profiler em memória, label "pipeline.etapa").
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(pipeline, name, time.perf_counter() - start)
+
+
+def observe_stage(pipeline: str, name: str, seconds: float) -> None:
+    _stage_child(pipeline, name).observe(seconds)
+    profiler.record(f"{pipeline}.{name}", seconds)
+
+
+def count_outcome(pipeline: str, outcome: str, reason: str = "") -> None:
+    OUTCOMES.labels(pipeline, outcome, reason).inc()
+
+
+_bound_gauges: list[tuple[Gauge, Callable[[], float]]] = []
+_dict_counters: list["CounterDictCollector"] = []
+
+
+def bind_gauge(gauge: Gauge, fn: Callable[[], float], **labels) -> None:
+    """
+    Gauge calculado no momento do scrape (multiprocess: em refresh_metrics).
+    """
+    child = gauge.labels(**labels) if labels else gauge
+    if MULTIPROCESS:
+        _bound_gauges.append((child, fn))
+    else:
+        child.set_function(fn)
+
+
+class CounterDictCollector(Collector):
+    """
+    Expõe um Mapping[str, int] (ex.: helpers.elided_writes) como
+    contador com um label, sem tocar no código que incrementa.
+    Multiprocess: espelha os incrementos num Counter (arquivos mmap).
+    """
+
+    def __init__(self, name: str, documentation: str, label: str, source: Mapping[str, int]) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label = label
+        self.source = source
+        self._mirror = None
+        self._synced: dict[str, int] = {}
+        if MULTIPROCESS:
+            # fora do REGISTRY: o valor sai dos arquivos, não do collector
+            self._mirror = Counter(name, documentation, [label], registry=None)
+            _dict_counters.append(self)
+
+    def sync(self) -> None:
+        for key, value in list(self.source.items()):
+            delta = value - self._synced.get(key, 0)
+            if delta > 0:
+                self._mirror.labels(key).inc(delta)
+                self._synced[key] = value
+
+    def collect(self):
+        family = CounterMetricFamily(self.name, self.documentation, labels=[self.label])
+        for key, value in list(self.source.items()):
+            family.add_metric([key], value)
+        yield family
+
+
+def refresh_metrics() -> None:
+    """
+    Multiprocess: grava nos arquivos mmap os gauges de bind_gauge e os
+    contadores de CounterDictCollector deste processo.
+    """
+    for child, fn in _bound_gauges:
+        try:
+            child.set(fn())
+        except Exception as e:
+            logger.debug(f"[metrics] gauge não atualizado: {e}")
+    for collector in _dict_counters:
+        collector.sync()
+
+
+async def run_metrics_refresher() -> None:
+    """
+    Loop de background (só multiprocess): mantém os valores deste
+    worker atualizados para o scrape que cair em outro worker.
+    """
+    while True:
+        refresh_metrics()
+        await asyncio.sleep(MULTIPROC_REFRESH_SECONDS)
+
+
+def mark_process_dead() -> None:
+    """
+    Multiprocess: tira os gauges live* deste worker do agregado (shutdown).
+    """
+    if MULTIPROCESS:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(os.getpid())
+
+
+def render_latest() -> tuple[bytes, str]:
+    """
+    (corpo, content-type) no formato texto do Prometheus.
+    """
+    if MULTIPROCESS:
+        from prometheus_client import multiprocess
+
+        refresh_metrics()
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -1,8 +1,10 @@
 # file: app/core/redis.py
 
+import redis
 import redis.asyncio as aioredis
 import logging
 from app.core.settings import settings
+from app.core.tracing import traced
 
 logger = logging.getLogger("redis")
 
@@ -45,6 +47,7 @@ async def get_redis() -> aioredis.Redis:
 # 🧩 Helpers de Cache
 # ============================================================
 
+@traced("redis.cache_set")
 async def cache_set(key: str, value: str, ttl_seconds: int | None = None):
     """
     Salva no Redis com TTL opcional.
@@ -61,6 +64,7 @@ async def cache_set(key: str, value: str, ttl_seconds: int | None = None):
         logger.error(f"❌ Erro no cache_set({key}): {e}")
 
 
+@traced("redis.cache_get")
 async def cache_get(key: str) -> str | None:
     """
     Recupera chave do Redis.
@@ -76,6 +80,7 @@ async def cache_get(key: str) -> str | None:
         return None
 
 
+@traced("redis.cache_delete")
 async def cache_delete(key: str):
     """
     Remove uma chave do Redis.
@@ -87,3 +92,40 @@ async def cache_delete(key: str):
         logger.debug(f"[redis] DEL {key}")
     except Exception as e:
         logger.error(f"❌ Erro no cache_delete({key}): {e}")
+
+
+# ============================================================
+# 📣 Pub/Sub
+# ============================================================
+
+@traced("redis.publish")
+async def publish(channel: str, message: str):
+    """
+    Publica mensagem em um canal Redis.
+    Falha de conexão só é logada (quem publica não deve quebrar).
+    """
+    try:
+        redis = await get_redis()
+        await redis.publish(channel, message)
+        logger.debug(f"[redis] PUBLISH {channel} {message}")
+    except Exception as e:
+        logger.error(f"❌ Erro no publish({channel}): {e}")
+
+
+def publish_sync(channel: str, message: str):
+    """
+    Publish para código síncrono fora do event loop (scripts, seeds).
+    """
+    client = redis.Redis(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        password=settings.REDIS_PASSWORD or None,
+        db=0,
+    )
+
+    try:
+        client.publish(channel, message)
+    except Exception as e:
+        logger.error(f"❌ Erro no publish_sync({channel}): {e}")
+    finally:
+        client.close()
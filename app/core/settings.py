@@ -21,6 +21,92 @@ class Settings(BaseSettings):
     REDIS_PORT: int = 6379
     REDIS_PASSWORD: str | None = None
 
+    # Write-behind de last_active_at / current_vendor_id
+    ACTIVITY_FLUSH_INTERVAL_SECONDS: float = 5.0
+
+    # Perfil SQLite (só vale quando DATABASE_URL é sqlite)
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_SINGLE_WRITER: bool = True
+    SQLITE_WRITER_MAX_BATCH: int = 64
+
+    # Registro de vendedores em memória (recarga de segurança)
+    VENDOR_REGISTRY_REFRESH_SECONDS: float = 300.0
+
+    # Arquivo frio de messages_log (Parquet particionado por dia)
+    ARCHIVE_DIR: str = "./data/archive"
+    ARCHIVE_RETENTION_DAYS: int = 90
+    ARCHIVE_BATCH_SIZE: int = 10_000
+    ARCHIVE_INTERVAL_SECONDS: float = 3600.0
+
+    # Analytics DuckDB: False = só o arquivo Parquet (não toca no banco).
+    # Padrão True porque o Parquet só tem o que passou de
+    # ARCHIVE_RETENTION_DAYS: sem o banco, a janela padrão (7 dias) vem
+    # vazia. Num cache miss a leitura é read-only; aponte
+    # ANALYTICS_DATABASE_URL para uma réplica para tirar do primário.
+    ANALYTICS_ATTACH_DB: bool = True
+    ANALYTICS_DATABASE_URL: str = ""
+    # INSTALL da extensão sqlite/postgres no startup (baixa da internet).
+    # False = imagem já traz a extensão (INSTALL feito no build).
+    ANALYTICS_INSTALL_EXTENSIONS: bool = True
+
+    # Base de clientes (Parquet); vazio = data/parceiros.parquet
+    CUSTOMERS_PARQUET_PATH: str = ""
+
+    # Tracing: none | jsonl | otlp (OTLP/HTTP JSON, ex.: collector em :4318)
+    TRACE_EXPORTER: str = "none"
+    TRACE_SAMPLE_RATE: float = 1.0
+    TRACE_JSONL_PATH: str = "./data/traces.jsonl"
+    TRACE_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    TRACE_SERVICE_NAME: str = "omnichannel-api"
+
+    # Watchdog do event loop (lag + pilha de quem travou o loop)
+    LOOP_WATCHDOG_ENABLED: bool = True
+    LOOP_BLOCK_THRESHOLD_MS: float = 100.0
+
+    # Logging: json | text; níveis por logger "nome=NIVEL,..."
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"
+    LOG_LEVELS: str = ""
+    # dumps de payload (log_payload): taxa padrão e por logger "nome=0.5,..."
+    LOG_PAYLOAD_SAMPLE_RATE: float = 0.01
+    LOG_PAYLOAD_SAMPLE_RATES: str = ""
+    LOG_REDACT_PHONES: bool = True
+
+    # Captura dos webhooks para replay (NDJSON rotativo, sem tokens)
+    CAPTURE_ENABLED: bool = False
+    CAPTURE_PATH: str = "./data/capture/webhooks.ndjson"
+    CAPTURE_MAX_BYTES: int = 50 * 1024 * 1024
+    CAPTURE_BACKUP_COUNT: int = 5
+
+    # Entregas de saída: retry com backoff exponencial (full jitter)
+    # e dead-letter no Redis
+    OUTBOUND_MAX_ATTEMPTS: int = 6
+    OUTBOUND_RETRY_BASE_SECONDS: float = 2.0
+    OUTBOUND_RETRY_MAX_SECONDS: float = 300.0
+    OUTBOUND_POLL_SECONDS: float = 1.0
+    OUTBOUND_CONCURRENCY: int = 10
+    # job mais velho que isso (ex.: adiado por circuito aberto) morre
+    OUTBOUND_MAX_AGE_SECONDS: float = 6 * 3600.0
+    # dead-letter: descarta os mais antigos além do limite / da idade
+    OUTBOUND_DLQ_MAX_JOBS: int = 10_000
+    OUTBOUND_DLQ_TTL_SECONDS: float = 7 * 24 * 3600.0
+
+    # Circuit breakers (host do Chatwoot, instância Z-API)
+    CIRCUIT_BREAKER_ENABLED: bool = True
+    CIRCUIT_WINDOW_SECONDS: float = 30.0
+    CIRCUIT_MIN_CALLS: int = 10
+    CIRCUIT_ERROR_RATE: float = 0.5
+    CIRCUIT_OPEN_SECONDS: float = 30.0
+
+    # Injeção de falhas nos upstreams (só testes): regras em JSON,
+    # ex. [{"target": "chatwoot", "latency": "fixed:5000"}]
+    FAULT_INJECTION_ENABLED: bool = False
+    FAULT_INJECTION: str = ""
+
+    # Endpoints /debug/* (header X-Admin-Token); vazio = desabilitados
+    ADMIN_TOKEN: str = ""
+
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,325 @@
+# file: app/core/tracing.py
+
+import atexit
+import functools
+import inspect
+import json
+import logging
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any
+
+import requests
+
+from app.core.settings import settings
+
+logger = logging.getLogger("tracing")
+
+
+# ============================================================
+# 🧵 Tracing leve (spans por contextvars)
+# ============================================================
+#
+# - O primeiro span de um fluxo (webhook) é a raiz: sorteia o
+#   trace_id e decide a amostragem (TRACE_SAMPLE_RATE)
+# - Filhos herdam o contexto, inclusive em create_task / to_thread
+# - Trace não amostrado: só o trace_id existe (vai para os logs),
+#   nenhum span é criado nem exportado
+# - Spans finalizados vão para uma fila; uma thread exporta em lote
+#   para JSON lines ou coletor OTLP/HTTP (JSON)
+#
+# TRACE_EXPORTER: none | jsonl | otlp
+
+EXPORT_BATCH_SIZE = 512
+EXPORT_INTERVAL_SECONDS = 1.0
+EXPORT_QUEUE_MAX = 10_000
+
+
+class Span:
+    __slots__ = (
+        "trace_id", "span_id", "parent_id", "name", "sampled",
+        "start_ns", "end_ns", "attributes", "error",
+    )
+
+    def __init__(self, trace_id: str, parent_id: str | None, name: str, sampled: bool) -> None:
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.sampled = sampled
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes: dict[str, Any] = {}
+        self.error: str | None = None
+
+    def set(self, key: str, value: Any) -> None:
+        if self.sampled:
+            self.attributes[key] = value
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Span | None:
+    return _current_span.get()
+
+
+def current_trace_id() -> str | None:
+    span = _current_span.get()
+    return span.trace_id if span else None
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    with span("chatwoot.send_text_message", inbox=...) as s: ...
+    Exceções são registradas no span e relançadas.
+    """
+    parent = _current_span.get()
+
+    if parent is None:
+        sampled = _exporter.enabled and random.random() < settings.TRACE_SAMPLE_RATE
+        current = Span(f"{random.getrandbits(128):032x}", None, name, sampled)
+    elif not parent.sampled:
+        # trace descartado: reaproveita o span da raiz (só o trace_id importa)
+        yield parent
+        return
+    else:
+        current = Span(parent.trace_id, parent.span_id, name, True)
+
+    if current.sampled and attributes:
+        current.attributes.update(attributes)
+
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        if current.sampled:
+            current.end_ns = time.time_ns()
+            _exporter.submit(current)
+
+
+@contextmanager
+def use_span(parent: Span | None):
+    """
+    Reativa um span capturado em outra task (ex.: job na fila do
+    writer), para os spans criados ali caírem no trace de origem.
+    """
+    token = _current_span.set(parent)
+    try:
+        yield parent
+    finally:
+        _current_span.reset(token)
+
+
+def traced(name: str | None = None):
+    """
+    Decorator para funções sync e async:
+        @traced("redis.cache_get")
+    """
+    def decorator(fn):
+        span_name = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__qualname__}"
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+# ============================================================
+# 📤 Exportação
+# ============================================================
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(values: dict[str, Any]) -> list[dict]:
+    return [{"key": k, "value": _otlp_value(v)} for k, v in values.items() if v is not None]
+
+
+def _otlp_payload(spans: list[Span]) -> dict:
+    otlp_spans = []
+    for s in spans:
+        item = {
+            "traceId": s.trace_id,
+            "spanId": s.span_id,
+            "name": s.name,
+            "kind": 1,  # INTERNAL
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.end_ns),
+            "attributes": _otlp_attributes(s.attributes),
+            "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+        }
+        if s.parent_id:
+            item["parentSpanId"] = s.parent_id
+        otlp_spans.append(item)
+
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": _otlp_attributes({"service.name": settings.TRACE_SERVICE_NAME})},
+            "scopeSpans": [{"scope": {"name": "app.core.tracing"}, "spans": otlp_spans}],
+        }]
+    }
+
+
+class SpanExporter:
+    """
+    Fila limitada + thread exportadora. Com a fila cheia o span é
+    descartado (contado em dropped): tracing nunca segura o webhook.
+    """
+
+    def __init__(self, mode: str) -> None:
+        self.mode = mode
+        self.enabled = mode in ("jsonl", "otlp")
+        self.dropped = 0
+        self._queue: queue.Queue[Span | None] = queue.Queue(maxsize=EXPORT_QUEUE_MAX)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._http: requests.Session | None = None
+
+    def submit(self, s: Span) -> None:
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(s)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch: list[Span] = []
+            deadline = time.monotonic() + EXPORT_INTERVAL_SECONDS
+            stop = False
+
+            while len(batch) < EXPORT_BATCH_SIZE:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            if batch:
+                try:
+                    self._export(batch)
+                except Exception as e:
+                    logger.warning(f"⚠️ [tracing] {len(batch)} spans não exportados: {e}")
+
+            if stop:
+                return
+
+    def _export(self, batch: list[Span]) -> None:
+        if self.mode == "jsonl":
+            path = Path(settings.TRACE_JSONL_PATH)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open("a", encoding="utf-8") as f:
+                for s in batch:
+                    f.write(json.dumps(s.to_dict(), default=str) + "\n")
+            return
+
+        if self._http is None:
+            self._http = requests.Session()
+        resp = self._http.post(
+            settings.TRACE_OTLP_ENDPOINT,
+            data=json.dumps(_otlp_payload(batch), default=str),
+            headers={"Content-Type": "application/json"},
+            timeout=5,
+        )
+        if resp.status_code >= 400:
+            raise RuntimeError(f"HTTP {resp.status_code} {resp.text[:200]}")
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """
+        Exporta o que está na fila e encerra a thread.
+        """
+        thread = self._thread
+        if thread is None:
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        thread.join(timeout)
+        self._thread = None
+
+
+_exporter = SpanExporter(settings.TRACE_EXPORTER.lower())
+atexit.register(_exporter.shutdown)
+
+
+def shutdown_tracing() -> None:
+    _exporter.shutdown()
+
+
+# ============================================================
+# 🪵 trace_id nos logs
+# ============================================================
+
+def install_log_record_factory() -> None:
+    """
+    Todo LogRecord ganha trace_id / span_id do contexto atual
+    (vazio fora de um trace). Use %(trace_id)s no formato.
+    """
+    previous = logging.getLogRecordFactory()
+    if getattr(previous, "_adds_trace_id", False):
+        return
+
+    def factory(*args, **kwargs):
+        record = previous(*args, **kwargs)
+        current = _current_span.get()
+        record.trace_id = current.trace_id if current else ""
+        record.span_id = current.span_id if current else ""
+        return record
+
+    factory._adds_trace_id = True
+    logging.setLogRecordFactory(factory)
@@ -0,0 +1,103 @@
+# file: app/db/fulltext.py
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+# ============================================================
+# Objetos de busca full-text de messages_log
+# ============================================================
+#
+# Só nomes e DDL (sem importar services/models): usado pelo env do
+# Alembic, pelo search_service e por quem cria o banco via
+# Base.metadata.create_all (testes, benchmarks), que não passa pela
+# migração a3c5e8f19b27 e precisa chamar create_fulltext().
+#
+# SQLite: FTS5 "external content" apontando para o rowid IMPLÍCITO de
+# messages_log (a PK é log_id, texto). VACUUM pode renumerar esse
+# rowid, e aí o índice passa a apontar para as linhas erradas: depois
+# de todo VACUUM rode rebuild_fulltext().
+
+FTS_TABLE = "messages_log_fts"
+TSV_COLUMN = "content_tsv"
+TSV_INDEX = f"ix_messages_log_{TSV_COLUMN}"
+TS_CONFIG = "portuguese"
+
+SQLITE_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        content,
+        content='messages_log',
+        content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON messages_log BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, content) VALUES (new.rowid, new.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON messages_log BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content) VALUES ('delete', old.rowid, old.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF content ON messages_log BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content) VALUES ('delete', old.rowid, old.content);
+        INSERT INTO {FTS_TABLE}(rowid, content) VALUES (new.rowid, new.content);
+    END
+    """,
+]
+
+POSTGRES_DDL = [
+    f"""
+    ALTER TABLE messages_log ADD COLUMN IF NOT EXISTS {TSV_COLUMN} tsvector
+        GENERATED ALWAYS AS (to_tsvector('{TS_CONFIG}', coalesce(content, ''))) STORED
+    """,
+    f"CREATE INDEX IF NOT EXISTS {TSV_INDEX} ON messages_log USING GIN ({TSV_COLUMN})",
+]
+
+
+def is_fulltext_object(name: str, type_: str) -> bool:
+    """
+    Objetos criados por SQL (fora do metadata): o autogenerate não
+    deve tentar removê-los.
+    """
+    if type_ == "table":
+        return name.startswith(FTS_TABLE)
+    if type_ == "column":
+        return name == TSV_COLUMN
+    if type_ == "index":
+        return name == TSV_INDEX
+    return False
+
+
+def has_fulltext(conn: Connection) -> bool:
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        return inspect(conn).has_table(FTS_TABLE)
+    if dialect == "postgresql":
+        return any(c["name"] == TSV_COLUMN for c in inspect(conn).get_columns("messages_log"))
+    return True  # outros bancos: busca por LIKE, nada a criar
+
+
+def create_fulltext(conn: Connection) -> None:
+    """
+    Cria os objetos de busca num banco feito por create_all (idempotente).
+    """
+    if has_fulltext(conn):
+        return
+    statements = {"sqlite": SQLITE_DDL, "postgresql": POSTGRES_DDL}.get(conn.dialect.name, [])
+    for statement in statements:
+        conn.execute(text(statement))
+    # indexa o que já existe
+    rebuild_fulltext(conn)
+
+
+def rebuild_fulltext(conn: Connection) -> None:
+    """
+    Reconstrói o índice FTS5 a partir de messages_log (obrigatório
+    depois de VACUUM). No Postgres a coluna gerada não precisa.
+    """
+    if conn.dialect.name == "sqlite":
+        conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
@@ -14,6 +14,8 @@ from app.db.session import engine
 # Importa Base e o registry (importa todos modelos)
 from app.db.base import Base
 from app.db import models_registry  # necessário para registrar todos os models
+# só nomes/DDL: não puxa services nem o resto da aplicação
+from app.db.fulltext import is_fulltext_object
 
 # Config do Alembic
 config = context.config
@@ -26,6 +28,14 @@ if config.config_file_name is not None:
 target_metadata = Base.metadata
 
 
+def include_object(object, name, type_, reflected, compare_to):
+    """
+    Objetos de busca full-text são criados por SQL na migração
+    (FTS5 / tsvector gerado): o autogenerate não deve removê-los.
+    """
+    return not is_fulltext_object(name, type_)
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode."""
     url = config.get_main_option("sqlalchemy.url")
@@ -34,6 +44,8 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        compare_type=True,
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -47,6 +59,7 @@ def run_migrations_online() -> None:
             connection=connection,
             target_metadata=target_metadata,
             compare_type=True,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
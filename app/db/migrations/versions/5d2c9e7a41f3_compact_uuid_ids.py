@@ -0,0 +1,82 @@
+"""compact uuid ids
+
+Revision ID: 5d2c9e7a41f3
+Revises: 382518e9555e
+Create Date: 2026-10-19 09:12:31.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2c9e7a41f3'
+down_revision: Union[str, Sequence[str], None] = '382518e9555e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# FKs criadas sem nome no initial schema → nomes padrão do Postgres
+FOREIGN_KEYS = [
+    ("conversation_sessions_conversation_id_fkey", "conversation_sessions", "conversation_id", "conversations", "conversation_id"),
+    ("messages_log_conversation_id_fkey", "messages_log", "conversation_id", "conversations", "conversation_id"),
+    ("messages_log_session_id_fkey", "messages_log", "session_id", "conversation_sessions", "session_id"),
+]
+
+ID_COLUMNS = [
+    ("conversations", "conversation_id"),
+    ("conversation_sessions", "session_id"),
+    ("conversation_sessions", "conversation_id"),
+    ("messages_log", "log_id"),
+    ("messages_log", "conversation_id"),
+    ("messages_log", "session_id"),
+]
+
+
+def _is_postgres() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # SQLite: IDs continuam em texto (CompactUUID), nada a converter
+    if not _is_postgres():
+        return
+
+    for name, table, *_ in FOREIGN_KEYS:
+        op.drop_constraint(name, table, type_="foreignkey")
+
+    # varchar(36+) → uuid nativo (16 bytes); IDs uuid4 existentes convertem direto
+    for table, column in ID_COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            type_=postgresql.UUID(as_uuid=False),
+            postgresql_using=f"{column}::uuid",
+        )
+
+    for name, table, column, ref_table, ref_column in FOREIGN_KEYS:
+        op.create_foreign_key(name, table, ref_table, [column], [ref_column])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if not _is_postgres():
+        return
+
+    for name, table, *_ in FOREIGN_KEYS:
+        op.drop_constraint(name, table, type_="foreignkey")
+
+    for table, column in ID_COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            type_=sa.String(),
+            postgresql_using=f"{column}::text",
+        )
+
+    for name, table, column, ref_table, ref_column in FOREIGN_KEYS:
+        op.create_foreign_key(name, table, ref_table, [column], [ref_column])
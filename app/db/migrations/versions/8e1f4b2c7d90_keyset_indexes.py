@@ -0,0 +1,44 @@
+"""keyset indexes
+
+Revision ID: 8e1f4b2c7d90
+Revises: 5d2c9e7a41f3
+Create Date: 2026-10-19 11:40:07.531962
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e1f4b2c7d90'
+down_revision: Union[str, Sequence[str], None] = '5d2c9e7a41f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# paginação keyset: (filtro, created_at, id)
+INDEXES = [
+    ("ix_messages_log_created_at_log_id", "messages_log", ["created_at", "log_id"]),
+    ("ix_messages_log_conversation_created_at", "messages_log", ["conversation_id", "created_at", "log_id"]),
+    ("ix_messages_log_session_created_at", "messages_log", ["session_id", "created_at", "log_id"]),
+    ("ix_messages_log_vendor_created_at", "messages_log", ["vendor_id", "created_at", "log_id"]),
+    ("ix_conversations_created_at_conversation_id", "conversations", ["created_at", "conversation_id"]),
+    ("ix_conversations_vendor_created_at", "conversations", ["current_vendor_id", "created_at", "conversation_id"]),
+    ("ix_conversations_phone_created_at", "conversations", ["customer_phone", "created_at", "conversation_id"]),
+    ("ix_conversation_sessions_created_at_session_id", "conversation_sessions", ["created_at", "session_id"]),
+    ("ix_conversation_sessions_conversation_created_at", "conversation_sessions", ["conversation_id", "created_at", "session_id"]),
+    ("ix_conversation_sessions_vendor_created_at", "conversation_sessions", ["vendor_id", "created_at", "session_id"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,91 @@
+"""messages fulltext
+
+Revision ID: a3c5e8f19b27
+Revises: 8e1f4b2c7d90
+Create Date: 2026-10-19 14:05:52.204117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c5e8f19b27'
+down_revision: Union[str, Sequence[str], None] = '8e1f4b2c7d90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# SQLite: FTS5 "external content" sobre messages_log (o texto não é
+# duplicado; o índice aponta para o rowid) mantido por triggers.
+SQLITE_UPGRADE = [
+    """
+    CREATE VIRTUAL TABLE messages_log_fts USING fts5(
+        content,
+        content='messages_log',
+        content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER messages_log_fts_ai AFTER INSERT ON messages_log BEGIN
+        INSERT INTO messages_log_fts(rowid, content) VALUES (new.rowid, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER messages_log_fts_ad AFTER DELETE ON messages_log BEGIN
+        INSERT INTO messages_log_fts(messages_log_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER messages_log_fts_au AFTER UPDATE OF content ON messages_log BEGIN
+        INSERT INTO messages_log_fts(messages_log_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+        INSERT INTO messages_log_fts(rowid, content) VALUES (new.rowid, new.content);
+    END
+    """,
+    # indexa o que já existe
+    "INSERT INTO messages_log_fts(messages_log_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS messages_log_fts_au",
+    "DROP TRIGGER IF EXISTS messages_log_fts_ad",
+    "DROP TRIGGER IF EXISTS messages_log_fts_ai",
+    "DROP TABLE IF EXISTS messages_log_fts",
+]
+
+# Postgres: tsvector gerado (calculado no INSERT/UPDATE) + GIN
+POSTGRES_UPGRADE = [
+    """
+    ALTER TABLE messages_log ADD COLUMN content_tsv tsvector
+        GENERATED ALWAYS AS (to_tsvector('portuguese', coalesce(content, ''))) STORED
+    """,
+    "CREATE INDEX ix_messages_log_content_tsv ON messages_log USING GIN (content_tsv)",
+]
+
+POSTGRES_DOWNGRADE = [
+    "DROP INDEX IF EXISTS ix_messages_log_content_tsv",
+    "ALTER TABLE messages_log DROP COLUMN IF EXISTS content_tsv",
+]
+
+
+def _statements(sqlite: list[str], postgres: list[str]) -> list[str]:
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        return sqlite
+    if dialect == "postgresql":
+        return postgres
+    return []
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for statement in _statements(SQLITE_UPGRADE, POSTGRES_UPGRADE):
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for statement in _statements(SQLITE_DOWNGRADE, POSTGRES_DOWNGRADE):
+        op.execute(statement)
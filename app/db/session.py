@@ -1,8 +1,54 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from app.core.settings import settings
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+
+# ============================================================
+# Perfil SQLite (WAL + pragmas de produção)
+# ============================================================
+
+def is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def configure_sqlite(engine: Engine) -> None:
+    """
+    Aplica o perfil de produção do SQLite a cada nova conexão:
+    - journal_mode=WAL: leitores não bloqueiam o escritor
+    - synchronous=NORMAL: seguro com WAL, sem fsync por commit
+    - mmap_size / busy_timeout configuráveis
+
+    Também assume o controle do BEGIN (o driver pysqlite/aiosqlite
+    não emite BEGIN sozinho), o que torna SAVEPOINT confiável —
+    necessário para o group commit do writer.
+    """
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, _record):
+        dbapi_connection.isolation_level = None
+
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.close()
+
+    @event.listens_for(engine, "begin")
+    def _on_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+
+def create_app_engine(url: str) -> Engine:
+    engine = create_engine(url, pool_pre_ping=True)
+    if is_sqlite(url):
+        configure_sqlite(engine)
+    return engine
+
+
+engine = create_app_engine(settings.DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -12,4 +58,46 @@ def get_db():
         yield db
     finally:
         db.close()
-        
\ No newline at end of file
+
+
+# ============================================================
+# Engine assíncrono (asyncpg / aiosqlite)
+# ============================================================
+
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgres": "postgresql+asyncpg",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+
+def _async_url(url: str):
+    """
+    Converte a DATABASE_URL síncrona no driver async equivalente.
+    """
+    parsed = make_url(url)
+    driver = _ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)
+    return parsed.set(drivername=driver)
+
+
+def create_app_async_engine(url: str) -> AsyncEngine:
+    async_engine = create_async_engine(_async_url(url), pool_pre_ping=True)
+    if is_sqlite(url):
+        configure_sqlite(async_engine.sync_engine)
+    return async_engine
+
+
+async_engine = create_app_async_engine(settings.DATABASE_URL)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
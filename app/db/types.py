@@ -0,0 +1,52 @@
+# file: app/db/types.py
+
+import uuid
+
+from sqlalchemy import String
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.types import TypeDecorator
+
+
+class InvalidID(ValueError):
+    """
+    ID fora do formato UUID numa coluna uuid nativa: nenhuma linha pode
+    ter esse ID (a API responde 404, ver main.py).
+    """
+
+
+class CompactUUID(TypeDecorator):
+    """
+    ID de chave primária compacto.
+
+    - Postgres: coluna UUID nativa (16 bytes em tabela/índices/FKs)
+    - Demais (SQLite): texto, compatível com as linhas existentes
+
+    Para o código da aplicação é sempre str (formato canônico), então
+    IDs antigos (uuid4) e novos (uuid7) convivem sem mudança nos services.
+    No Postgres um valor que não é UUID levanta InvalidID antes de chegar
+    ao banco (senão seria DataError → 500).
+    """
+
+    impl = String
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(postgresql.UUID(as_uuid=False))
+        return dialect.type_descriptor(String(36))
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        try:
+            return str(value if isinstance(value, uuid.UUID) else uuid.UUID(str(value)))
+        except ValueError:
+            if dialect.name == "postgresql":
+                raise InvalidID(f"id inválido: {value!r}") from None
+            # SQLite: ID legado fora do formato UUID, mantém como veio
+            return str(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return str(value)
@@ -0,0 +1,135 @@
+# file: app/db/writer.py
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.settings import settings
+from app.core.tracing import Span, current_span, traced, use_span
+from app.db.session import AsyncSessionLocal, is_sqlite
+
+logger = logging.getLogger("db_writer")
+
+T = TypeVar("T")
+WriteFn = Callable[[AsyncSession], Awaitable[T]]
+
+
+# ============================================================
+# Writer único com group commit (perfil SQLite)
+# ============================================================
+#
+# No SQLite só existe um escritor por vez. Em vez de vários
+# requests disputando o lock (e caindo em "database is locked"),
+# todas as escritas entram numa fila e uma única task as executa:
+# cada job roda dentro de um SAVEPOINT e o lote inteiro é gravado
+# com um só COMMIT. Leituras continuam concorrentes (WAL).
+#
+# Os jobs NÃO devem dar commit — quem grava é o writer.
+
+class SQLiteWriter:
+    def __init__(self, session_factory: async_sessionmaker, max_batch: int = 64) -> None:
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self._queue: asyncio.Queue[tuple[WriteFn, asyncio.Future, Span | None]] | None = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+        logger.info("[db_writer] writer SQLite iniciado")
+
+    async def stop(self) -> None:
+        if not self.running:
+            return
+        # espera a fila esvaziar antes de encerrar
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def submit(self, fn: WriteFn[T]) -> T:
+        """
+        Enfileira um job de escrita e aguarda seu resultado
+        (disponível só depois do COMMIT do lote).
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((fn, future, current_span()))
+        return await future
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            try:
+                await self._execute_batch(batch)
+            except Exception as e:
+                logger.error(f"❌ [db_writer] Erro no lote ({len(batch)} jobs): {e}")
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _execute_batch(self, batch: list[tuple[WriteFn, asyncio.Future, Span | None]]) -> None:
+        results: list[tuple[asyncio.Future, Any, BaseException | None]] = []
+
+        async with self.session_factory() as db:
+            for fn, future, parent in batch:
+                try:
+                    # spans do job ficam no trace de quem enfileirou
+                    with use_span(parent):
+                        async with db.begin_nested():
+                            result = await fn(db)
+                    results.append((future, result, None))
+                except Exception as e:
+                    # só o SAVEPOINT do job é desfeito
+                    results.append((future, None, e))
+
+            await db.commit()
+
+        for future, result, error in results:
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+sqlite_writer = SQLiteWriter(AsyncSessionLocal, max_batch=settings.SQLITE_WRITER_MAX_BATCH)
+
+
+def writer_enabled() -> bool:
+    return settings.SQLITE_SINGLE_WRITER and is_sqlite(settings.DATABASE_URL)
+
+
+@traced("db.run_write")
+async def run_write(db: AsyncSession, fn: WriteFn[T]) -> T:
+    """
+    Executa uma escrita:
+    - SQLite com writer ativo → fila do writer (group commit)
+    - demais casos → direto na sessão do request + commit
+    """
+    if sqlite_writer.running:
+        return await sqlite_writer.submit(fn)
+
+    result = await fn(db)
+    await db.commit()
+    return result
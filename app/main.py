@@ -1,10 +1,152 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+from prometheus_client import REGISTRY
+from sqlalchemy.exc import StatementError
 from app.api.v1 import api_router
+from app.core.fault_injection import fault_injector, run_fault_config_listener
+from app.core.logging_setup import run_logging_config_listener, setup_logging, shutdown_logging
+from app.core.metrics import (
+    ACTIVITY_PENDING,
+    DB_POOL_CHECKED_OUT,
+    DB_POOL_OVERFLOW,
+    DB_POOL_SIZE,
+    OUTBOUND_QUEUE_DEPTH,
+    VENDORS_LOADED,
+    WRITER_QUEUE_DEPTH,
+    MULTIPROCESS,
+    CounterDictCollector,
+    bind_gauge,
+    mark_process_dead,
+    render_latest,
+    run_metrics_refresher,
+)
+from app.core.settings import settings
+from app.core.tracing import shutdown_tracing
+from app.db.session import async_engine, engine
+from app.db.types import InvalidID
+from app.db.writer import sqlite_writer, writer_enabled
+from app.services.analytics_service import attach_analytics_db
+from app.services.archive_service import run_archiver
+from app.services.activity_buffer import (
+    flush_activity,
+    flush_activity_async,
+    pending_count,
+    run_activity_flusher,
+)
+from app.services.outbound_service import outbound, run_outbound_worker
+from app.services.vendor_registry import vendor_registry, run_vendor_invalidation_listener
+from app.utils.helpers import elided_writes
+from app.utils.loop_watchdog import loop_watchdog
+from app.utils.traffic_capture import traffic_capture
+
+logger = logging.getLogger("main")
+
+# fila + JSON + redação (depois do dictConfig do uvicorn)
+setup_logging()
 
 app = FastAPI(title="Omnichannel API", version="1.0.0")
 
 app.include_router(api_router, prefix="/api/v1")
 
+
+@app.exception_handler(StatementError)
+async def invalid_id_handler(request: Request, exc: StatementError):
+    # ID que não é UUID (Postgres): não existe, em vez de 500
+    if isinstance(exc.orig, InvalidID):
+        return JSONResponse(status_code=404, content={"detail": "not_found"})
+    raise exc
+
+_background_tasks: list[asyncio.Task] = []
+
+
+# ============================================================
+# Métricas (gauges lidos no scrape)
+# ============================================================
+
+bind_gauge(WRITER_QUEUE_DEPTH, sqlite_writer.queue_depth)
+bind_gauge(ACTIVITY_PENDING, pending_count)
+bind_gauge(VENDORS_LOADED, lambda: len(vendor_registry))
+# profundidade lida do Redis pelo worker de entregas a cada poll
+bind_gauge(OUTBOUND_QUEUE_DEPTH, lambda: outbound.depth["retry"], queue="retry")
+bind_gauge(OUTBOUND_QUEUE_DEPTH, lambda: outbound.depth["dead"], queue="dead")
+
+for _name, _pool in (("sync", engine.pool), ("async", async_engine.sync_engine.pool)):
+    if hasattr(_pool, "checkedout"):
+        bind_gauge(DB_POOL_CHECKED_OUT, _pool.checkedout, engine=_name)
+        bind_gauge(DB_POOL_SIZE, _pool.size, engine=_name)
+        # overflow() fica negativo enquanto há folga no pool
+        bind_gauge(DB_POOL_OVERFLOW, lambda p=_pool: max(p.overflow(), 0), engine=_name)
+
+REGISTRY.register(CounterDictCollector(
+    "omnichannel_elided_writes",
+    "Escritas/refreshes evitados por não haver mudança",
+    "label",
+    elided_writes,
+))
+
+
+@app.on_event("startup")
+async def startup():
+    setup_logging()
+
+    if settings.LOOP_WATCHDOG_ENABLED:
+        loop_watchdog.start()
+
+    if settings.CAPTURE_ENABLED:
+        traffic_capture.start()
+
+    if writer_enabled():
+        sqlite_writer.start()
+
+    try:
+        await vendor_registry.reload()
+    except Exception as e:
+        # segue com carga lazy no primeiro lookup
+        logger.error(f"❌ Erro carregando vendor_registry: {e}")
+
+    # extensão do DuckDB + ATTACH aqui, não no primeiro request
+    await asyncio.to_thread(attach_analytics_db)
+
+    _background_tasks.append(asyncio.create_task(run_activity_flusher()))
+    _background_tasks.append(asyncio.create_task(run_vendor_invalidation_listener()))
+    _background_tasks.append(asyncio.create_task(run_archiver()))
+    _background_tasks.append(asyncio.create_task(run_outbound_worker()))
+    _background_tasks.append(asyncio.create_task(run_logging_config_listener()))
+    if fault_injector.enabled:
+        _background_tasks.append(asyncio.create_task(run_fault_config_listener()))
+    if MULTIPROCESS:
+        _background_tasks.append(asyncio.create_task(run_metrics_refresher()))
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    for task in _background_tasks:
+        task.cancel()
+
+    await loop_watchdog.stop()
+
+    # grava o que restou no buffer de atividade
+    if sqlite_writer.running:
+        await flush_activity_async()
+        await sqlite_writer.stop()
+    else:
+        await asyncio.to_thread(flush_activity)
+
+    await asyncio.to_thread(shutdown_tracing)
+    await asyncio.to_thread(traffic_capture.stop)
+    mark_process_dead()
+    shutdown_logging()
+
+
 @app.get("/health")
 def health():
     return {"status": "ok"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
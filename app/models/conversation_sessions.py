@@ -1,14 +1,15 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
-import uuid
 from app.db.base import Base
+from app.db.types import CompactUUID
+from app.utils.ids import new_id
 
 class ConversationSession(Base):
     __tablename__ = "conversation_sessions"
 
-    session_id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    session_id = Column(CompactUUID, primary_key=True, default=new_id)
 
-    conversation_id = Column(String, ForeignKey("conversations.conversation_id"), nullable=False)
+    conversation_id = Column(CompactUUID, ForeignKey("conversations.conversation_id"), nullable=False)
     vendor_id = Column(String, ForeignKey("vendors.vendor_id"), nullable=False)
 
     chatwoot_conv_id = Column(String, nullable=False)
@@ -19,3 +20,10 @@ class ConversationSession(Base):
 
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    # paginação keyset: (filtro, created_at, id)
+    __table_args__ = (
+        Index("ix_conversation_sessions_created_at_session_id", "created_at", "session_id"),
+        Index("ix_conversation_sessions_conversation_created_at", "conversation_id", "created_at", "session_id"),
+        Index("ix_conversation_sessions_vendor_created_at", "vendor_id", "created_at", "session_id"),
+    )
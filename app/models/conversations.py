@@ -1,12 +1,13 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
-import uuid
 from app.db.base import Base
+from app.db.types import CompactUUID
+from app.utils.ids import new_id
 
 class Conversation(Base):
     __tablename__ = "conversations"
 
-    conversation_id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    conversation_id = Column(CompactUUID, primary_key=True, default=new_id)
     customer_phone = Column(String, nullable=False)
 
     current_vendor_id = Column(String, ForeignKey("vendors.vendor_id"))
@@ -16,3 +17,10 @@ class Conversation(Base):
     last_active_at = Column(DateTime, server_default=func.now())
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    # paginação keyset: (filtro, created_at, id)
+    __table_args__ = (
+        Index("ix_conversations_created_at_conversation_id", "created_at", "conversation_id"),
+        Index("ix_conversations_vendor_created_at", "current_vendor_id", "created_at", "conversation_id"),
+        Index("ix_conversations_phone_created_at", "customer_phone", "created_at", "conversation_id"),
+    )
@@ -1,15 +1,16 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
-import uuid
 from app.db.base import Base
+from app.db.types import CompactUUID
+from app.utils.ids import new_id
 
 class MessageLog(Base):
     __tablename__ = "messages_log"
 
-    log_id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    log_id = Column(CompactUUID, primary_key=True, default=new_id)
 
-    conversation_id = Column(String, ForeignKey("conversations.conversation_id"), nullable=False)
-    session_id = Column(String, ForeignKey("conversation_sessions.session_id"), nullable=True)
+    conversation_id = Column(CompactUUID, ForeignKey("conversations.conversation_id"), nullable=False)
+    session_id = Column(CompactUUID, ForeignKey("conversation_sessions.session_id"), nullable=True)
     vendor_id = Column(String, ForeignKey("vendors.vendor_id"), nullable=True)
 
     direction = Column(String, nullable=False)  # incoming/outgoing
@@ -18,3 +19,11 @@ class MessageLog(Base):
     content = Column(String, nullable=True)
 
     created_at = Column(DateTime, server_default=func.now())
+
+    # paginação keyset: (filtro, created_at, id)
+    __table_args__ = (
+        Index("ix_messages_log_created_at_log_id", "created_at", "log_id"),
+        Index("ix_messages_log_conversation_created_at", "conversation_id", "created_at", "log_id"),
+        Index("ix_messages_log_session_created_at", "session_id", "created_at", "log_id"),
+        Index("ix_messages_log_vendor_created_at", "vendor_id", "created_at", "log_id"),
+    )
@@ -0,0 +1,19 @@
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+
+class FaultRule(BaseModel):
+    target: Literal["chatwoot", "zapi", "r2"]
+    # fnmatch sobre o nome da chamada (send_*, send-text, put_object ...)
+    endpoint: str = "*"
+    # ms: "5000" | "fixed:5000" | "uniform:100-500" | "normal:300,50" | "exp:200"
+    latency: str | None = None
+    error_rate: float = Field(0.0, ge=0.0, le=1.0)
+    error_status: int = Field(503, ge=400, le=599)
+    slow_body_kbps: float | None = Field(None, gt=0)
+
+
+class FaultConfigUpdate(BaseModel):
+    # lista vazia = remove todas as falhas
+    rules: list[FaultRule] = Field(default_factory=list)
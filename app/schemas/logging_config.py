@@ -0,0 +1,8 @@
+from pydantic import BaseModel, Field
+
+
+class LoggingConfigUpdate(BaseModel):
+    # {"chatwoot_service": "DEBUG", "root": "INFO"}
+    levels: dict[str, str] = Field(default_factory=dict)
+    # {"webhooks_zapi": 1.0} → taxa de amostragem de log_payload
+    sample_rates: dict[str, float] = Field(default_factory=dict)
@@ -32,8 +32,18 @@ class VendorUpdate(BaseModel):
     active: bool | None = None
 
 
-class VendorRead(VendorBase):
+class VendorRead(BaseModel):
+    # sem instance_token (credencial da Z-API)
     vendor_id: str
+    name: str
+    phone: str
+
+    agent_id: int
+    inbox_identifier: str
+
+    instance_id: str
+
+    active: bool = True
 
     class Config:
         orm_mode = True
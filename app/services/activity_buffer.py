@@ -0,0 +1,169 @@
+# file: app/services/activity_buffer.py
+
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.settings import settings
+from app.db.session import SessionLocal
+from app.db.writer import sqlite_writer
+from app.models.conversations import Conversation
+
+logger = logging.getLogger("activity_buffer")
+
+
+# ============================================================
+# Buffer write-behind de atividade das conversas
+# ============================================================
+#
+# Cada mensagem (entrada ou saída) atualiza last_active_at e,
+# eventualmente, current_vendor_id da conversa. Em vez de um
+# UPDATE + COMMIT por mensagem, os valores ficam coalescidos
+# aqui (1 entrada por conversa) e são gravados em lote a cada
+# ACTIVITY_FLUSH_INTERVAL_SECONDS.
+#
+# O buffer é local ao processo. Leituras que decidem expiração
+# devem combinar o valor do banco com get_pending_activity() — que
+# só enxerga o buffer deste worker. Com vários workers, a atividade
+# registrada por outro worker só aparece depois do flush dele: a
+# decisão dos 30 dias pode usar um last_active_at atrasado em até
+# ACTIVITY_FLUSH_INTERVAL_SECONDS (só importa bem no limite do TTL).
+#
+# Um lote só sai de vez do buffer depois de gravado: se o UPDATE ou
+# o COMMIT (inclusive o group commit do writer) falhar, ele volta.
+
+@dataclass
+class PendingActivity:
+    last_active_at: datetime
+    vendor_id: str
+
+
+_pending: dict[str, PendingActivity] = {}
+_lock = threading.Lock()
+
+
+def record_activity(conversation_id: str, last_active_at: datetime, vendor_id: str) -> None:
+    """
+    Registra atividade da conversa no buffer (sem tocar no banco).
+    Mantém o timestamp mais recente e o vendedor desse timestamp
+    (uma mensagem mais antiga fora de ordem não troca o vendedor).
+    """
+    with _lock:
+        current = _pending.get(conversation_id)
+        if current and current.last_active_at > last_active_at:
+            return
+        _pending[conversation_id] = PendingActivity(last_active_at, vendor_id)
+
+
+def get_pending_activity(conversation_id: str) -> PendingActivity | None:
+    """
+    Retorna a atividade ainda não gravada da conversa, se houver.
+    """
+    with _lock:
+        return _pending.get(conversation_id)
+
+
+def pending_count() -> int:
+    return len(_pending)
+
+
+def _take_batch() -> dict[str, PendingActivity]:
+    with _lock:
+        batch = dict(_pending)
+        _pending.clear()
+    return batch
+
+
+def _restore_batch(batch: dict[str, PendingActivity]) -> None:
+    # devolve ao buffer sem sobrescrever atividades mais novas
+    for conversation_id, item in batch.items():
+        record_activity(conversation_id, item.last_active_at, item.vendor_id)
+
+
+def _batch_rows(batch: dict[str, PendingActivity]) -> list[dict]:
+    return [
+        {
+            "conversation_id": conversation_id,
+            "last_active_at": item.last_active_at,
+            "current_vendor_id": item.vendor_id,
+        }
+        for conversation_id, item in batch.items()
+    ]
+
+
+def flush_activity(db: Session | None = None) -> int:
+    """
+    Grava todas as atividades pendentes em um único UPDATE em lote.
+    Retorna a quantidade de conversas atualizadas.
+    """
+    batch = _take_batch()
+    if not batch:
+        return 0
+
+    own_session = db is None
+    db = db or SessionLocal()
+    try:
+        db.execute(update(Conversation), _batch_rows(batch))
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"❌ Erro gravando atividade das conversas ({len(batch)}): {e}")
+        _restore_batch(batch)
+        raise
+    finally:
+        if own_session:
+            db.close()
+
+    logger.debug(f"[activity_buffer] flush de {len(batch)} conversas")
+    return len(batch)
+
+
+async def flush_activity_async() -> int:
+    """
+    Mesmo flush pela fila do writer SQLite. O job não dá commit; o
+    resultado do submit só chega depois do COMMIT do lote, então
+    qualquer falha (UPDATE, COMMIT ou cancelamento) devolve o lote.
+    """
+    batch = _take_batch()
+    if not batch:
+        return 0
+
+    async def write(db: AsyncSession) -> None:
+        await db.execute(update(Conversation), _batch_rows(batch))
+
+    try:
+        await sqlite_writer.submit(write)
+    except asyncio.CancelledError:
+        _restore_batch(batch)
+        raise
+    except Exception as e:
+        logger.error(f"❌ Erro gravando atividade das conversas ({len(batch)}): {e}")
+        _restore_batch(batch)
+        raise
+
+    return len(batch)
+
+
+async def run_activity_flusher() -> None:
+    """
+    Loop de background: grava o buffer periodicamente
+    (pela fila do writer quando o perfil SQLite está ativo).
+    """
+    interval = settings.ACTIVITY_FLUSH_INTERVAL_SECONDS
+
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if sqlite_writer.running:
+                await flush_activity_async()
+            else:
+                await asyncio.to_thread(flush_activity)
+        except Exception:
+            # já logado; as atividades voltaram ao buffer
+            pass
@@ -0,0 +1,325 @@
+# file: app/services/analytics_service.py
+
+import asyncio
+import json
+import logging
+import math
+import threading
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy.engine import make_url
+
+from app.core.duckdb_conn import duckdb_conn, get_cursor
+from app.core.redis import cache_get, cache_set
+from app.core.settings import settings
+from app.services.archive_service import ARCHIVE_COLUMNS, ARCHIVE_ROOT, archived_sql
+
+logger = logging.getLogger("analytics")
+
+
+# ============================================================
+# Analytics (DuckDB sobre banco operacional + arquivo Parquet)
+# ============================================================
+#
+# O banco operacional é anexado no DuckDB em modo READ_ONLY (extensões
+# sqlite/postgres) e unido ao arquivo Parquet de messages_log. As
+# agregações rodam no DuckDB (vetorizado, em thread) e o resultado vai
+# para o Redis com chave pelo intervalo alinhado ao bucket:
+# - intervalo já fechado → TTL longo (não muda mais)
+# - intervalo que inclui o bucket atual → TTL curto
+#
+# Só "volume" agrupa por bucket; as demais métricas são do intervalo
+# inteiro, alinhado à hora, e a chave de cache não leva o bucket.
+#
+# O banco fica anexado por padrão porque os últimos
+# ARCHIVE_RETENTION_DAYS só existem nele; cada cache miss é uma
+# leitura nele (ANALYTICS_DATABASE_URL = réplica, se houver). Com
+# ANALYTICS_ATTACH_DB=False só o arquivo Parquet é lido (zero consultas
+# no banco, mas só dados já arquivados).
+
+BUCKETS = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+# métricas sem bucket: intervalo alinhado à hora
+UNBUCKETED_STEP = BUCKETS["hour"]
+
+OPEN_BUCKET_TTL_SECONDS = 60
+CLOSED_BUCKET_TTL_SECONDS = 60 * 60 * 24
+
+DEFAULT_WINDOW = timedelta(days=7)
+
+
+class AnalyticsUnavailable(Exception):
+    pass
+
+
+# ============================================================
+# Fonte de dados
+# ============================================================
+
+_attach_lock = threading.Lock()
+_attached = False
+
+
+def _quote(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _attach_sql(database_url: str) -> tuple[str, str]:
+    """
+    (extensão DuckDB, ATTACH read-only) para a DATABASE_URL.
+    """
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+
+    if backend == "sqlite":
+        path = Path(url.database).resolve().as_posix()
+        return "sqlite", f"ATTACH {_quote(path)} AS oltp (TYPE sqlite, READ_ONLY)"
+
+    if backend == "postgresql":
+        parts = {
+            "host": url.host,
+            "port": url.port,
+            "dbname": url.database,
+            "user": url.username,
+            "password": url.password,
+        }
+        dsn = " ".join(f"{k}={v}" for k, v in parts.items() if v)
+        return "postgres", f"ATTACH {_quote(dsn)} AS oltp (TYPE postgres, READ_ONLY)"
+
+    raise AnalyticsUnavailable(f"banco não suportado para analytics: {backend}")
+
+
+def _ensure_attached(install: bool = False) -> None:
+    """
+    LOAD + ATTACH do banco operacional. INSTALL (download da extensão)
+    só no startup (attach_analytics_db), nunca dentro de um request.
+    """
+    global _attached
+
+    if _attached or not settings.ANALYTICS_ATTACH_DB:
+        return
+
+    with _attach_lock:
+        if _attached:
+            return
+        extension, attach = _attach_sql(settings.ANALYTICS_DATABASE_URL or settings.DATABASE_URL)
+        try:
+            if install:
+                duckdb_conn.execute(f"INSTALL {extension}")
+            duckdb_conn.execute(f"LOAD {extension}")
+            duckdb_conn.execute(attach)
+        except Exception as e:
+            logger.error(f"❌ Erro anexando banco no DuckDB: {e}")
+            raise AnalyticsUnavailable(str(e)) from e
+
+        _attached = True
+        logger.info(f"🦆 Banco operacional anexado no DuckDB (read-only, {extension})")
+
+
+def attach_analytics_db() -> None:
+    """
+    Startup: instala (se ANALYTICS_INSTALL_EXTENSIONS) e anexa. Falha só
+    loga; os requests tentam de novo o LOAD/ATTACH e respondem 503.
+    """
+    try:
+        _ensure_attached(install=settings.ANALYTICS_INSTALL_EXTENSIONS)
+    except AnalyticsUnavailable:
+        pass
+
+
+def _messages_source(since: datetime, until: datetime) -> tuple[str, list]:
+    """
+    SQL de messages_log (banco + arquivo) já filtrado pelo intervalo.
+    """
+    columns = ", ".join(
+        f"CAST({name} AS {type_}) AS {name}" for name, type_ in ARCHIVE_COLUMNS.items()
+    )
+
+    branches, params = [], []
+    if settings.ANALYTICS_ATTACH_DB:
+        branches.append(
+            f"SELECT {columns} FROM oltp.messages_log "
+            "WHERE created_at >= ? AND created_at < ?"
+        )
+        params += [since, until]
+
+    if any(ARCHIVE_ROOT.glob("day=*/*.parquet")):
+        # poda por partição (day) antes de ler os arquivos
+        branches.append(archived_sql(
+            columns, "WHERE day >= ? AND day <= ? AND created_at >= ? AND created_at < ?",
+        ))
+        params += [since.date(), until.date(), since, until]
+
+    if not branches:
+        # nada a ler: relação vazia com o mesmo formato
+        branches.append(f"SELECT {columns} FROM (SELECT NULL AS {', NULL AS '.join(ARCHIVE_COLUMNS)}) WHERE false")
+
+    if len(branches) == 1:
+        return branches[0], params
+
+    # linha ainda no banco e já no arquivo (DELETE falhou): conta uma vez
+    union = " UNION ALL ".join(f"SELECT {i} AS src, * FROM ({b})" for i, b in enumerate(branches))
+    sql = (
+        f"SELECT {', '.join(ARCHIVE_COLUMNS)} FROM ({union}) "
+        "QUALIFY row_number() OVER (PARTITION BY log_id ORDER BY src) = 1"
+    )
+    return sql, params
+
+
+def _run_query(sql: str, params: list) -> list[dict]:
+    _ensure_attached()
+    result = get_cursor().execute(sql, params)
+    names = [col[0] for col in result.description]
+    return [dict(zip(names, row)) for row in result.fetchall()]
+
+
+# ============================================================
+# Consultas
+# ============================================================
+
+def _vendor_filter(vendor_id: str | None, params: list) -> str:
+    if not vendor_id:
+        return ""
+    params.append(vendor_id)
+    return "WHERE vendor_id = ?"
+
+
+def _volume_sql(since, until, bucket, vendor_id) -> tuple[str, list]:
+    source, params = _messages_source(since, until)
+    where = _vendor_filter(vendor_id, params)
+    sql = f"""
+        SELECT vendor_id, date_trunc('{bucket}', created_at) AS bucket, direction, count(*) AS messages
+        FROM ({source}) m
+        {where}
+        GROUP BY ALL
+        ORDER BY bucket, vendor_id, direction
+    """
+    return sql, params
+
+
+def _first_response_sql(since, until, vendor_id) -> tuple[str, list]:
+    source, params = _messages_source(since, until)
+    where = _vendor_filter(vendor_id, params)
+    sql = f"""
+        WITH m AS (SELECT * FROM ({source}) src {where}),
+        first_in AS (
+            SELECT session_id, any_value(vendor_id) AS vendor_id, min(created_at) AS first_at
+            FROM m
+            WHERE direction = 'incoming' AND session_id IS NOT NULL
+            GROUP BY session_id
+        ),
+        responses AS (
+            SELECT f.vendor_id, f.session_id,
+                   epoch(min(o.created_at) - f.first_at) AS seconds
+            FROM first_in f
+            JOIN m o ON o.session_id = f.session_id
+                    AND o.direction = 'outgoing'
+                    AND o.created_at > f.first_at
+            GROUP BY f.vendor_id, f.session_id, f.first_at
+        )
+        SELECT vendor_id,
+               count(*) AS sessions,
+               round(avg(seconds), 1) AS avg_seconds,
+               round(quantile_cont(seconds, 0.5), 1) AS p50_seconds,
+               round(quantile_cont(seconds, 0.9), 1) AS p90_seconds
+        FROM responses
+        GROUP BY vendor_id
+        ORDER BY vendor_id
+    """
+    return sql, params
+
+
+def _media_mix_sql(since, until, vendor_id) -> tuple[str, list]:
+    source, params = _messages_source(since, until)
+    where = _vendor_filter(vendor_id, params)
+    sql = f"""
+        SELECT vendor_id, message_type, count(*) AS messages,
+               round(100.0 * count(*) / sum(count(*)) OVER (PARTITION BY vendor_id), 2) AS pct
+        FROM ({source}) m
+        {where}
+        GROUP BY vendor_id, message_type
+        ORDER BY vendor_id, messages DESC
+    """
+    return sql, params
+
+
+METRICS = {
+    "volume": _volume_sql,
+    "first_response": _first_response_sql,
+    "media_mix": _media_mix_sql,
+}
+BUCKETED_METRICS = {"volume"}
+
+
+# ============================================================
+# Cache por bucket
+# ============================================================
+
+def to_utc_naive(value: datetime) -> datetime:
+    """
+    Datas com fuso → UTC sem tzinfo (como created_at); sem fuso = já UTC.
+    """
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _align(value: datetime, step: timedelta, up: bool = False) -> datetime:
+    epoch = datetime(1970, 1, 1)
+    units = (value - epoch) / step
+    units = math.ceil(units) if up else math.floor(units)
+    return epoch + units * step
+
+
+def _json_default(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+async def get_metric(
+    metric: str,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    bucket: str = "day",
+    vendor_id: str | None = None,
+) -> dict:
+    """
+    Executa (ou lê do cache) uma métrica de METRICS.
+    Datas em UTC, como created_at; bucket só vale para BUCKETED_METRICS.
+    """
+    if metric in BUCKETED_METRICS:
+        step = BUCKETS[bucket]
+    else:
+        bucket, step = None, UNBUCKETED_STEP
+    now = datetime.utcnow()
+
+    until = _align(to_utc_naive(until) if until else now, step, up=True)
+    since = _align(to_utc_naive(since) if since else until - DEFAULT_WINDOW, step)
+
+    key = f"analytics:{metric}:{bucket or 'all'}:{vendor_id or '*'}:{since:%Y%m%d%H}:{until:%Y%m%d%H}"
+
+    try:
+        cached = await cache_get(key)
+    except Exception:
+        cached = None  # Redis fora: calcula direto
+    if cached:
+        return json.loads(cached)
+
+    if bucket:
+        sql, params = METRICS[metric](since, until, bucket, vendor_id)
+    else:
+        sql, params = METRICS[metric](since, until, vendor_id)
+    rows = await asyncio.to_thread(_run_query, sql, params)
+
+    result = {"since": since, "until": until, "bucket": bucket, "rows": rows}
+    payload = json.dumps(result, default=_json_default)
+
+    ttl = OPEN_BUCKET_TTL_SECONDS if until > now else CLOSED_BUCKET_TTL_SECONDS
+    try:
+        await cache_set(key, payload, ttl_seconds=ttl)
+    except Exception:
+        pass
+
+    return json.loads(payload)
@@ -0,0 +1,271 @@
+# file: app/services/archive_service.py
+
+import asyncio
+import json
+import logging
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from redis.exceptions import LockError
+
+from app.core.duckdb_conn import get_cursor
+from app.core.redis import get_redis
+from app.core.settings import settings
+from app.db.session import SessionLocal
+from app.db.writer import sqlite_writer
+from app.models.messages_log import MessageLog
+
+logger = logging.getLogger("archive")
+
+
+# ============================================================
+# Arquivo frio de messages_log (Parquet + DuckDB)
+# ============================================================
+#
+# Linhas mais antigas que ARCHIVE_RETENTION_DAYS saem do banco
+# OLTP para Parquet (ZSTD), particionado por dia:
+#
+#   <ARCHIVE_DIR>/messages_log/day=YYYY-MM-DD/part-<uuid>.parquet
+#
+# Cada lote: lê → escreve Parquet em staging → publica os arquivos
+# → apaga as linhas. Se o DELETE falhar, o lote é arquivado de novo
+# na próxima rodada, então o mesmo log_id pode estar em mais de um
+# arquivo (e ainda no banco): quem lê o arquivo usa archived_sql(),
+# que mantém uma linha por log_id, e o histórico prefere a do banco.
+#
+# Só um archiver roda por vez entre os workers (lock no Redis).
+
+ARCHIVE_ROOT = Path(settings.ARCHIVE_DIR) / "messages_log"
+ARCHIVE_GLOB = (ARCHIVE_ROOT / "day=*" / "*.parquet").as_posix()
+ARCHIVE_LOCK_KEY = "archive:messages_log:lock"
+
+# colunas arquivadas → tipo DuckDB
+ARCHIVE_COLUMNS = {
+    "log_id": "VARCHAR",
+    "conversation_id": "VARCHAR",
+    "session_id": "VARCHAR",
+    "vendor_id": "VARCHAR",
+    "direction": "VARCHAR",
+    "source": "VARCHAR",
+    "message_type": "VARCHAR",
+    "content": "VARCHAR",
+    "created_at": "TIMESTAMP",
+}
+
+
+def archived_sql(columns: str, where: str = "") -> str:
+    """
+    SELECT sobre o arquivo Parquet com uma linha por log_id.
+    O WHERE vem antes da deduplicação (poda de partições continua valendo).
+    """
+    glob = ARCHIVE_GLOB.replace("'", "''")
+    return (
+        f"SELECT {columns} FROM read_parquet('{glob}', hive_partitioning = true) "
+        f"{where} QUALIFY row_number() OVER (PARTITION BY log_id ORDER BY created_at) = 1"
+    )
+
+
+def _archive_cutoff(retention_days: int | None = None) -> datetime:
+    days = settings.ARCHIVE_RETENTION_DAYS if retention_days is None else retention_days
+    # created_at vem de func.now() (UTC no SQLite)
+    return datetime.utcnow() - timedelta(days=days)
+
+
+def _fetch_batch(cutoff: datetime, limit: int) -> list[dict]:
+    stmt = (
+        select(*(getattr(MessageLog, c) for c in ARCHIVE_COLUMNS))
+        .where(MessageLog.created_at < cutoff)
+        .order_by(MessageLog.created_at, MessageLog.log_id)
+        .limit(limit)
+    )
+    with SessionLocal() as db:
+        return [dict(row._mapping) for row in db.execute(stmt)]
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    return str(value)
+
+
+def _write_parquet(rows: list[dict]) -> list[Path]:
+    """
+    Grava o lote em Parquet particionado por dia.
+    Os arquivos só aparecem em ARCHIVE_ROOT depois de completos.
+    """
+    ARCHIVE_ROOT.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=".staging-", dir=ARCHIVE_ROOT))
+
+    try:
+        # NDJSON + read_json é bem mais rápido que passar listas Python
+        ndjson = staging / "batch.ndjson"
+        with ndjson.open("w", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row, default=_json_default, ensure_ascii=False) + "\n")
+
+        columns = ", ".join(f"'{name}': '{type_}'" for name, type_ in ARCHIVE_COLUMNS.items())
+        out = staging / "out"
+
+        get_cursor().execute(f"""
+            COPY (
+                SELECT *, strftime(created_at, '%Y-%m-%d') AS day
+                FROM read_json('{ndjson.as_posix()}', format = 'newline_delimited', columns = {{{columns}}})
+            ) TO '{out.as_posix()}'
+            (FORMAT parquet, COMPRESSION zstd, PARTITION_BY (day), FILENAME_PATTERN 'part-{{uuid}}')
+        """)
+
+        published = []
+        for part in out.glob("day=*/*.parquet"):
+            target_dir = ARCHIVE_ROOT / part.parent.name
+            target_dir.mkdir(exist_ok=True)
+            target = target_dir / part.name
+            os.replace(part, target)
+            published.append(target)
+        return published
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def _delete_batch(log_ids: list[str]) -> None:
+    with SessionLocal() as db:
+        db.execute(delete(MessageLog).where(MessageLog.log_id.in_(log_ids)))
+        db.commit()
+
+
+async def _delete_batch_async(db: AsyncSession, log_ids: list[str]) -> None:
+    await db.execute(delete(MessageLog).where(MessageLog.log_id.in_(log_ids)))
+
+
+async def archive_messages(retention_days: int | None = None, batch_size: int | None = None) -> int:
+    """
+    Move para o arquivo Parquet todas as mensagens fora da retenção.
+    Retorna a quantidade de linhas arquivadas.
+    """
+    cutoff = _archive_cutoff(retention_days)
+    limit = batch_size or settings.ARCHIVE_BATCH_SIZE
+    total = 0
+
+    while True:
+        rows = await asyncio.to_thread(_fetch_batch, cutoff, limit)
+        if not rows:
+            break
+
+        files = await asyncio.to_thread(_write_parquet, rows)
+
+        log_ids = [row["log_id"] for row in rows]
+        if sqlite_writer.running:
+            await sqlite_writer.submit(lambda s: _delete_batch_async(s, log_ids))
+        else:
+            await asyncio.to_thread(_delete_batch, log_ids)
+
+        total += len(rows)
+        logger.info(f"🗄️ messages_log: {len(rows)} linhas arquivadas em {len(files)} arquivo(s)")
+
+        if len(rows) < limit:
+            break
+
+    return total
+
+
+async def run_archiver() -> None:
+    """
+    Loop de background: arquiva periodicamente (ARCHIVE_INTERVAL_SECONDS).
+    Em cada rodada só o worker que pega o lock arquiva.
+    """
+    interval = settings.ARCHIVE_INTERVAL_SECONDS
+
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            redis = await get_redis()
+            lock = redis.lock(ARCHIVE_LOCK_KEY, timeout=interval)
+            if not await lock.acquire(blocking=False):
+                continue  # outro worker está arquivando
+            try:
+                await archive_messages()
+            finally:
+                try:
+                    await lock.release()
+                except LockError:
+                    # rodada passou do timeout: o lock já expirou
+                    pass
+        except Exception as e:
+            # linhas não apagadas são arquivadas de novo na próxima rodada
+            logger.error(f"❌ Erro arquivando messages_log: {e}")
+
+
+# ============================================================
+# Histórico: banco + arquivo
+# ============================================================
+
+def _archived_history(conversation_id: str, limit: int, before: datetime | None) -> list[dict]:
+    if not any(ARCHIVE_ROOT.glob("day=*/*.parquet")):
+        return []
+
+    where = "WHERE conversation_id = ?"
+    params: list = [conversation_id]
+    if before is not None:
+        # poda de partições pelo dia antes de filtrar o timestamp
+        where += " AND day <= ? AND created_at < ?"
+        params += [before.date(), before]
+    query = archived_sql(", ".join(ARCHIVE_COLUMNS), where) + " ORDER BY created_at DESC LIMIT ?"
+    params.append(limit)
+
+    cursor = get_cursor()
+    result = cursor.execute(query, params)
+    names = [col[0] for col in result.description]
+    return [dict(zip(names, row)) for row in result.fetchall()]
+
+
+def _live_history_stmt(conversation_id: str, limit: int, before: datetime | None):
+    stmt = select(*(getattr(MessageLog, c) for c in ARCHIVE_COLUMNS)).where(
+        MessageLog.conversation_id == conversation_id
+    )
+    if before is not None:
+        stmt = stmt.where(MessageLog.created_at < before)
+    return stmt.order_by(MessageLog.created_at.desc()).limit(limit)
+
+
+def _merge_history(live: list[dict], archived: list[dict], limit: int) -> list[dict]:
+    # archived já vem com um log_id por linha; a mesma linha nos dois
+    # lados (DELETE falhou) fica com a do banco
+    seen = {row["log_id"] for row in live}
+    merged = live + [row for row in archived if row["log_id"] not in seen]
+    merged.sort(key=lambda row: row["created_at"] or datetime.min, reverse=True)
+    return merged[:limit]
+
+
+def get_message_history(
+    db: Session,
+    conversation_id: str,
+    limit: int = 100,
+    before: datetime | None = None,
+) -> list[dict]:
+    """
+    Mensagens da conversa (mais recentes primeiro), unindo banco e arquivo.
+    """
+    live = [dict(row._mapping) for row in db.execute(_live_history_stmt(conversation_id, limit, before))]
+    archived = _archived_history(conversation_id, limit, before) if len(live) < limit else []
+    return _merge_history(live, archived, limit)
+
+
+async def get_message_history_async(
+    db: AsyncSession,
+    conversation_id: str,
+    limit: int = 100,
+    before: datetime | None = None,
+) -> list[dict]:
+    result = await db.execute(_live_history_stmt(conversation_id, limit, before))
+    live = [dict(row._mapping) for row in result]
+
+    archived = []
+    if len(live) < limit:
+        archived = await asyncio.to_thread(_archived_history, conversation_id, limit, before)
+    return _merge_history(live, archived, limit)
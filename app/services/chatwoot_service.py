@@ -4,14 +4,18 @@ import logging
 import re
 from io import BytesIO
 from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse
 
 import aiohttp
 
+from app.core.circuit_breaker import CircuitOpenError, circuit_breakers
+from app.core.fault_injection import InjectedFault, fault_injector
+from app.core.logging_setup import log_payload
 from app.core.settings import settings
 from app.core.redis import cache_get, cache_set  # Redis persistente
+from app.core.tracing import traced
 
 logger = logging.getLogger("chatwoot_service")
-logger.setLevel(logging.DEBUG)
 
 
 class ChatwootError(Exception):
@@ -43,6 +47,8 @@ class ChatwootClient:
         self.base_url = settings.CHATWOOT_BASE_URL.rstrip("/")
         self.api_key = settings.CHATWOOT_API_KEY
         self.timeout = aiohttp.ClientTimeout(total=15)
+        # circuito aberto → CircuitOpenError na hora (sem esperar o timeout)
+        self.breaker = circuit_breakers.get(f"chatwoot:{urlparse(self.base_url).netloc}")
 
         logger.info(f"[CW] Inicializando ChatwootClient base_url={self.base_url}")
 
@@ -70,10 +76,12 @@ class ChatwootClient:
     # --------------------------------------------------------
     # Download de mídia
     # --------------------------------------------------------
+    @traced("chatwoot.download_file")
     async def _download_file(self, url: str) -> Optional[tuple[str, BytesIO, str]]:
         logger.info(f"[CW] Download mídia: {url}")
 
         try:
+            await fault_injector.before("chatwoot", "download_file")
             async with aiohttp.ClientSession(timeout=self.timeout) as session:
                 async with session.get(url) as resp:
                     if resp.status != 200:
@@ -81,6 +89,7 @@ class ChatwootClient:
                         return None
 
                     content = await resp.read()
+                    await fault_injector.body("chatwoot", "download_file", len(content))
                     content_type = resp.headers.get("Content-Type", "application/octet-stream")
                     filename = url.split("/")[-1] or "arquivo"
 
@@ -93,6 +102,7 @@ class ChatwootClient:
     # --------------------------------------------------------
     # Criar contato
     # --------------------------------------------------------
+    @traced("chatwoot.create_contact")
     async def create_contact(self, inbox_identifier: str, identifier: str, name: str) -> Optional[str]:
 
         is_group = identifier.endswith("-group")
@@ -119,24 +129,29 @@ class ChatwootClient:
         )
 
         try:
-            async with aiohttp.ClientSession(timeout=self.timeout) as session:
-                async with session.post(url, json=payload, headers=self._headers()) as resp:
-                    text = await resp.text()
+            with self.breaker.call() as call:
+                await fault_injector.before("chatwoot", "create_contact")
+                async with aiohttp.ClientSession(timeout=self.timeout) as session:
+                    async with session.post(url, json=payload, headers=self._headers()) as resp:
+                        call.status(resp.status)
+                        text = await resp.text()
 
-                    if resp.status != 200:
-                        logger.error(f"❌ [CW] Erro ao criar contato: {text}")
-                        return None
+                        if resp.status != 200:
+                            logger.error(f"❌ [CW] Erro ao criar contato: {text}")
+                            return None
 
-                    data = await resp.json()
-                    source_id = data.get("source_id") or data.get("contact_identifier")
+                        data = await resp.json()
+                        source_id = data.get("source_id") or data.get("contact_identifier")
 
-                    if not source_id:
-                        logger.error(f"⚠️ Contato criado sem source_id: {data}")
-                    else:
-                        logger.info(f"[CW] Contato OK id={source_id}")
+                        if not source_id:
+                            logger.error(f"⚠️ Contato criado sem source_id: {data}")
+                        else:
+                            logger.info(f"[CW] Contato OK id={source_id}")
 
-                    return source_id
+                        return source_id
 
+        except CircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"❌ Exceção ao criar contato: {e}")
             return None
@@ -144,6 +159,7 @@ class ChatwootClient:
     # --------------------------------------------------------
     # Buscar conversa aberta
     # --------------------------------------------------------
+    @traced("chatwoot.get_open_conversation")
     async def get_open_conversation(self, inbox_identifier: str, contact_identifier: str) -> Optional[str]:
 
         url = (
@@ -154,22 +170,27 @@ class ChatwootClient:
         logger.info(f"[CW] get_open_conversation → {contact_identifier}")
 
         try:
-            async with aiohttp.ClientSession(timeout=self.timeout) as session:
-                async with session.get(url, headers=self._headers()) as resp:
-                    text = await resp.text()
-
-                    if resp.status != 200:
-                        return None
-
-                    convs = await resp.json()
-
-                    if isinstance(convs, list):
-                        for c in convs:
-                            if c.get("status") == "open":
-                                cid = str(c.get("id"))
-                                logger.info(f"[CW] Conversa aberta={cid}")
-                                return cid
-
+            with self.breaker.call() as call:
+                await fault_injector.before("chatwoot", "get_open_conversation")
+                async with aiohttp.ClientSession(timeout=self.timeout) as session:
+                    async with session.get(url, headers=self._headers()) as resp:
+                        call.status(resp.status)
+                        text = await resp.text()
+
+                        if resp.status != 200:
+                            return None
+
+                        convs = await resp.json()
+
+                        if isinstance(convs, list):
+                            for c in convs:
+                                if c.get("status") == "open":
+                                    cid = str(c.get("id"))
+                                    logger.info(f"[CW] Conversa aberta={cid}")
+                                    return cid
+
+        except CircuitOpenError:
+            raise
         except Exception as e:
             logger.warning(f"⚠️ Erro buscando conversa: {e}")
 
@@ -178,6 +199,7 @@ class ChatwootClient:
     # --------------------------------------------------------
     # Criar conversa
     # --------------------------------------------------------
+    @traced("chatwoot.create_conversation")
     async def create_conversation(self, inbox_identifier: str, contact_identifier: str) -> Optional[str]:
 
         url = (
@@ -188,18 +210,23 @@ class ChatwootClient:
         logger.info(f"[CW] Criando nova conversa para {contact_identifier}")
 
         try:
-            async with aiohttp.ClientSession(timeout=self.timeout) as session:
-                async with session.post(url, json={}, headers=self._headers()) as resp:
+            with self.breaker.call() as call:
+                await fault_injector.before("chatwoot", "create_conversation")
+                async with aiohttp.ClientSession(timeout=self.timeout) as session:
+                    async with session.post(url, json={}, headers=self._headers()) as resp:
+                        call.status(resp.status)
 
-                    text = await resp.text()
+                        text = await resp.text()
 
-                    if resp.status != 200:
-                        logger.error(f"❌ Falha criar conversa: {text}")
-                        return None
+                        if resp.status != 200:
+                            logger.error(f"❌ Falha criar conversa: {text}")
+                            return None
 
-                    data = await resp.json()
-                    return str(data.get("id"))
+                        data = await resp.json()
+                        return str(data.get("id"))
 
+        except CircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"❌ Erro criando conversa: {e}")
             return None
@@ -207,6 +234,7 @@ class ChatwootClient:
     # --------------------------------------------------------
     # Garantir contato + conversa usando Redis
     # --------------------------------------------------------
+    @traced("chatwoot.ensure_contact_and_conversation")
     async def ensure_contact_and_conversation(self, inbox_identifier: str, identifier: str, name: str):
 
         key_contact = f"cw:contact:{inbox_identifier}:{identifier}"
@@ -240,6 +268,7 @@ class ChatwootClient:
     # --------------------------------------------------------
     # Envio texto → Chatwoot
     # --------------------------------------------------------
+    @traced("chatwoot.send_text_message")
     async def send_text_message(
         self,
         inbox_identifier,
@@ -256,21 +285,30 @@ class ChatwootClient:
 
         payload = {"content": message}
 
-        logger.info(f"[CW] Enviando texto → {message}")
-        logger.info(f"[CW] URL={url}")
-        logger.info(f"[CW] Payload={payload}")
+        # conteúdo da mensagem só em dump amostrado (redigido), nunca por envio
+        log_payload(logger, "[CW] → send_text_message", payload)
 
-        async with aiohttp.ClientSession(timeout=self.timeout) as session:
-            async with session.post(url, json=payload, headers=self._headers()) as resp:
-                body = await resp.text()
-                logger.error(f"[CW RESPONSE TEXT] status={resp.status} body={body}")
+        with self.breaker.call() as call:
+            try:
+                await fault_injector.before("chatwoot", "send_text_message")
+            except InjectedFault as e:
+                call.status(e.status_code)
+                return {"status": e.status_code, "response": str(e)}
 
-                return {"status": resp.status, "response": body}
+            async with aiohttp.ClientSession(timeout=self.timeout) as session:
+                async with session.post(url, json=payload, headers=self._headers()) as resp:
+                    call.status(resp.status)
+                    body = await resp.text()
+                    logger.info("[CW] send_text_message status=%s", resp.status)
+                    log_payload(logger, "[CW] ← send_text_message", {"status": resp.status, "body": body})
+
+                    return {"status": resp.status, "response": body}
 
 
     # --------------------------------------------------------
     # Envio mídia → Chatwoot
     # --------------------------------------------------------
+    @traced("chatwoot.send_media_message")
     async def send_media_message(
         self, inbox_identifier, contact_identifier, conversation_id, file_url, caption: Optional[str] = None
     ):
@@ -297,15 +335,26 @@ class ChatwootClient:
         if caption:
             form.add_field("content", caption)
 
-        async with aiohttp.ClientSession(timeout=self.timeout) as session:
-            async with session.post(url, data=form, headers=self._headers()) as resp:
-                text = await resp.text()
-                logger.info(f"[CW] send_media_message status={resp.status} body={text}")
-                return {"status": resp.status, "response": text}
+        with self.breaker.call() as call:
+            try:
+                await fault_injector.before("chatwoot", "send_media_message")
+                await fault_injector.body("chatwoot", "send_media_message", file_bytes.getbuffer().nbytes)
+            except InjectedFault as e:
+                call.status(e.status_code)
+                return {"status": e.status_code, "response": str(e)}
+
+            async with aiohttp.ClientSession(timeout=self.timeout) as session:
+                async with session.post(url, data=form, headers=self._headers()) as resp:
+                    call.status(resp.status)
+                    text = await resp.text()
+                    logger.info("[CW] send_media_message status=%s", resp.status)
+                    log_payload(logger, "[CW] ← send_media_message", {"status": resp.status, "body": text})
+                    return {"status": resp.status, "response": text}
 
     # ============================================================
     # FUNÇÃO PRINCIPAL — ZAPI → CHATWOOT
     # ============================================================
+    @traced("chatwoot.send_from_zapi_payload")
     async def send_from_zapi_payload(self, payload: Dict[str, Any], inbox_identifier: str):
 
         raw_identifier = payload.get("phone") or ""
@@ -326,6 +375,9 @@ class ChatwootClient:
             logger.warning("[CW] Sem identificador válido — ignorado")
             return {"ignored": True}
 
+        # Chatwoot fora: falha antes de preparar contato/conversa
+        self.breaker.check()
+
         # Garantir contato + conversa
         contact_identifier, conversation_id = await self.ensure_contact_and_conversation(
             inbox_identifier, identifier, name
@@ -350,14 +402,7 @@ class ChatwootClient:
         # ---------------- MÍDIA ----------------
         if msg_type in ["image", "video", "audio", "document"]:
             media = payload.get(msg_type) or {}
-            
-            # --- DEBUG FORCE BRUTE (PRINT) ---
-            import json
-            try:
-                print(f"\n>>> [DEBUG] MEDIA DICT: {json.dumps(media, default=str)}")
-            except:
-                print(f"\n>>> [DEBUG] MEDIA DICT (RAW): {media}")
-            # ---------------------------------
+            logger.debug("[CW] media dict", extra={"payload": media})
 
             url_map = {
                 "image": "imageUrl",
@@ -381,9 +426,10 @@ class ChatwootClient:
             
             raw_caption = raw_caption or ""
 
-            # --- DEBUG VARIAVEIS (PRINT) ---
-            print(f">>> [DEBUG] CAPTIONS -> FromMedia: '{caption_from_media}' | FromText: '{caption_from_text}' | FINAL: '{raw_caption}'\n")
-            # -------------------------------
+            logger.debug(
+                f"[CW] captions from_media={caption_from_media!r} "
+                f"from_text={caption_from_text!r} final={raw_caption!r}"
+            )
 
             if is_group:
                 sender = payload.get("senderName") or "Desconhecido"
@@ -1,8 +1,16 @@
 from datetime import datetime, timedelta
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 
+from app.core.tracing import traced
+from app.db.session import AsyncSessionLocal
 from app.models.conversations import Conversation
 from app.schemas.conversations import ConversationCreate, ConversationUpdate
+from app.services.activity_buffer import get_pending_activity, record_activity
+from app.utils.helpers import assign_changed, count_elided
+from app.utils.pagination import Keyset, fetch_page, iter_chunks
 
 CONVERSATION_TTL_DAYS = 30
 
@@ -24,7 +32,12 @@ def create_conversation(db: Session, data: ConversationCreate) -> Conversation:
     return conv
 
 
-def ensure_conversation(db: Session, phone: str, vendor_id: str) -> Conversation:
+def apply_conversation_rules(
+    db: Session | AsyncSession,
+    conv: Conversation | None,
+    phone: str,
+    vendor_id: str,
+) -> tuple[Conversation, bool]:
     """
     Regra principal do Omnichannel:
     - Se não existe conversa → cria nova
@@ -32,66 +45,156 @@ def ensure_conversation(db: Session, phone: str, vendor_id: str) -> Conversation
     - Se existe e é recente → reaproveita
     - Se vendedor mudou → reatribui
     - Sempre atualiza last_active_at
+
+    Não faz commit: a conversa nova é apenas adicionada à sessão.
+    Retorna (conversa, criada).
+
+    A atualização de last_active_at / current_vendor_id é registrada
+    no activity_buffer (write-behind) e gravada em lote depois.
     """
 
     now = datetime.now()
-    conv = get_last_conversation(db, phone)
 
     # ============================
     # Caso 1 — Nunca existiu
     # ============================
     if not conv:
-        data = ConversationCreate(
-            customer_phone=phone,
-            current_vendor_id=vendor_id,
-            status="open"
-        )
-        return create_conversation(db, data)
+        return _add_conversation(db, phone, vendor_id), True
 
-    # ============================
-    # Caso 2 — last_active_at está NULL
-    # ============================
-    if not conv.last_active_at:
-        conv.last_active_at = now
-        conv.current_vendor_id = vendor_id
-        db.commit()
-        db.refresh(conv)
-        return conv
+    # valor mais recente: banco ou buffer ainda não gravado
+    last_active_at = conv.last_active_at
+    pending = get_pending_activity(conv.conversation_id)
+    if pending and (not last_active_at or pending.last_active_at > last_active_at):
+        last_active_at = pending.last_active_at
 
     # ============================
-    # Caso 3 — conversa expirada (> 30 dias)
+    # Caso 2 — conversa expirada (> 30 dias)
     # ============================
     ttl_limit = now - timedelta(days=CONVERSATION_TTL_DAYS)
-    if conv.last_active_at < ttl_limit:
-        data = ConversationCreate(
-            customer_phone=phone,
-            current_vendor_id=vendor_id,
-            status="open"
-        )
-        return create_conversation(db, data)
+    if last_active_at and last_active_at < ttl_limit:
+        return _add_conversation(db, phone, vendor_id), True
 
     # ============================
-    # Caso 4 — conversa ativa
+    # Caso 3 — conversa ativa (ou last_active_at NULL)
     # ============================
-    if conv.current_vendor_id != vendor_id:
-        conv.current_vendor_id = vendor_id
+    record_activity(conv.conversation_id, now, vendor_id)
+
+    # reflete no objeto sem marcá-lo como sujo (não gera UPDATE)
+    set_committed_value(conv, "last_active_at", now)
+    set_committed_value(conv, "current_vendor_id", vendor_id)
+    return conv, False
+
+
+def _add_conversation(db: Session | AsyncSession, phone: str, vendor_id: str) -> Conversation:
+    data = ConversationCreate(
+        customer_phone=phone,
+        current_vendor_id=vendor_id,
+        status="open"
+    )
+    conv = Conversation(**data.model_dump())
+    db.add(conv)
+    return conv
+
+
+def ensure_conversation(db: Session, phone: str, vendor_id: str) -> Conversation:
+    conv, created = apply_conversation_rules(
+        db, get_last_conversation(db, phone), phone, vendor_id
+    )
+
+    if created:
+        db.commit()
 
-    conv.last_active_at = now
-    db.commit()
-    db.refresh(conv)
     return conv
 
 
 def update_conversation(db: Session, conv: Conversation, data: ConversationUpdate):
-    for field, value in data.model_dump(exclude_unset=True).items():
-        setattr(conv, field, value)
+    if not assign_changed(conv, data.model_dump(exclude_unset=True)):
+        count_elided("conversation.update")
+        return conv
+
     db.commit()
-    db.refresh(conv)
     return conv
 
 
 def close_conversation(db: Session, conv: Conversation):
+    if conv.status == "closed":
+        count_elided("conversation.close")
+        return conv
+
     conv.status = "closed"
     db.commit()
-    db.refresh(conv)
     return conv
+
+
+# ============================================================
+# Versões assíncronas (AsyncSession)
+# ============================================================
+
+def _last_conversation_stmt(phone: str):
+    return (
+        select(Conversation)
+        .where(Conversation.customer_phone == phone)
+        .order_by(Conversation.last_active_at.desc().nullslast())
+        .limit(1)
+    )
+
+
+async def get_conversation_async(db: AsyncSession, conversation_id: str) -> Conversation | None:
+    return await db.get(Conversation, conversation_id)
+
+
+async def get_last_conversation_async(db: AsyncSession, phone: str) -> Conversation | None:
+    return await db.scalar(_last_conversation_stmt(phone))
+
+
+@traced("db.ensure_conversation")
+async def ensure_conversation_async(
+    db: AsyncSession, phone: str, vendor_id: str, commit: bool = True
+) -> Conversation:
+    """
+    commit=False: só faz flush (ex.: job do writer SQLite).
+    """
+    conv, created = apply_conversation_rules(
+        db, await get_last_conversation_async(db, phone), phone, vendor_id
+    )
+
+    if created and commit:
+        await db.commit()
+        # conversation_id é gerado no Python: sem refresh
+        count_elided("conversation.refresh")
+    elif created:
+        await db.flush()
+
+    return conv
+
+
+# ============================================================
+# Leitura paginada (keyset)
+# ============================================================
+
+CONVERSATION_KEYSET = Keyset(Conversation.__table__, "conversation_id")
+
+
+def _conversation_filters(vendor_id: str | None = None, status: str | None = None, phone: str | None = None) -> list:
+    filters = []
+    if vendor_id:
+        filters.append(Conversation.current_vendor_id == vendor_id)
+    if status:
+        filters.append(Conversation.status == status)
+    if phone:
+        filters.append(Conversation.customer_phone == phone)
+    return filters
+
+
+async def list_conversations_async(
+    db: AsyncSession,
+    fields: list[str],
+    cursor: str | None,
+    limit: int,
+    **filters,
+) -> dict:
+    return await fetch_page(db, CONVERSATION_KEYSET, fields, _conversation_filters(**filters), cursor, limit)
+
+
+def export_conversations(fields: list[str], **filters):
+    return iter_chunks(AsyncSessionLocal, CONVERSATION_KEYSET, fields, _conversation_filters(**filters))
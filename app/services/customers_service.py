@@ -1,17 +1,18 @@
 # file: app/services/customers_service.py
 
-import duckdb
+import logging
 import re
 from pathlib import Path
 
+from app.core.duckdb_conn import DATA_DIR, duckdb_conn, get_cursor
+from app.core.settings import settings
+
+logger = logging.getLogger("customers_service")
+
 # ===========================================
 # Inicialização persistente DuckDB
 # ===========================================
-BASE_DIR = Path(__file__).resolve().parent.parent.parent
-PARQUET_PATH = BASE_DIR / "data" / "parceiros.parquet"
-
-# Instância única do DuckDB (persistente)
-duckdb_conn = duckdb.connect(database=":memory:")
+PARQUET_PATH = Path(settings.CUSTOMERS_PARQUET_PATH) if settings.CUSTOMERS_PARQUET_PATH else DATA_DIR / "parceiros.parquet"
 
 # Registrando o parquet como tabela virtual
 duckdb_conn.execute(f"""
@@ -24,7 +25,7 @@ duckdb_conn.execute(f"""
     FROM parquet_scan('{PARQUET_PATH.as_posix()}');
 """)
 
-print(f"[DuckDB] Base clientes carregada em memória: {PARQUET_PATH}")
+logger.info(f"[DuckDB] Base clientes carregada em memória: {PARQUET_PATH}")
 
 
 # ===========================================
@@ -51,7 +52,7 @@ def get_customer_by_cnpj(cnpj_raw: str):
         LIMIT 1;
     """
 
-    result = duckdb_conn.execute(query, [cnpj]).fetchone()
+    result = get_cursor().execute(query, [cnpj]).fetchone()
 
     if not result:
         return {"found": False}
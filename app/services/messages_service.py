@@ -1,11 +1,82 @@
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from app.core.tracing import traced
+from app.db.session import AsyncSessionLocal
 from app.models.messages_log import MessageLog
 from app.schemas.messages_log import MessageLogCreate
+from app.utils.helpers import count_elided
+from app.utils.pagination import Keyset, fetch_page, iter_chunks
 
 
 def log_message(db: Session, data: MessageLogCreate) -> MessageLog:
     msg = MessageLog(**data.model_dump())
     db.add(msg)
     db.commit()
-    db.refresh(msg)
     return msg
+
+
+@traced("db.log_message")
+async def log_message_async(db: AsyncSession, data: MessageLogCreate, commit: bool = True) -> MessageLog:
+    """
+    commit=False: apenas adiciona à sessão (ex.: job do writer SQLite).
+    """
+    msg = MessageLog(**data.model_dump())
+    db.add(msg)
+    if commit:
+        await db.commit()
+        # log_id é gerado no Python: sem refresh (expire_on_commit=False)
+        count_elided("message.refresh")
+    return msg
+
+
+async def get_message_async(db: AsyncSession, log_id: str) -> MessageLog | None:
+    return await db.get(MessageLog, log_id)
+
+
+# ============================================================
+# Leitura paginada (keyset)
+# ============================================================
+
+MESSAGE_KEYSET = Keyset(MessageLog.__table__, "log_id")
+
+
+def _message_filters(
+    conversation_id: str | None = None,
+    session_id: str | None = None,
+    vendor_id: str | None = None,
+    direction: str | None = None,
+    source: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> list:
+    filters = []
+    if conversation_id:
+        filters.append(MessageLog.conversation_id == conversation_id)
+    if session_id:
+        filters.append(MessageLog.session_id == session_id)
+    if vendor_id:
+        filters.append(MessageLog.vendor_id == vendor_id)
+    if direction:
+        filters.append(MessageLog.direction == direction)
+    if source:
+        filters.append(MessageLog.source == source)
+    if since:
+        filters.append(MessageLog.created_at >= since)
+    if until:
+        filters.append(MessageLog.created_at < until)
+    return filters
+
+
+async def list_messages_async(
+    db: AsyncSession,
+    fields: list[str],
+    cursor: str | None,
+    limit: int,
+    **filters,
+) -> dict:
+    return await fetch_page(db, MESSAGE_KEYSET, fields, _message_filters(**filters), cursor, limit)
+
+
+def export_messages(fields: list[str], **filters):
+    return iter_chunks(AsyncSessionLocal, MESSAGE_KEYSET, fields, _message_filters(**filters))
@@ -0,0 +1,337 @@
+# file: app/services/outbound_service.py
+
+import asyncio
+import json
+import logging
+import random
+import time
+import uuid
+
+import aiohttp
+
+from app.core.circuit_breaker import CircuitOpenError
+from app.core.metrics import OUTBOUND_DEAD_LETTERS, OUTBOUND_RETRIES
+from app.core.redis import get_redis
+from app.core.settings import settings
+from app.services.chatwoot_service import chatwoot_client
+from app.services.vendor_registry import vendor_registry
+from app.services.zapi_service import ZAPIError, zapi_client
+
+logger = logging.getLogger("outbound")
+
+
+# ============================================================
+# 📤 Entrega de saída com retry + dead-letter (Redis)
+# ============================================================
+#
+# Os webhooks entregam pelo outbound em vez de chamar os clientes:
+# - 1ª tentativa na hora (mesmo custo de antes)
+# - falha retentável → job vai para o ZSET outbound:retry com
+#   score = horário da próxima tentativa (backoff exponencial com
+#   full jitter); ninguém dorme esperando
+# - run_outbound_worker (1 por worker) pega os jobs vencidos; o ZREM
+#   decide quem fica com cada job quando há vários workers
+# - falha definitiva (4xx, vendor removido) ou OUTBOUND_MAX_ATTEMPTS
+#   esgotadas → ZSET outbound:dlq (score = quando morreu), até replay
+#   ou descarte manual (/api/v1/outbound/dead); limitada a
+#   OUTBOUND_DLQ_MAX_JOBS e OUTBOUND_DLQ_TTL_SECONDS (mais antigos saem)
+#
+# Envio não é idempotente (nem Z-API nem Chatwoot aceitam chave de
+# idempotência), então só se reenvia quando o upstream com certeza
+# não processou:
+# - a conexão nem abriu (recusada, DNS, timeout de conexão)
+# - 408/425/429/503: o servidor respondeu que não processou
+# Timeout de leitura, conexão caída no meio, 500/502/504: pode ter
+# sido entregue → dead-letter (replay manual), nunca mensagem dobrada.
+# 2xx com corpo inválido conta como sucesso.
+#
+# Job mais velho que OUTBOUND_MAX_AGE_SECONDS (ex.: adiado várias vezes
+# por circuito aberto) vai para a dead-letter em vez de voltar à fila.
+#
+# Jobs:
+#   zapi    : método do zapi_client + args (token resolvido do
+#             vendor_registry a cada tentativa, não vai para o Redis)
+#   chatwoot: payload Z-API (mídia já no R2) + inbox → reexecuta
+#             send_from_zapi_payload (contato/conversa vêm do cache)
+#
+# Circuit breaker aberto (CircuitOpenError): o upstream nem foi
+# chamado → não gasta tentativa; o job volta para quando o breaker
+# puder fechar (+ jitter, para não sair tudo junto na prova).
+#
+# Um job retirado do ZSET e perdido num crash do worker antes do
+# reagendamento não volta: entrega "no máximo uma vez" nesse ponto.
+
+RETRY_KEY = "outbound:retry"
+DLQ_KEY = "outbound:dlq"
+RETRY_BATCH = 100
+# respostas que garantem que o envio não foi processado
+RETRYABLE_STATUS = {408, 425, 429, 503}
+# aiohttp: falhou antes de a requisição sair
+NOT_SENT_ERRORS = (aiohttp.ClientConnectorError, aiohttp.ConnectionTimeoutError)
+
+
+def _retryable_status(status: int) -> bool:
+    return status in RETRYABLE_STATUS
+
+
+def chatwoot_failure(result) -> tuple[bool, str] | None:
+    """
+    (retentável, motivo) se o resultado do ChatwootClient é uma falha.
+    """
+    if not isinstance(result, dict) or result.get("ignored"):
+        return None
+    if result.get("error"):
+        # contato/conversa ou download da mídia: Chatwoot/R2 fora do ar
+        return True, str(result["error"])
+    status = result.get("status")
+    if isinstance(status, int) and status >= 400:
+        return _retryable_status(status), f"http_{status}"
+    return None
+
+
+def backoff_seconds(attempt: int) -> float:
+    """
+    Full jitter: uniforme em [0, min(max, base * 2^(tentativa-1))].
+    """
+    ceiling = min(settings.OUTBOUND_RETRY_MAX_SECONDS, settings.OUTBOUND_RETRY_BASE_SECONDS * 2 ** (attempt - 1))
+    return random.uniform(0, ceiling)
+
+
+class OutboundDelivery:
+    def __init__(self) -> None:
+        self.depth = {"retry": 0, "dead": 0}
+        self._inflight: set[asyncio.Task] = set()
+
+    # --------------------------------------------------------
+    # API dos webhooks
+    # --------------------------------------------------------
+    async def send_zapi(self, instance_id: str, method: str, *args, **kwargs) -> dict:
+        """
+        zapi_client.<method>(instance_id, token, *args, **kwargs)
+        """
+        return await self._deliver(self._job("zapi", {
+            "instance_id": instance_id,
+            "method": method,
+            "args": list(args),
+            "kwargs": kwargs,
+        }))
+
+    async def send_chatwoot(self, payload: dict, inbox_identifier: str) -> dict:
+        return await self._deliver(self._job("chatwoot", {
+            "payload": payload,
+            "inbox_identifier": inbox_identifier,
+        }))
+
+    @staticmethod
+    def _job(target: str, data: dict) -> dict:
+        return {
+            "id": uuid.uuid4().hex,
+            "target": target,
+            "attempts": 0,
+            "created_at": time.time(),
+            "last_error": "",
+            "data": data,
+        }
+
+    # --------------------------------------------------------
+    # Tentativa
+    # --------------------------------------------------------
+    async def _attempt(self, job: dict) -> tuple[object, tuple[bool, str] | None]:
+        """
+        (resultado, falha) — falha = (retentável, motivo) ou None.
+        """
+        data = job["data"]
+        try:
+            if job["target"] == "zapi":
+                vendor = await vendor_registry.get_by_instance(data["instance_id"])
+                if vendor is None:
+                    return None, (False, "vendor_not_found")
+                send = getattr(zapi_client, data["method"])
+                # cliente síncrono: fora do event loop
+                result = await asyncio.to_thread(
+                    send, vendor.instance_id, vendor.instance_token, *data["args"], **data["kwargs"],
+                )
+                return result, None
+
+            result = await chatwoot_client.send_from_zapi_payload(data["payload"], data["inbox_identifier"])
+            return result, chatwoot_failure(result)
+
+        except CircuitOpenError:
+            raise
+        except ZAPIError as e:
+            if e.status_code:
+                return None, (_retryable_status(e.status_code), f"http_{e.status_code}")
+            return None, (not e.sent, "no_response" if e.sent else "not_sent")
+        except NOT_SENT_ERRORS as e:
+            return None, (True, type(e).__name__)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            # pode ter chegado ao Chatwoot: não reenvia sozinho
+            return None, (False, type(e).__name__)
+        except Exception as e:
+            logger.exception(f"❌ [outbound] erro inesperado job={job['id']}")
+            return None, (False, f"exception:{type(e).__name__}")
+
+    async def _deliver(self, job: dict) -> dict:
+        try:
+            result, failure = await self._attempt(job)
+        except CircuitOpenError as e:
+            return await self._defer_open_circuit(job, e)
+
+        job["attempts"] += 1
+        if failure is None:
+            return result
+
+        retryable, reason = failure
+        job["last_error"] = reason
+        try:
+            if retryable and job["attempts"] < settings.OUTBOUND_MAX_ATTEMPTS:
+                await self._schedule(job, time.time() + backoff_seconds(job["attempts"]))
+                return {"deferred": True, "job_id": job["id"], "error": reason}
+
+            await self._dead_letter(job)
+        except Exception as e:
+            # sem Redis não há onde guardar: a mensagem se perde (como antes)
+            logger.error(f"❌ [outbound] não foi possível guardar job={job['id']} ({reason}): {e}")
+        return {"dead_letter": True, "job_id": job["id"], "error": reason}
+
+    async def _defer_open_circuit(self, job: dict, error: CircuitOpenError) -> dict:
+        job["last_error"] = "circuit_open"
+        due = time.time() + error.retry_after + random.uniform(0, settings.OUTBOUND_RETRY_BASE_SECONDS)
+        try:
+            if due - job["created_at"] > settings.OUTBOUND_MAX_AGE_SECONDS:
+                job["last_error"] = "circuit_open:expired"
+                await self._dead_letter(job)
+                return {"dead_letter": True, "job_id": job["id"], "error": job["last_error"]}
+            await self._schedule(job, due)
+        except Exception as e:
+            logger.error(f"❌ [outbound] não foi possível guardar job={job['id']} (circuit_open): {e}")
+            return {"dead_letter": True, "job_id": job["id"], "error": "circuit_open"}
+        return {"deferred": True, "job_id": job["id"], "error": "circuit_open"}
+
+    async def _schedule(self, job: dict, due: float) -> None:
+        redis = await get_redis()
+        await redis.zadd(RETRY_KEY, {json.dumps(job): due})
+        logger.warning(
+            f"⏳ [outbound] {job['target']} job={job['id']} adiado ({job['last_error']}) "
+            f"após {job['attempts']} tentativa(s), nova em {due - time.time():.1f}s"
+        )
+
+    async def _dead_letter(self, job: dict) -> None:
+        job["dead_at"] = time.time()
+        redis = await get_redis()
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.zadd(DLQ_KEY, {json.dumps(job): job["dead_at"]})
+            # limites da dead-letter: idade e quantidade (sai o mais antigo)
+            pipe.zremrangebyscore(DLQ_KEY, "-inf", job["dead_at"] - settings.OUTBOUND_DLQ_TTL_SECONDS)
+            pipe.zremrangebyrank(DLQ_KEY, 0, -settings.OUTBOUND_DLQ_MAX_JOBS - 1)
+            await pipe.execute()
+        OUTBOUND_DEAD_LETTERS.labels(job["target"]).inc()
+        logger.error(
+            f"💀 [outbound] {job['target']} job={job['id']} na dead-letter "
+            f"após {job['attempts']} tentativa(s): {job['last_error']}"
+        )
+
+    # --------------------------------------------------------
+    # Worker
+    # --------------------------------------------------------
+    async def _retry(self, job: dict) -> None:
+        result = await self._deliver(job)
+        if isinstance(result, dict) and result.get("deferred"):
+            outcome = "retry"
+        elif isinstance(result, dict) and result.get("dead_letter"):
+            outcome = "dead"
+        else:
+            outcome = "ok"
+            logger.info(f"✅ [outbound] {job['target']} job={job['id']} entregue na tentativa {job['attempts']}")
+        OUTBOUND_RETRIES.labels(job["target"], outcome).inc()
+
+    async def poll(self) -> int:
+        """
+        Dispara os jobs vencidos (até OUTBOUND_CONCURRENCY em voo).
+        """
+        redis = await get_redis()
+        self.depth["retry"] = await redis.zcard(RETRY_KEY)
+        self.depth["dead"] = await redis.zcard(DLQ_KEY)
+
+        free = settings.OUTBOUND_CONCURRENCY - len(self._inflight)
+        if free <= 0:
+            return 0
+
+        due = await redis.zrangebyscore(RETRY_KEY, "-inf", time.time(), start=0, num=min(free, RETRY_BATCH))
+        started = 0
+        for member in due:
+            if not await redis.zrem(RETRY_KEY, member):
+                continue  # outro worker pegou
+            task = asyncio.create_task(self._retry(json.loads(member)))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+            started += 1
+        return started
+
+    # --------------------------------------------------------
+    # Dead-letter (admin)
+    # --------------------------------------------------------
+    async def stats(self) -> dict:
+        redis = await get_redis()
+        return {
+            "retry": await redis.zcard(RETRY_KEY),
+            "dead": await redis.zcard(DLQ_KEY),
+            "inflight": len(self._inflight),
+        }
+
+    async def dead_letters(self, limit: int) -> list[dict]:
+        redis = await get_redis()
+        return [json.loads(m) for m in await redis.zrange(DLQ_KEY, 0, limit - 1)]
+
+    async def _take_dead(self, job_id: str | None, limit: int) -> list[dict]:
+        redis = await get_redis()
+        members = await redis.zrange(DLQ_KEY, 0, -1 if job_id else limit - 1)
+        taken = []
+        for member in members:
+            job = json.loads(member)
+            if job_id and job["id"] != job_id:
+                continue
+            if await redis.zrem(DLQ_KEY, member):
+                taken.append(job)
+        return taken
+
+    async def replay(self, job_id: str | None = None, limit: int = 100) -> int:
+        """
+        Devolve jobs da dead-letter para a fila de retry (vencidos agora),
+        com as tentativas zeradas.
+        """
+        jobs = await self._take_dead(job_id, limit)
+        redis = await get_redis()
+        now = time.time()
+        for job in jobs:
+            job["attempts"] = 0
+            job.pop("dead_at", None)
+            await redis.zadd(RETRY_KEY, {json.dumps(job): now})
+        if jobs:
+            logger.info(f"🔁 [outbound] {len(jobs)} job(s) da dead-letter reenfileirados")
+        return len(jobs)
+
+    async def discard(self, job_id: str) -> bool:
+        jobs = await self._take_dead(job_id, 0)
+        if jobs:
+            logger.info(f"🗑️ [outbound] job={job_id} descartado da dead-letter")
+        return bool(jobs)
+
+
+outbound = OutboundDelivery()
+
+
+async def run_outbound_worker() -> None:
+    """
+    Loop de background: reenvia os jobs vencidos a cada OUTBOUND_POLL_SECONDS.
+    """
+    interval = settings.OUTBOUND_POLL_SECONDS
+
+    while True:
+        try:
+            await outbound.poll()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ [outbound] erro lendo a fila de retry: {e}")
+        await asyncio.sleep(interval)
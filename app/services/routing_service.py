@@ -0,0 +1,185 @@
+# file: app/services/routing_service.py
+
+from dataclasses import dataclass
+
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.tracing import traced
+from app.models.vendors import Vendor
+from app.models.conversations import Conversation
+from app.models.conversation_sessions import ConversationSession
+from app.services.conversations_service import apply_conversation_rules
+from app.services.sessions_service import apply_session_rules
+from app.services.vendor_registry import VendorSnapshot
+from app.utils.helpers import count_elided
+
+
+# ============================================================
+# Contexto de roteamento (hot path do webhook Z-API)
+# ============================================================
+
+@dataclass(frozen=True, slots=True)
+class RoutingContext:
+    vendor_id: str
+    instance_id: str
+    instance_token: str
+    inbox_identifier: str
+
+    conversation_id: str
+    session_id: str
+
+    conversation_created: bool
+    session_created: bool
+
+
+def _routing_stmt(instance_id: str, phone: str):
+    """
+    Uma única query:
+    vendor ⟕ conversa mais recente do telefone ⟕ sessão ativa.
+    """
+    return (
+        select(Vendor, Conversation, ConversationSession)
+        .select_from(Vendor)
+        .outerjoin(Conversation, Conversation.customer_phone == phone)
+        .outerjoin(
+            ConversationSession,
+            and_(
+                ConversationSession.conversation_id == Conversation.conversation_id,
+                ConversationSession.end_at.is_(None),
+            ),
+        )
+        .where(Vendor.instance_id == instance_id)
+        .order_by(Conversation.last_active_at.desc().nullslast())
+        .limit(1)
+    )
+
+
+def _conversation_stmt(phone: str):
+    """
+    Variante sem vendor (já resolvido pelo vendor_registry):
+    conversa mais recente do telefone ⟕ sessão ativa.
+    """
+    return (
+        select(Conversation, ConversationSession)
+        .outerjoin(
+            ConversationSession,
+            and_(
+                ConversationSession.conversation_id == Conversation.conversation_id,
+                ConversationSession.end_at.is_(None),
+            ),
+        )
+        .where(Conversation.customer_phone == phone)
+        .order_by(Conversation.last_active_at.desc().nullslast())
+        .limit(1)
+    )
+
+
+def _build_context(
+    vendor: Vendor | VendorSnapshot,
+    conv: Conversation,
+    session: ConversationSession,
+    conversation_created: bool,
+    session_created: bool,
+) -> RoutingContext:
+    return RoutingContext(
+        vendor_id=vendor.vendor_id,
+        instance_id=vendor.instance_id,
+        instance_token=vendor.instance_token,
+        inbox_identifier=vendor.inbox_identifier,
+        conversation_id=conv.conversation_id,
+        session_id=session.session_id,
+        conversation_created=conversation_created,
+        session_created=session_created,
+    )
+
+
+def resolve_routing_context(
+    db: Session,
+    instance_id: str,
+    phone: str,
+    zapi_lid: str = "",
+    chatwoot_conv_id: str = "",
+) -> RoutingContext | None:
+    """
+    Substitui a sequência get_vendor_by_instance → ensure_conversation
+    → ensure_session: carrega tudo com um SELECT, aplica as mesmas
+    regras e grava as decisões em uma única transação.
+
+    Retorna None se o vendedor da instância não existir.
+    """
+    row = db.execute(_routing_stmt(instance_id, phone)).first()
+    if not row:
+        return None
+
+    vendor, conv, active = row
+
+    conv, conversation_created = apply_conversation_rules(db, conv, phone, vendor.vendor_id)
+    if conversation_created:
+        # sessão ativa pertence à conversa antiga/expirada
+        active = None
+        db.flush()  # gera conversation_id dentro da mesma transação
+
+    session, session_changed = apply_session_rules(
+        db, active, conv.conversation_id, vendor.vendor_id, zapi_lid, chatwoot_conv_id
+    )
+    session_created = session is not active
+    if session_created:
+        db.flush()
+
+    # monta o contexto antes do commit (evita refresh pós-commit)
+    ctx = _build_context(vendor, conv, session, conversation_created, session_created)
+
+    if conversation_created or session_changed:
+        db.commit()
+    else:
+        # nada mudou (atividade vai pelo activity_buffer)
+        count_elided("routing.commit")
+    return ctx
+
+
+@traced("db.resolve_routing_context")
+async def resolve_routing_context_async(
+    db: AsyncSession,
+    instance_id: str,
+    phone: str,
+    zapi_lid: str = "",
+    chatwoot_conv_id: str = "",
+    commit: bool = True,
+    vendor: VendorSnapshot | None = None,
+) -> RoutingContext | None:
+    """
+    Versão assíncrona de resolve_routing_context.
+    commit=False: deixa o commit para quem chamou (ex.: writer SQLite).
+    vendor: snapshot do vendor_registry — a query passa a buscar só
+    conversa + sessão.
+    """
+    if vendor is not None:
+        row = (await db.execute(_conversation_stmt(phone))).first()
+        conv, active = row if row else (None, None)
+    else:
+        row = (await db.execute(_routing_stmt(instance_id, phone))).first()
+        if not row:
+            return None
+        vendor, conv, active = row
+
+    conv, conversation_created = apply_conversation_rules(db, conv, phone, vendor.vendor_id)
+    if conversation_created:
+        active = None
+        await db.flush()
+
+    session, session_changed = apply_session_rules(
+        db, active, conv.conversation_id, vendor.vendor_id, zapi_lid, chatwoot_conv_id
+    )
+    session_created = session is not active
+    if session_created:
+        await db.flush()
+
+    ctx = _build_context(vendor, conv, session, conversation_created, session_created)
+
+    if not (conversation_created or session_changed):
+        count_elided("routing.commit")
+    elif commit:
+        await db.commit()
+    return ctx
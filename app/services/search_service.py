@@ -0,0 +1,154 @@
+# file: app/services/search_service.py
+
+import re
+from datetime import datetime
+
+from sqlalchemy import column, func, literal_column, select, table, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.fulltext import FTS_TABLE, TS_CONFIG, TSV_COLUMN, has_fulltext
+from app.models.messages_log import MessageLog
+from app.services.messages_service import _message_filters
+
+# ============================================================
+# Busca full-text em messages_log
+# ============================================================
+#
+# - SQLite: tabela FTS5 messages_log_fts (external content, triggers)
+# - Postgres: coluna gerada content_tsv + índice GIN
+# (ambos criados pela migração a3c5e8f19b27, ou por
+# app.db.fulltext.create_fulltext num banco feito por create_all; o
+# índice é atualizado pelo próprio banco no INSERT, sem custo extra no
+# código do webhook). Sem eles a busca levanta SearchUnavailable.
+#
+# Resultados ordenados por relevância; paginação por offset (o rank
+# muda conforme a base cresce, então não serve de cursor keyset).
+
+MAX_SEARCH_OFFSET = 1000
+
+
+class SearchUnavailable(Exception):
+    pass
+
+_messages = MessageLog.__table__
+_fts = table(FTS_TABLE, column("rowid"), column("content"))
+
+RESULT_COLUMNS = [
+    _messages.c.log_id,
+    _messages.c.conversation_id,
+    _messages.c.session_id,
+    _messages.c.vendor_id,
+    _messages.c.direction,
+    _messages.c.source,
+    _messages.c.message_type,
+    _messages.c.content,
+    _messages.c.created_at,
+]
+
+_TOKEN_RE = re.compile(r"\w+\*?", re.UNICODE)
+
+
+def _fts5_query(q: str) -> str:
+    """
+    Texto livre → consulta FTS5 segura: cada termo entre aspas (AND
+    implícito); "term*" vira busca por prefixo.
+    """
+    terms = []
+    for token in _TOKEN_RE.findall(q):
+        prefix = token.endswith("*")
+        word = token.rstrip("*")
+        terms.append(f'"{word}"*' if prefix else f'"{word}"')
+    return " ".join(terms)
+
+
+def _sqlite_search_stmt(q: str):
+    rank = func.bm25(literal_column(FTS_TABLE))
+    return (
+        select(
+            *RESULT_COLUMNS,
+            (-rank).label("rank"),
+            func.snippet(literal_column(FTS_TABLE), 0, "[", "]", "…", 16).label("snippet"),
+        )
+        .select_from(_fts.join(_messages, literal_column("messages_log.rowid") == _fts.c.rowid))
+        .where(text(f"{FTS_TABLE} MATCH :fts_query").bindparams(fts_query=_fts5_query(q)))
+        # bm25: menor = mais relevante
+        .order_by(rank, _messages.c.created_at.desc())
+    )
+
+
+def _postgres_search_stmt(q: str):
+    query = func.websearch_to_tsquery(TS_CONFIG, q)
+    tsv = literal_column(f"messages_log.{TSV_COLUMN}")
+    rank = func.ts_rank_cd(tsv, query)
+    return (
+        select(
+            *RESULT_COLUMNS,
+            rank.label("rank"),
+            func.ts_headline(
+                TS_CONFIG,
+                _messages.c.content,
+                query,
+                "StartSel=[, StopSel=], MaxWords=20, MinWords=5",
+            ).label("snippet"),
+        )
+        .where(tsv.op("@@")(query))
+        .order_by(rank.desc(), _messages.c.created_at.desc())
+    )
+
+
+def _fallback_search_stmt(q: str):
+    # outros bancos: sem índice de texto, apenas LIKE
+    return (
+        select(*RESULT_COLUMNS, literal_column("0").label("rank"), _messages.c.content.label("snippet"))
+        .where(_messages.c.content.ilike(f"%{q}%"))
+        .order_by(_messages.c.created_at.desc())
+    )
+
+
+def _search_stmt(q: str, dialect: str):
+    if dialect == "sqlite":
+        return _sqlite_search_stmt(q)
+    if dialect == "postgresql":
+        return _postgres_search_stmt(q)
+    return _fallback_search_stmt(q)
+
+
+async def search_messages_async(
+    db: AsyncSession,
+    q: str,
+    limit: int,
+    offset: int = 0,
+    vendor_id: str | None = None,
+    direction: str | None = None,
+    source: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> dict:
+    """
+    {"items": [... + rank, snippet], "next_offset": int | None}
+    """
+    dialect = db.bind.dialect.name
+
+    if dialect == "sqlite" and not _fts5_query(q):
+        return {"items": [], "next_offset": None}
+
+    stmt = (
+        _search_stmt(q, dialect)
+        .where(*_message_filters(vendor_id=vendor_id, direction=direction, source=source, since=since, until=until))
+        .limit(limit + 1)
+        .offset(offset)
+    )
+    try:
+        rows = (await db.execute(stmt)).mappings().all()
+    except (OperationalError, ProgrammingError) as e:
+        await db.rollback()
+        if not await db.run_sync(lambda s: has_fulltext(s.connection())):
+            raise SearchUnavailable(f"índice full-text ausente em messages_log (dialeto {dialect})") from e
+        raise
+
+    has_more = len(rows) > limit and offset + limit < MAX_SEARCH_OFFSET
+    return {
+        "items": [dict(row) for row in rows[:limit]],
+        "next_offset": offset + limit if has_more else None,
+    }
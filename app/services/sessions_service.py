@@ -1,8 +1,14 @@
 from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.core.tracing import traced
+from app.db.session import AsyncSessionLocal
 from app.models.conversation_sessions import ConversationSession
 from app.schemas.conversation_sessions import ConversationSessionCreate
+from app.utils.helpers import assign_changed, count_elided
+from app.utils.pagination import Keyset, fetch_page, iter_chunks
 
 
 def get_active_session(db: Session, conversation_id: str) -> ConversationSession | None:
@@ -17,9 +23,12 @@ def get_active_session(db: Session, conversation_id: str) -> ConversationSession
 
 
 def close_session(db: Session, session: ConversationSession):
+    if session.end_at is not None:
+        count_elided("session.close")
+        return session
+
     session.end_at = datetime.utcnow()  # CORRETO: UTC
     db.commit()
-    db.refresh(session)
     return session
 
 
@@ -31,37 +40,146 @@ def create_session(db: Session, data: ConversationSessionCreate):
     return session
 
 
-def ensure_session(db: Session, conversation_id: str, vendor_id: str, zapi_lid: str, chatwoot_conv_id: str):
-    active = get_active_session(db, conversation_id)
+def apply_session_rules(
+    db: Session | AsyncSession,
+    active: ConversationSession | None,
+    conversation_id: str,
+    vendor_id: str,
+    zapi_lid: str,
+    chatwoot_conv_id: str,
+) -> tuple[ConversationSession, bool]:
+    """
+    Aplica as regras de sessão sem commit:
+    - sem sessão ativa → cria nova
+    - vendedor mudou → fecha a anterior e cria nova
+    - mesmo vendedor → apenas atualiza ids externos (se mudaram)
+
+    Retorna (sessão, houve_alteração).
+    """
+    new_session = ConversationSessionCreate(
+        conversation_id=conversation_id,
+        vendor_id=vendor_id,
+        zapi_chat_lid=zapi_lid,
+        chatwoot_conv_id=chatwoot_conv_id
+    )
 
     # se não tem sessão ativa → cria nova
     if not active:
-        return create_session(
-            db,
-            ConversationSessionCreate(
-                conversation_id=conversation_id,
-                vendor_id=vendor_id,
-                zapi_chat_lid=zapi_lid,
-                chatwoot_conv_id=chatwoot_conv_id
-            )
-        )
+        session = ConversationSession(**new_session.model_dump())
+        db.add(session)
+        return session, True
 
     # se mudou de vendedor → fecha anterior e cria nova
     if active.vendor_id != vendor_id:
-        close_session(db, active)
-        return create_session(
-            db,
-            ConversationSessionCreate(
-                conversation_id=conversation_id,
-                vendor_id=vendor_id,
-                zapi_chat_lid=zapi_lid,
-                chatwoot_conv_id=chatwoot_conv_id
-            )
-        )
+        active.end_at = datetime.utcnow()
+        session = ConversationSession(**new_session.model_dump())
+        db.add(session)
+        return session, True
 
     # mesmo vendedor → apenas atualiza ids externos
-    active.zapi_chat_lid = zapi_lid
-    active.chatwoot_conv_id = chatwoot_conv_id
-    db.commit()
-    db.refresh(active)
-    return active
+    changed = assign_changed(active, {
+        "zapi_chat_lid": zapi_lid,
+        "chatwoot_conv_id": chatwoot_conv_id,
+    })
+    if not changed:
+        count_elided("session.update")
+    return active, bool(changed)
+
+
+def ensure_session(db: Session, conversation_id: str, vendor_id: str, zapi_lid: str, chatwoot_conv_id: str):
+    session, changed = apply_session_rules(
+        db,
+        get_active_session(db, conversation_id),
+        conversation_id,
+        vendor_id,
+        zapi_lid,
+        chatwoot_conv_id,
+    )
+    if changed:
+        db.commit()
+    return session
+
+
+# ============================================================
+# Versões assíncronas (AsyncSession)
+# ============================================================
+
+async def get_active_session_async(db: AsyncSession, conversation_id: str) -> ConversationSession | None:
+    return await db.scalar(
+        select(ConversationSession)
+        .where(
+            ConversationSession.conversation_id == conversation_id,
+            ConversationSession.end_at.is_(None)
+        )
+        .limit(1)
+    )
+
+
+@traced("db.ensure_session")
+async def ensure_session_async(
+    db: AsyncSession,
+    conversation_id: str,
+    vendor_id: str,
+    zapi_lid: str,
+    chatwoot_conv_id: str,
+    commit: bool = True,
+):
+    """
+    commit=False: só faz flush (ex.: job do writer SQLite).
+    """
+    session, changed = apply_session_rules(
+        db,
+        await get_active_session_async(db, conversation_id),
+        conversation_id,
+        vendor_id,
+        zapi_lid,
+        chatwoot_conv_id,
+    )
+    if changed and commit:
+        await db.commit()
+    elif changed:
+        await db.flush()
+    if commit:
+        # antes: commit + refresh sempre; ids já conhecidos
+        count_elided("session.refresh")
+    return session
+
+
+async def get_session_async(db: AsyncSession, session_id: str) -> ConversationSession | None:
+    return await db.get(ConversationSession, session_id)
+
+
+# ============================================================
+# Leitura paginada (keyset)
+# ============================================================
+
+SESSION_KEYSET = Keyset(ConversationSession.__table__, "session_id")
+
+
+def _session_filters(
+    conversation_id: str | None = None,
+    vendor_id: str | None = None,
+    active: bool | None = None,
+) -> list:
+    filters = []
+    if conversation_id:
+        filters.append(ConversationSession.conversation_id == conversation_id)
+    if vendor_id:
+        filters.append(ConversationSession.vendor_id == vendor_id)
+    if active is not None:
+        filters.append(ConversationSession.end_at.is_(None) if active else ConversationSession.end_at.is_not(None))
+    return filters
+
+
+async def list_sessions_async(
+    db: AsyncSession,
+    fields: list[str],
+    cursor: str | None,
+    limit: int,
+    **filters,
+) -> dict:
+    return await fetch_page(db, SESSION_KEYSET, fields, _session_filters(**filters), cursor, limit)
+
+
+def export_sessions(fields: list[str], **filters):
+    return iter_chunks(AsyncSessionLocal, SESSION_KEYSET, fields, _session_filters(**filters))
@@ -0,0 +1,197 @@
+# file: app/services/vendor_metrics_service.py
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+
+from app.core.redis import get_redis
+from app.core.tracing import traced
+
+logger = logging.getLogger("vendor_metrics")
+
+
+# ============================================================
+# Contadores em tempo real por vendedor (Redis)
+# ============================================================
+#
+# Atualizados pelos webhooks a cada mensagem (fire-and-forget, um
+# pipeline = 1 round-trip, sem bloquear a resposta):
+#
+#   vm:{vendor}:msg:{in|out}:{minuto}   INCR   → mensagens por minuto
+#   vm:{vendor}:msg:{in|out}:10m:{bloco} INCR  → mensagens por bloco de
+#                                        10 minutos (agregado parcial)
+#   vm:{vendor}:contacts:{YYYYMMDD}     PFADD  → contatos únicos no dia (HLL)
+#   vm:{vendor}:awaiting                ZADD/ZREM → conversas aguardando
+#                                        resposta (score = 1ª msg sem resposta)
+#   vm:conv:{conversa}:vendor           SET GET → vendedor dono da conversa
+#
+# Conversa que nunca recebe resposta (grupo, spam, expirada) sai de
+# awaiting depois de AWAITING_MAX_AGE_SECONDS (poda por score na
+# escrita e na leitura). Se a conversa muda de vendedor, a mensagem
+# seguinte tira ela do awaiting do anterior (2º round-trip só nesse caso).
+#
+# Leitura: a janela é coberta por blocos de 10 minutos inteiros e só
+# as pontas por minuto (~window/10 + 18 chaves em vez de window), mais
+# 1 PFCOUNT e 1 ZCARD; todos os vendedores num único pipeline. A
+# escrita paga um INCR a mais no mesmo round-trip. Um total corrido
+# exato (1 chave) precisaria de um job decrementando o minuto que sai
+# da janela; com a janela limitada a 120 min os blocos bastam.
+#
+# messages_last_minute é o último minuto fechado (o atual ainda está
+# contando); a janela inclui o minuto atual.
+
+MINUTE_KEY_TTL_SECONDS = 2 * 60 * 60 + 10 * 60
+BLOCK_MINUTES = 10
+CONTACTS_KEY_TTL_SECONDS = 8 * 24 * 60 * 60
+AWAITING_MAX_AGE_SECONDS = 24 * 60 * 60
+DEFAULT_WINDOW_MINUTES = 60
+
+_pending_tasks: set[asyncio.Task] = set()
+
+
+def _minute(ts: float) -> int:
+    return int(ts // 60)
+
+
+def _window_keys(prefix: str, first: int, last: int) -> list[str]:
+    """
+    Chaves que somam os minutos [first, last]: blocos inteiros + pontas.
+    """
+    keys = []
+    m = first
+    while m <= last:
+        if m % BLOCK_MINUTES == 0 and m + BLOCK_MINUTES - 1 <= last:
+            keys.append(f"{prefix}:10m:{m // BLOCK_MINUTES}")
+            m += BLOCK_MINUTES
+        else:
+            keys.append(f"{prefix}:{m}")
+            m += 1
+    return keys
+
+
+def _day(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y%m%d")
+
+
+@traced("redis.vendor_metrics")
+async def record_message(
+    vendor_id: str,
+    direction: str,
+    conversation_id: str,
+    contact: str | None = None,
+    at: float | None = None,
+) -> None:
+    ts = at or time.time()
+    prefix = f"vm:{vendor_id}"
+    counter = f"{prefix}:msg:{'in' if direction == 'incoming' else 'out'}"
+    awaiting = f"{prefix}:awaiting"
+    minute = _minute(ts)
+
+    redis = await get_redis()
+    pipe = redis.pipeline(transaction=False)
+
+    for key in (f"{counter}:{minute}", f"{counter}:10m:{minute // BLOCK_MINUTES}"):
+        pipe.incr(key)
+        pipe.expire(key, MINUTE_KEY_TTL_SECONDS)
+
+    if direction == "incoming":
+        if contact:
+            contacts_key = f"{prefix}:contacts:{_day(ts)}"
+            pipe.pfadd(contacts_key, contact)
+            pipe.expire(contacts_key, CONTACTS_KEY_TTL_SECONDS)
+        # NX: mantém o horário da primeira mensagem ainda sem resposta
+        pipe.zadd(awaiting, {conversation_id: ts}, nx=True)
+        pipe.zremrangebyscore(awaiting, "-inf", ts - AWAITING_MAX_AGE_SECONDS)
+        pipe.set(f"vm:conv:{conversation_id}:vendor", vendor_id, ex=AWAITING_MAX_AGE_SECONDS, get=True)
+    else:
+        pipe.zrem(awaiting, conversation_id)
+
+    results = await pipe.execute()
+
+    previous = results[-1] if direction == "incoming" else None
+    if previous and previous != vendor_id:
+        # conversa reatribuída: não fica pendente no vendedor anterior
+        await redis.zrem(f"vm:{previous}:awaiting", conversation_id)
+
+
+def record_message_nowait(
+    vendor_id: str,
+    direction: str,
+    conversation_id: str,
+    contact: str | None = None,
+) -> None:
+    """
+    Agenda record_message sem esperar (o webhook não paga o round-trip
+    e uma queda do Redis não afeta o fluxo da mensagem).
+    """
+    at = time.time()
+
+    async def _run():
+        try:
+            await record_message(vendor_id, direction, conversation_id, contact, at)
+        except Exception as e:
+            logger.debug(f"[vendor_metrics] contador não atualizado: {e}")
+
+    task = asyncio.get_running_loop().create_task(_run())
+    _pending_tasks.add(task)
+    task.add_done_callback(_pending_tasks.discard)
+
+
+async def get_vendor_metrics(
+    vendor_ids: list[str],
+    window_minutes: int = DEFAULT_WINDOW_MINUTES,
+) -> dict[str, dict]:
+    """
+    {vendor_id: métricas}; o último minuto fechado e o atual são sempre
+    lidos sozinhos (dois últimos valores do MGET).
+    """
+    if not vendor_ids:
+        return {}
+
+    now = time.time()
+    current = _minute(now)
+    first = current - window_minutes + 1
+    today = _day(now)
+
+    redis = await get_redis()
+    pipe = redis.pipeline(transaction=False)
+    for vendor_id in vendor_ids:
+        prefix = f"vm:{vendor_id}"
+        for direction in ("in", "out"):
+            counter = f"{prefix}:msg:{direction}"
+            pipe.mget(
+                _window_keys(counter, first, current - 2)
+                + [f"{counter}:{current - 1}", f"{counter}:{current}"]
+            )
+        pipe.pfcount(f"{prefix}:contacts:{today}")
+        # vendedor sem mensagens novas também perde as pendências vencidas
+        pipe.zremrangebyscore(f"{prefix}:awaiting", "-inf", now - AWAITING_MAX_AGE_SECONDS)
+        pipe.zcard(f"{prefix}:awaiting")
+        pipe.zrange(f"{prefix}:awaiting", 0, 0, withscores=True)
+    results = await pipe.execute()
+
+    # janela de 1 minuto: só o atual (o anterior veio para last_minute)
+    in_window = slice(None) if window_minutes > 1 else slice(-1, None)
+
+    metrics = {}
+    for i, vendor_id in enumerate(vendor_ids):
+        incoming, outgoing, contacts, _, awaiting, oldest = results[i * 6:(i + 1) * 6]
+        incoming = [int(v or 0) for v in incoming]
+        outgoing = [int(v or 0) for v in outgoing]
+        last_in, last_out = incoming[-2], outgoing[-2]
+        incoming, outgoing = incoming[in_window], outgoing[in_window]
+
+        metrics[vendor_id] = {
+            "messages_last_minute": {"incoming": last_in, "outgoing": last_out},
+            "messages_per_minute": {
+                "incoming": round(sum(incoming) / window_minutes, 2),
+                "outgoing": round(sum(outgoing) / window_minutes, 2),
+            },
+            "messages_window": {"incoming": sum(incoming), "outgoing": sum(outgoing)},
+            "unique_contacts_today": contacts,
+            "pending_replies": awaiting,
+            "oldest_pending_seconds": round(now - oldest[0][1], 1) if oldest else None,
+        }
+
+    return metrics
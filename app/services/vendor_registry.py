@@ -0,0 +1,232 @@
+# file: app/services/vendor_registry.py
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from sqlalchemy import select
+
+from app.core.redis import get_redis, publish, publish_sync
+from app.core.settings import settings
+from app.db.session import AsyncSessionLocal
+from app.models.vendors import Vendor
+
+logger = logging.getLogger("vendor_registry")
+
+VENDOR_INVALIDATION_CHANNEL = "vendors:invalidate"
+
+
+# ============================================================
+# Snapshot imutável do vendedor
+# ============================================================
+
+@dataclass(frozen=True, slots=True)
+class VendorSnapshot:
+    vendor_id: str
+    name: str
+    phone: str
+    agent_id: int
+    inbox_identifier: str
+    instance_id: str
+    instance_token: str
+    active: bool
+
+    @classmethod
+    def from_model(cls, vendor: Vendor) -> "VendorSnapshot":
+        return cls(
+            vendor_id=vendor.vendor_id,
+            name=vendor.name,
+            phone=vendor.phone,
+            agent_id=vendor.agent_id,
+            inbox_identifier=vendor.inbox_identifier,
+            instance_id=vendor.instance_id,
+            instance_token=vendor.instance_token,
+            active=vendor.active,
+        )
+
+
+@dataclass(frozen=True)
+class _Indexes:
+    by_id: dict[str, VendorSnapshot] = field(default_factory=dict)
+    by_instance: dict[str, VendorSnapshot] = field(default_factory=dict)
+    by_agent_id: dict[int, VendorSnapshot] = field(default_factory=dict)
+    by_inbox: dict[str, VendorSnapshot] = field(default_factory=dict)
+    by_phone: dict[str, VendorSnapshot] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, vendors: Iterable[Vendor]) -> "_Indexes":
+        indexes = cls()
+        for vendor in vendors:
+            snap = VendorSnapshot.from_model(vendor)
+            # mesmo comportamento do .first(): o primeiro encontrado vence
+            indexes.by_id.setdefault(snap.vendor_id, snap)
+            indexes.by_instance.setdefault(snap.instance_id, snap)
+            indexes.by_agent_id.setdefault(snap.agent_id, snap)
+            indexes.by_inbox.setdefault(snap.inbox_identifier, snap)
+            indexes.by_phone.setdefault(snap.phone, snap)
+        return indexes
+
+
+_LOOKUP_COLUMNS = {
+    "by_instance": Vendor.instance_id,
+    "by_agent_id": Vendor.agent_id,
+    "by_inbox": Vendor.inbox_identifier,
+    "by_phone": Vendor.phone,
+}
+
+
+# ============================================================
+# Registro em memória (por processo)
+# ============================================================
+
+class VendorRegistry:
+    """
+    Cópia local da tabela vendors, indexada por instance_id,
+    agent_id, inbox_identifier e phone.
+
+    Os índices são trocados de uma vez (referência única), então
+    leituras nunca veem um estado parcial. Alterações publicam em
+    VENDOR_INVALIDATION_CHANNEL e todos os processos recarregam.
+    """
+
+    def __init__(self) -> None:
+        self._indexes = _Indexes()
+        self._generation = 0         # incrementa a cada invalidação
+        self._loaded_generation = -1
+        self._lock = asyncio.Lock()
+
+    @property
+    def stale(self) -> bool:
+        return self._loaded_generation != self._generation
+
+    def invalidate(self) -> None:
+        self._generation += 1
+
+    async def reload(self) -> None:
+        generation = self._generation
+
+        async with AsyncSessionLocal() as db:
+            vendors = (await db.scalars(select(Vendor))).all()
+
+        self._indexes = _Indexes.build(vendors)
+        self._loaded_generation = generation
+        logger.info(f"[vendor_registry] {len(vendors)} vendedores carregados")
+
+    async def ensure_fresh(self) -> None:
+        if not self.stale:
+            return
+        async with self._lock:
+            if self.stale:
+                await self.reload()
+
+    async def _lookup(self, index: str, key) -> VendorSnapshot | None:
+        await self.ensure_fresh()
+
+        snap = getattr(self._indexes, index).get(key)
+        if snap is not None:
+            return snap
+
+        # miss: confirma no banco (invalidação perdida / outro processo)
+        column = _LOOKUP_COLUMNS[index]
+        async with AsyncSessionLocal() as db:
+            exists = await db.scalar(select(Vendor.vendor_id).where(column == key).limit(1))
+
+        if not exists:
+            return None
+
+        self.invalidate()
+        await self.ensure_fresh()
+        return getattr(self._indexes, index).get(key)
+
+    # --------------------------------------------------------
+    # Lookups
+    # --------------------------------------------------------
+    def __len__(self) -> int:
+        return len(self._indexes.by_id)
+
+    def get(self, vendor_id: str) -> VendorSnapshot | None:
+        return self._indexes.by_id.get(vendor_id)
+
+    async def list_all(self) -> list[VendorSnapshot]:
+        await self.ensure_fresh()
+        return list(self._indexes.by_id.values())
+
+    async def get_by_instance(self, instance_id: str) -> VendorSnapshot | None:
+        return await self._lookup("by_instance", instance_id)
+
+    async def get_by_agent_id(self, agent_id: int) -> VendorSnapshot | None:
+        return await self._lookup("by_agent_id", agent_id)
+
+    async def get_by_inbox(self, inbox_identifier: str) -> VendorSnapshot | None:
+        return await self._lookup("by_inbox", inbox_identifier)
+
+    async def get_by_phone(self, phone: str) -> VendorSnapshot | None:
+        return await self._lookup("by_phone", phone)
+
+
+# Instância global
+vendor_registry = VendorRegistry()
+
+
+# ============================================================
+# Invalidação (Pub/Sub)
+# ============================================================
+
+_publish_tasks: set[asyncio.Task] = set()
+
+
+async def notify_vendor_changed_async(vendor_id: str) -> None:
+    vendor_registry.invalidate()
+    await publish(VENDOR_INVALIDATION_CHANNEL, vendor_id)
+
+
+def notify_vendor_changed(vendor_id: str) -> None:
+    """
+    Versão síncrona: dentro do event loop agenda o publish,
+    fora dele (scripts) publica com cliente síncrono.
+    """
+    vendor_registry.invalidate()
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        publish_sync(VENDOR_INVALIDATION_CHANNEL, vendor_id)
+        return
+
+    task = loop.create_task(publish(VENDOR_INVALIDATION_CHANNEL, vendor_id))
+    _publish_tasks.add(task)
+    task.add_done_callback(_publish_tasks.discard)
+
+
+async def run_vendor_invalidation_listener() -> None:
+    """
+    Loop de background: escuta invalidações e recarrega o registro.
+    Sem mensagens, recarrega a cada VENDOR_REGISTRY_REFRESH_SECONDS.
+    """
+    interval = settings.VENDOR_REGISTRY_REFRESH_SECONDS
+
+    while True:
+        pubsub = None
+        try:
+            redis = await get_redis()
+            pubsub = redis.pubsub()
+            await pubsub.subscribe(VENDOR_INVALIDATION_CHANNEL)
+
+            while True:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=interval
+                )
+                if message is not None:
+                    logger.info(f"[vendor_registry] invalidação recebida: {message.get('data')}")
+                vendor_registry.invalidate()
+                await vendor_registry.ensure_fresh()
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ [vendor_registry] listener falhou: {e}")
+            await asyncio.sleep(5)
+        finally:
+            if pubsub is not None:
+                await pubsub.aclose()
@@ -1,6 +1,11 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models.vendors import Vendor
 from app.schemas.vendors import VendorCreate, VendorUpdate
+from app.services.vendor_registry import notify_vendor_changed, notify_vendor_changed_async
+from app.utils.helpers import assign_changed, count_elided
+from app.utils.pagination import Keyset, fetch_page
 
 
 def create_vendor(db: Session, data: VendorCreate) -> Vendor:
@@ -8,6 +13,7 @@ def create_vendor(db: Session, data: VendorCreate) -> Vendor:
     db.add(vendor)
     db.commit()
     db.refresh(vendor)
+    notify_vendor_changed(vendor.vendor_id)
     return vendor
 
 
@@ -32,15 +38,106 @@ def get_vendor_by_phone(db: Session, phone: str) -> Vendor | None:
     return db.query(Vendor).filter(Vendor.phone == phone).first()
 
 def update_vendor(db: Session, vendor: Vendor, data: VendorUpdate) -> Vendor:
-    for field, value in data.model_dump(exclude_unset=True).items():
-        setattr(vendor, field, value)
+    if not assign_changed(vendor, data.model_dump(exclude_unset=True)):
+        count_elided("vendor.update")
+        return vendor
+
     db.commit()
-    db.refresh(vendor)
+    notify_vendor_changed(vendor.vendor_id)
     return vendor
 
 
 def deactivate_vendor(db: Session, vendor: Vendor) -> Vendor:
+    if not vendor.active:
+        count_elided("vendor.deactivate")
+        return vendor
+
     vendor.active = False
     db.commit()
-    db.refresh(vendor)
+    notify_vendor_changed(vendor.vendor_id)
+    return vendor
+
+
+# ============================================================
+# Versões assíncronas (AsyncSession)
+# ============================================================
+
+async def create_vendor_async(db: AsyncSession, data: VendorCreate) -> Vendor:
+    vendor = Vendor(**data.model_dump())
+    db.add(vendor)
+    await db.commit()
+    await db.refresh(vendor)
+    await notify_vendor_changed_async(vendor.vendor_id)
+    return vendor
+
+
+async def list_vendors_async(db: AsyncSession):
+    return (await db.scalars(select(Vendor))).all()
+
+
+async def get_vendor_async(db: AsyncSession, vendor_id: str) -> Vendor | None:
+    return await db.get(Vendor, vendor_id)
+
+
+async def get_vendor_by_instance_async(db: AsyncSession, instance_id: str) -> Vendor | None:
+    return await db.scalar(select(Vendor).where(Vendor.instance_id == instance_id).limit(1))
+
+async def get_vendor_by_agent_id_async(db: AsyncSession, agent_id: int) -> Vendor | None:
+    return await db.scalar(select(Vendor).where(Vendor.agent_id == agent_id).limit(1))
+
+async def get_vendor_by_inbox_async(db: AsyncSession, inbox_identifier: str) -> Vendor | None:
+    return await db.scalar(select(Vendor).where(Vendor.inbox_identifier == inbox_identifier).limit(1))
+
+async def get_vendor_by_phone_async(db: AsyncSession, phone: str) -> Vendor | None:
+    return await db.scalar(select(Vendor).where(Vendor.phone == phone).limit(1))
+
+async def update_vendor_async(db: AsyncSession, vendor: Vendor, data: VendorUpdate) -> Vendor:
+    if not assign_changed(vendor, data.model_dump(exclude_unset=True)):
+        count_elided("vendor.update")
+        return vendor
+
+    await db.commit()
+    count_elided("vendor.refresh")
+    await notify_vendor_changed_async(vendor.vendor_id)
+    return vendor
+
+
+async def deactivate_vendor_async(db: AsyncSession, vendor: Vendor) -> Vendor:
+    if not vendor.active:
+        count_elided("vendor.deactivate")
+        return vendor
+
+    vendor.active = False
+    await db.commit()
+    count_elided("vendor.refresh")
+    await notify_vendor_changed_async(vendor.vendor_id)
     return vendor
+
+
+# ============================================================
+# Leitura paginada (keyset)
+# ============================================================
+
+# instance_token fica de fora: credencial da Z-API não sai pela API
+VENDOR_KEYSET = Keyset(Vendor.__table__, "vendor_id", columns=(
+    "vendor_id",
+    "name",
+    "phone",
+    "agent_id",
+    "inbox_identifier",
+    "instance_id",
+    "active",
+    "created_at",
+    "updated_at",
+))
+
+
+async def list_vendors_page_async(
+    db: AsyncSession,
+    fields: list[str],
+    cursor: str | None,
+    limit: int,
+    active: bool | None = None,
+) -> dict:
+    filters = [] if active is None else [Vendor.active == active]
+    return await fetch_page(db, VENDOR_KEYSET, fields, filters, cursor, limit)
@@ -2,13 +2,41 @@
 
 import logging
 import requests
+from urllib3.exceptions import NewConnectionError
+from app.core.circuit_breaker import CircuitOpenError, circuit_breakers
+from app.core.fault_injection import fault_injector
+from app.core.logging_setup import log_payload
 from app.core.settings import settings
+from app.core.tracing import span
 
 logger = logging.getLogger("zapi_service")
 
 
 class ZAPIError(Exception):
-    pass
+    def __init__(self, message: str, status_code: int | None = None, sent: bool = True):
+        super().__init__(message)
+        # None = sem resposta (timeout, conexão recusada ...)
+        self.status_code = status_code
+        # False = a requisição nem saiu (conexão não abriu): reenviar é
+        # seguro. True sem status = pode ter sido entregue (timeout de leitura)
+        self.sent = sent
+
+
+def _not_sent(e: Exception) -> bool:
+    if isinstance(e, requests.ConnectTimeout):
+        return True
+    if isinstance(e, requests.ConnectionError) and e.args:
+        return isinstance(getattr(e.args[0], "reason", None), NewConnectionError)
+    return False
+
+
+def _json_or_text(r: requests.Response, endpoint: str):
+    try:
+        return r.json()
+    except ValueError:
+        # 2xx com corpo inválido: a Z-API aceitou o envio (não é falha)
+        logger.warning(f"⚠️ [ZAPI] {endpoint} status={r.status_code} sem JSON válido")
+        return {"status": r.status_code, "response": r.text}
 
 
 class ZAPIClient:
@@ -24,31 +52,36 @@ class ZAPIClient:
     def _post_json(self, instance_id: str, token: str, endpoint: str, payload: dict):
         url = f"{self.base_url}/instances/{instance_id}/token/{token}{endpoint}"
 
-        logger.warning("====== ZAPI DEBUG OUT ======")
-        logger.warning(f"URL: {url}")
-        logger.warning(f"Headers: {{'Client-Token': '{self.client_token}'}}")
-        logger.warning(f"Payload: {payload}")
+        log_payload(logger, f"[ZAPI] → {endpoint}", payload)
 
         try:
-            r = self.session.post(
-                url,
-                json=payload,
-                headers={"Client-Token": self.client_token},
-                timeout=self.timeout,
-            )
-
-            logger.warning("====== ZAPI DEBUG IN ======")
-            logger.warning(f"Status: {r.status_code}")
-            logger.warning(f"Response text: {r.text}")
+            # 1 breaker por instância: uma instância fora não derruba as outras
+            with circuit_breakers.get(f"zapi:{instance_id}").call() as call:
+                fault_injector.before_sync("zapi", endpoint.lstrip("/"))
+                # endpoint só (a URL carrega o token da instância)
+                with span("zapi.post_json", endpoint=endpoint) as s:
+                    r = self.session.post(
+                        url,
+                        json=payload,
+                        headers={"Client-Token": self.client_token},
+                        timeout=self.timeout,
+                    )
+                    s.set("http.status_code", r.status_code)
+                call.status(r.status_code)
+
+            logger.info(f"[ZAPI] {endpoint} status={r.status_code}")
+            log_payload(logger, f"[ZAPI] ← {endpoint}", {"status": r.status_code, "body": r.text})
 
             if r.status_code >= 400:
-                raise ZAPIError(r.text)
+                raise ZAPIError(r.text, r.status_code)
 
-            return r.json()
+            return _json_or_text(r, endpoint)
 
+        except (CircuitOpenError, ZAPIError):
+            raise
         except Exception as e:
             logger.exception("❌ ERROR sending to Z-API")
-            raise ZAPIError(str(e)) from e
+            raise ZAPIError(str(e), getattr(e, "status_code", None), sent=not _not_sent(e)) from e
 
     # =========================================================================
     # 🟣 B) ENVIO VIA MULTIPART (bytes)
@@ -64,32 +97,36 @@ class ZAPIClient:
 
         url = f"{self.base_url}/instances/{instance_id}/token/{token}{endpoint}"
 
-        logger.warning("====== ZAPI MULTIPART OUT ======")
-        logger.warning(f"URL: {url}")
-        logger.warning(f"Data: {data}")
-        logger.warning(f"Files: {list(files.keys())}")
+        log_payload(logger, f"[ZAPI] → {endpoint} (multipart)", {"data": data, "files": list(files.keys())})
 
         try:
-            r = self.session.post(
-                url,
-                data=data,
-                files=files,
-                headers={"Client-Token": self.client_token},
-                timeout=self.timeout,
-            )
-
-            logger.warning("====== ZAPI MULTIPART IN ======")
-            logger.warning(f"Status: {r.status_code}")
-            logger.warning(f"Response: {r.text}")
+            with circuit_breakers.get(f"zapi:{instance_id}").call() as call:
+                fault_injector.before_sync("zapi", endpoint.lstrip("/"))
+                fault_injector.body_sync("zapi", endpoint.lstrip("/"), sum(len(f[1]) for f in files.values()))
+                with span("zapi.post_multipart", endpoint=endpoint) as s:
+                    r = self.session.post(
+                        url,
+                        data=data,
+                        files=files,
+                        headers={"Client-Token": self.client_token},
+                        timeout=self.timeout,
+                    )
+                    s.set("http.status_code", r.status_code)
+                call.status(r.status_code)
+
+            logger.info(f"[ZAPI] {endpoint} (multipart) status={r.status_code}")
+            log_payload(logger, f"[ZAPI] ← {endpoint} (multipart)", {"status": r.status_code, "body": r.text})
 
             if r.status_code >= 400:
-                raise ZAPIError(r.text)
+                raise ZAPIError(r.text, r.status_code)
 
-            return r.json()
+            return _json_or_text(r, endpoint)
 
+        except (CircuitOpenError, ZAPIError):
+            raise
         except Exception as e:
             logger.exception("❌ ERROR sending multipart to Z-API")
-            raise ZAPIError(str(e)) from e
+            raise ZAPIError(str(e), getattr(e, "status_code", None), sent=not _not_sent(e)) from e
 
     # =========================================================================
     # 📩 TEXTO
@@ -8,7 +8,9 @@ import requests
 from boto3.session import Session
 from botocore.client import Config
 
+from app.core.fault_injection import fault_injector
 from app.core.settings import settings
+from app.core.tracing import span, traced
 
 logger = logging.getLogger("file_proxy")
 
@@ -33,6 +35,7 @@ BUCKET = "omnichannel-media"
 # ==========================================================
 # 📤 Upload direto (bytes -> R2)
 # ==========================================================
+@traced("r2.upload")
 def upload_bytes_to_r2(content: bytes, mime: str) -> str:
     """
     Envia bytes diretamente para o R2 e retorna a URL pública.
@@ -42,6 +45,8 @@ def upload_bytes_to_r2(content: bytes, mime: str) -> str:
     filename = f"{uuid.uuid4()}{ext}"
 
     try:
+        fault_injector.before_sync("r2", "put_object")
+        fault_injector.body_sync("r2", "put_object", len(content))
         r2.put_object(
             Bucket=BUCKET,
             Key=filename,
@@ -62,6 +67,7 @@ def upload_bytes_to_r2(content: bytes, mime: str) -> str:
 # 📥 Download remoto + upload direto ao R2
 #    (Chatwoot → Middleware → WhatsApp)
 # ==========================================================
+@traced("r2.download_and_push")
 async def download_and_push_to_r2(url: str) -> tuple[str, str]:
     """
     Baixa a mídia remota (do Chatwoot), faz upload imediato ao R2
@@ -70,12 +76,17 @@ async def download_and_push_to_r2(url: str) -> tuple[str, str]:
     logger.info(f"[file_proxy] Baixando e enviando ao R2: {url}")
 
     try:
-        resp = requests.get(url, stream=True, timeout=25)
-        if resp.status_code != 200:
-            raise Exception(f"HTTP {resp.status_code}")
-
-        content = resp.content
-        mime = resp.headers.get("Content-Type", "application/octet-stream")
+        with span("r2.download") as s:
+            fault_injector.before_sync("r2", "download")
+            resp = requests.get(url, stream=True, timeout=25)
+            if resp.status_code != 200:
+                raise Exception(f"HTTP {resp.status_code}")
+
+            content = resp.content
+            fault_injector.body_sync("r2", "download", len(content))
+            mime = resp.headers.get("Content-Type", "application/octet-stream")
+            s.set("bytes", len(content))
+            s.set("mime", mime)
 
     except Exception as e:
         logger.error(f"❌ [file_proxy] Erro baixando mídia: {e}")
@@ -0,0 +1,35 @@
+# file: app/utils/helpers.py
+
+from collections import Counter
+from typing import Any
+
+
+# ============================================================
+# Escritas evitadas (write elision)
+# ============================================================
+#
+# Contadores por rótulo, ex.:
+#   "session.update"  → UPDATE/COMMIT não emitido (nada mudou)
+#   "session.refresh" → db.refresh não chamado (valores já conhecidos)
+#
+# *.refresh só conta no caminho assíncrono e onde havia commit + refresh:
+# a sessão síncrona expira no commit e recarrega no próximo acesso.
+
+elided_writes: Counter[str] = Counter()
+
+
+def count_elided(label: str, n: int = 1) -> None:
+    elided_writes[label] += n
+
+
+def assign_changed(obj: Any, values: dict[str, Any]) -> dict[str, Any]:
+    """
+    Atribui ao objeto ORM apenas os campos cujo valor mudou.
+    Retorna {campo: novo_valor} do que foi alterado (vazio = no-op).
+    """
+    changed = {}
+    for field, value in values.items():
+        if getattr(obj, field) != value:
+            setattr(obj, field, value)
+            changed[field] = value
+    return changed
@@ -0,0 +1,66 @@
+# file: app/utils/ids.py
+
+import os
+import threading
+import time
+import uuid
+
+
+# ============================================================
+# UUIDv7 (RFC 9562) — IDs ordenados por tempo
+# ============================================================
+#
+# 48 bits de timestamp (ms) | versão 7 | 12 bits de sequência |
+# variante | 62 bits aleatórios
+#
+# IDs gerados em sequência são crescentes (inclusive dentro do
+# mesmo ms, via sequência), então inserts caem sempre no fim do
+# índice B-tree em vez de espalhar páginas como o uuid4.
+
+_lock = threading.Lock()
+_last_ms = 0
+_seq = 0
+
+
+def uuid7() -> uuid.UUID:
+    global _last_ms, _seq
+
+    with _lock:
+        ms = time.time_ns() // 1_000_000
+        if ms > _last_ms:
+            _last_ms = ms
+            _seq = int.from_bytes(os.urandom(2), "big") & 0x7FF  # metade baixa: sobra espaço
+        else:
+            # mesmo ms (ou relógio voltou): mantém ordem pela sequência
+            _seq += 1
+            if _seq > 0xFFF:
+                _last_ms += 1
+                _seq = 0
+            ms = _last_ms
+        seq = _seq
+
+    rand_b = int.from_bytes(os.urandom(8), "big") & ((1 << 62) - 1)
+
+    value = (ms & ((1 << 48) - 1)) << 80
+    value |= 0x7 << 76
+    value |= seq << 64
+    value |= 0b10 << 62
+    value |= rand_b
+    return uuid.UUID(int=value)
+
+
+def new_id() -> str:
+    """
+    Novo ID de chave primária (UUIDv7 no formato texto padrão).
+    """
+    return str(uuid7())
+
+
+def uuid7_timestamp_ms(value: str | uuid.UUID) -> int | None:
+    """
+    Extrai o timestamp (ms) de um UUIDv7. IDs antigos (uuid4) → None.
+    """
+    parsed = value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+    if parsed.version != 7:
+        return None
+    return parsed.int >> 80
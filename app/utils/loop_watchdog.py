@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+from collections import deque
+
+from app.core.metrics import LOOP_BLOCKS, LOOP_LAG
+from app.core.settings import settings
+from app.utils.profiler import profiler
+from app.utils.stack_sampler import blocking_site, frame_stack
+
+logger = logging.getLogger("loop_watchdog")
+
+
+# ============================================================
+# 🐢 Watchdog do event loop
+# ============================================================
+#
+# - Heartbeat (task no loop): dorme `interval` e mede o atraso ao
+#   acordar → histograma de lag (Prometheus + profiler "event_loop.lag")
+# - Watchdog (thread): se o heartbeat atrasou mais que `threshold`,
+#   o loop está preso num callback; copia a pilha da thread do loop
+#   (sys._current_frames) e registra o call site (1x por travamento)
+#
+# Pega chamadas síncronas em handlers async (requests, boto3,
+# SQLAlchemy sync, DuckDB) antes de chegarem em produção.
+
+MAX_STALLS_KEPT = 100
+
+
+class LoopWatchdog:
+    def __init__(self, interval: float = 0.05, threshold: float = 0.1) -> None:
+        self.interval = interval
+        self.threshold = threshold
+        self.stalls: deque[dict] = deque(maxlen=MAX_STALLS_KEPT)
+
+        self._loop_thread_id: int | None = None
+        self._task: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+        # escritos pelo heartbeat, lidos pela thread (floats: atômicos no GIL)
+        self._next_due = 0.0
+        self._last_lag = 0.0
+
+        self._current_stall: dict | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """
+        Chamar de dentro do event loop (startup).
+        """
+        if self.running:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._next_due = time.monotonic() + self.interval
+        self._stop.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        logger.info(f"🐢 Watchdog do event loop ativo (limite {self.threshold * 1000:.0f} ms)")
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _heartbeat(self) -> None:
+        while True:
+            self._next_due = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(time.monotonic() - self._next_due, 0.0)
+            self._last_lag = lag
+            LOOP_LAG.observe(lag)
+            profiler.record("event_loop.lag", lag)
+
+    def _watch(self) -> None:
+        check_every = self.threshold / 2
+
+        while not self._stop.wait(check_every):
+            due = self._next_due
+            late = time.monotonic() - due
+
+            stall = self._current_stall
+            if stall is not None and stall["_due"] != due:
+                # loop voltou: duração real vem do heartbeat
+                stall["duration_ms"] = round(self._last_lag * 1000, 1)
+                self._current_stall = None
+                logger.warning(
+                    f"🐢 Event loop travado {stall['duration_ms']} ms em {stall['site']}"
+                )
+
+            if late < self.threshold or self._current_stall is not None:
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = frame_stack(frame)
+            if not stack:
+                continue
+
+            site = blocking_site(stack)
+            stall = {
+                "at": time.time() - late,
+                "site": site,
+                "stack": ";".join(f"{m}:{f}" for m, f in stack),
+                "duration_ms": None,  # preenchido quando o loop voltar
+                "_due": due,
+            }
+            self._current_stall = stall
+            self.stalls.append(stall)
+            LOOP_BLOCKS.labels(site).inc()
+
+    def report(self, limit: int = 20) -> dict:
+        stalls = [
+            {k: v for k, v in s.items() if not k.startswith("_")}
+            for s in list(self.stalls)[-limit:]
+        ]
+        stalls.reverse()
+        return {
+            "running": self.running,
+            "threshold_ms": self.threshold * 1000,
+            "lag": profiler.report(prefix="event_loop.lag")["labels"].get("event_loop.lag", {}),
+            "stalls": stalls,
+        }
+
+
+loop_watchdog = LoopWatchdog(threshold=settings.LOOP_BLOCK_THRESHOLD_MS / 1000)
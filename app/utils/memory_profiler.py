@@ -0,0 +1,221 @@
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+from contextlib import contextmanager
+
+logger = logging.getLogger("memory_profiler")
+
+
+# ============================================================
+# 🧠 Diagnóstico de memória (tracemalloc + RSS)
+# ============================================================
+#
+# - tracemalloc liga/desliga sob demanda (custa CPU e RAM enquanto ligado)
+# - snapshots nomeados (últimos MAX_SNAPSHOTS) e diff entre eles
+# - "buffers grandes": blocos vivos ≥ LARGE_BUFFER_BYTES com a pilha
+#   de quem alocou (resp.content, BytesIO, FormData, ...)
+# - MediaMemoryProbe / media_memory(): 1 linha de log por mensagem de
+#   mídia com RSS atual, variação e pico do processo
+
+DEFAULT_TRACE_FRAMES = 10
+MAX_SNAPSHOTS = 5
+LARGE_BUFFER_BYTES = 1024 * 1024
+KEY_TYPES = ("lineno", "filename", "traceback")
+
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+# ru_maxrss: KiB no Linux, bytes no macOS
+_MAXRSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+
+def current_rss() -> int | None:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_rss() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _MAXRSS_UNIT
+
+
+def _mb(value: int | None) -> float | None:
+    return None if value is None else round(value / (1024 * 1024), 1)
+
+
+def _format_traceback(traceback: tracemalloc.Traceback) -> list[str]:
+    # mais recente primeiro (quem chamou a alocação fica no topo)
+    return [f"{frame.filename}:{frame.lineno}" for frame in reversed(traceback)]
+
+
+class MemoryProfiler:
+    def __init__(self) -> None:
+        self._snapshots: OrderedDict[str, tuple[float, tracemalloc.Snapshot]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._seq = 0
+
+    # --------------------------------------------------------
+    # tracemalloc
+    # --------------------------------------------------------
+    def start(self, frames: int = DEFAULT_TRACE_FRAMES) -> dict:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        tracemalloc.start(frames)
+        logger.info(f"🧠 tracemalloc ligado ({frames} frames)")
+        return self.status()
+
+    def stop(self) -> dict:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+            logger.info("🧠 tracemalloc desligado")
+        with self._lock:
+            self._snapshots.clear()
+        return self.status()
+
+    def status(self) -> dict:
+        tracing = tracemalloc.is_tracing()
+        traced, traced_peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        return {
+            "tracing": tracing,
+            "frames": tracemalloc.get_traceback_limit() if tracing else None,
+            "traced_mb": _mb(traced),
+            "traced_peak_mb": _mb(traced_peak),
+            "rss_mb": _mb(current_rss()),
+            "peak_rss_mb": _mb(peak_rss()),
+            "snapshots": list(self._snapshots),
+        }
+
+    # --------------------------------------------------------
+    # Snapshots
+    # --------------------------------------------------------
+    def _take(self) -> tracemalloc.Snapshot:
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc_not_running")
+        return tracemalloc.take_snapshot().filter_traces(_IGNORED)
+
+    def snapshot(self, limit: int = 20, key_type: str = "lineno") -> dict:
+        snap = self._take()
+
+        with self._lock:
+            self._seq += 1
+            snapshot_id = f"s{self._seq}"
+            self._snapshots[snapshot_id] = (time.time(), snap)
+            while len(self._snapshots) > MAX_SNAPSHOTS:
+                self._snapshots.popitem(last=False)
+
+        return {"id": snapshot_id, **self._summary(snap, limit, key_type)}
+
+    def _get(self, snapshot_id: str) -> tracemalloc.Snapshot:
+        try:
+            return self._snapshots[snapshot_id][1]
+        except KeyError:
+            raise KeyError("snapshot_not_found")
+
+    def _summary(self, snap: tracemalloc.Snapshot, limit: int, key_type: str) -> dict:
+        stats = snap.statistics(key_type)
+        return {
+            "total_mb": _mb(sum(s.size for s in stats)),
+            "top": [
+                {
+                    "site": _format_traceback(s.traceback),
+                    "size_kb": round(s.size / 1024, 1),
+                    "count": s.count,
+                }
+                for s in stats[:limit]
+            ],
+            "large_buffers": self._large_buffers(snap, limit),
+        }
+
+    @staticmethod
+    def _large_buffers(snap: tracemalloc.Snapshot, limit: int) -> list[dict]:
+        large = [t for t in snap.traces if t.size >= LARGE_BUFFER_BYTES]
+        large.sort(key=lambda t: t.size, reverse=True)
+        return [
+            {"size_mb": _mb(t.size), "traceback": _format_traceback(t.traceback)}
+            for t in large[:limit]
+        ]
+
+    def diff(
+        self,
+        from_id: str,
+        to_id: str | None = None,
+        limit: int = 20,
+        key_type: str = "lineno",
+    ) -> dict:
+        """
+        to_id=None → compara com um snapshot novo (não guardado).
+        """
+        before = self._get(from_id)
+        after = self._get(to_id) if to_id else self._take()
+
+        stats = after.compare_to(before, key_type)
+        return {
+            "from": from_id,
+            "to": to_id or "now",
+            "delta_mb": _mb(sum(s.size_diff for s in stats)),
+            "top": [
+                {
+                    "site": _format_traceback(s.traceback),
+                    "size_diff_kb": round(s.size_diff / 1024, 1),
+                    "size_kb": round(s.size / 1024, 1),
+                    "count_diff": s.count_diff,
+                }
+                for s in stats[:limit]
+            ],
+            "large_buffers": self._large_buffers(after, limit),
+        }
+
+
+memory_profiler = MemoryProfiler()
+
+
+# ============================================================
+# RSS por mensagem de mídia
+# ============================================================
+
+class MediaMemoryProbe:
+    """
+    probe = MediaMemoryProbe("zapi", "video") ... probe.log()
+    Com mensagens simultâneas o pico é do processo, não só desta.
+    """
+
+    __slots__ = ("pipeline", "msg_type", "rss_before", "peak_before", "start")
+
+    def __init__(self, pipeline: str, msg_type: str | None) -> None:
+        self.pipeline = pipeline
+        self.msg_type = msg_type or "?"
+        self.rss_before = current_rss()
+        self.peak_before = peak_rss()
+        self.start = time.perf_counter()
+
+    def log(self) -> None:
+        rss_after = current_rss()
+        peak_after = peak_rss()
+        delta = None if self.rss_before is None or rss_after is None else rss_after - self.rss_before
+        logger.info(
+            f"🧠 [{self.pipeline}] mídia {self.msg_type}: "
+            f"rss={_mb(rss_after)} MB delta={_mb(delta)} MB "
+            f"peak_rss={_mb(peak_after)} MB (+{_mb(peak_after - self.peak_before)} MB) "
+            f"em {(time.perf_counter() - self.start) * 1000:.0f} ms"
+        )
+
+
+@contextmanager
+def media_memory(pipeline: str, msg_type: str | None):
+    probe = MediaMemoryProbe(pipeline, msg_type)
+    try:
+        yield probe
+    finally:
+        probe.log()
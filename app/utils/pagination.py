@@ -0,0 +1,182 @@
+# file: app/utils/pagination.py
+
+import base64
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Iterable
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import String, Table, literal, select, tuple_, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.settings import settings
+from app.db.session import is_sqlite
+
+# ============================================================
+# Paginação keyset por (created_at, id)
+# ============================================================
+#
+# Ordem fixa: created_at DESC, id DESC. O cursor guarda o par da
+# última linha da página; a próxima página é
+#   WHERE (created_at, id) < (:cursor_at, :cursor_id)
+# que usa o índice (…, created_at, id) em vez de varrer OFFSET linhas.
+#
+# No SQLite created_at é texto e convivem dois formatos (func.now()
+# sem microssegundos, Python com). Por isso o cursor leva o valor cru
+# da coluna e a comparação é feita como texto.
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+EXPORT_CHUNK_SIZE = 1000
+
+_RAW_TIMESTAMPS = is_sqlite(settings.DATABASE_URL)
+_CURSOR_AT = "_cursor_at"
+
+
+def _json_default(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_cursor(created_at: Any, key: Any) -> str:
+    raw = created_at.isoformat(sep=" ") if isinstance(created_at, datetime) else str(created_at)
+    payload = json.dumps([raw, str(key)]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, key = json.loads(base64.urlsafe_b64decode(padded))
+        if not _RAW_TIMESTAMPS:
+            datetime.fromisoformat(created_at)
+        return str(created_at), str(key)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail="invalid_cursor") from e
+
+
+@dataclass(frozen=True, slots=True)
+class Keyset:
+    """
+    Ordenação keyset de uma tabela: created_at + chave primária.
+    columns = colunas expostas pela API (vazio = todas da tabela).
+    """
+
+    table: Table
+    key: str
+    columns: tuple[str, ...] = ()
+
+    @property
+    def field_names(self) -> list[str]:
+        if self.columns:
+            return list(self.columns)
+        return [c.name for c in self.table.columns]
+
+    def parse_fields(self, fields: str | None) -> list[str]:
+        """
+        "a,b,c" → colunas projetadas (None = todas).
+        """
+        if not fields:
+            return self.field_names
+
+        requested = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+        unknown = set(requested) - set(self.field_names)
+        if unknown or not requested:
+            raise HTTPException(status_code=400, detail=f"invalid_fields: {', '.join(sorted(unknown))}")
+        return requested
+
+    def select(self, fields: list[str], where: Iterable = (), cursor: str | None = None, limit: int | None = None):
+        created = self.table.c.created_at
+        key = self.table.c[self.key]
+
+        stmt = select(
+            *(self.table.c[f] for f in fields),
+            type_coerce(created, String).label(_CURSOR_AT),
+            key.label(f"_cursor_{self.key}"),
+        ).where(*where)
+
+        if cursor:
+            cursor_at, cursor_key = decode_cursor(cursor)
+            if _RAW_TIMESTAMPS:
+                left = tuple_(type_coerce(created, String), key)
+                right = tuple_(literal(cursor_at, String), literal(cursor_key, key.type))
+            else:
+                left = tuple_(created, key)
+                right = tuple_(literal(datetime.fromisoformat(cursor_at), created.type), literal(cursor_key, key.type))
+            stmt = stmt.where(left < right)
+
+        stmt = stmt.order_by(created.desc(), key.desc())
+        if limit:
+            stmt = stmt.limit(limit)
+        return stmt
+
+    def cursor_for(self, row) -> str:
+        return encode_cursor(row[_CURSOR_AT], row[f"_cursor_{self.key}"])
+
+    @staticmethod
+    def project(row, fields: list[str]) -> dict:
+        return {f: row[f] for f in fields}
+
+
+async def fetch_page(
+    db: AsyncSession,
+    keyset: Keyset,
+    fields: list[str],
+    where: Iterable = (),
+    cursor: str | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> dict:
+    """
+    Uma página: {"items": [...], "next_cursor": str | None}.
+    """
+    result = await db.execute(keyset.select(fields, where, cursor, limit + 1))
+    rows = result.mappings().all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    return {
+        "items": [keyset.project(row, fields) for row in rows],
+        "next_cursor": keyset.cursor_for(rows[-1]) if has_more else None,
+    }
+
+
+async def iter_chunks(
+    session_factory: async_sessionmaker,
+    keyset: Keyset,
+    fields: list[str],
+    where: Iterable = (),
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> AsyncIterator[list[dict]]:
+    """
+    Percorre o resultado inteiro em páginas keyset, cada uma numa
+    sessão curta (não segura transação/snapshot durante o streaming).
+    """
+    where = list(where)
+    cursor = None
+
+    while True:
+        async with session_factory() as db:
+            rows = (await db.execute(keyset.select(fields, where, cursor, chunk_size))).mappings().all()
+
+        if rows:
+            yield [keyset.project(row, fields) for row in rows]
+        if len(rows) < chunk_size:
+            return
+        cursor = keyset.cursor_for(rows[-1])
+
+
+def ndjson_response(chunks: AsyncIterator[list[dict]], filename: str | None = None) -> StreamingResponse:
+    """
+    StreamingResponse NDJSON (uma linha JSON por registro).
+    """
+
+    async def body():
+        async for chunk in chunks:
+            yield "".join(json.dumps(row, default=_json_default, ensure_ascii=False) + "\n" for row in chunk)
+
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'} if filename else None
+    return StreamingResponse(body(), media_type="application/x-ndjson", headers=headers)
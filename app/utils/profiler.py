@@ -1,12 +1,224 @@
-import time
+import functools
+import inspect
 import logging
+import time
+from collections import deque
+from contextlib import contextmanager
 
 logger = logging.getLogger("profiler")
 
+
+# ============================================================
+# ⏱️ Profiler em memória (histogramas estilo HDR)
+# ============================================================
+#
+# Cada label tem:
+# - um histograma desde o startup
+# - fatias de PROFILE_SLOT_SECONDS para janelas deslizantes
+#
+# Gravar uma amostra é O(1) (índice por bit_length + 1 incremento),
+# sem lock e sem log: pode ficar ligado em todo request. Em gravações
+# concorrentes de threads uma amostra pode se perder — aceitável
+# para percentis.
+
+SUB_BUCKET_BITS = 5              # 32 sub-buckets por potência de 2 → erro relativo ≤ ~3%
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+MAX_EXPONENT = 40                # ~12 dias em µs
+HISTOGRAM_SIZE = (MAX_EXPONENT + 2) * SUB_BUCKETS
+
+PROFILE_SLOT_SECONDS = 10
+PROFILE_MAX_WINDOW_SECONDS = 15 * 60
+
+PERCENTILES = (50, 95, 99)
+
+
+def _bucket_index(value: int) -> int:
+    if value < 2 * SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - (SUB_BUCKET_BITS + 1)
+    return min((shift + 1) * SUB_BUCKETS + (value >> shift) - SUB_BUCKETS, HISTOGRAM_SIZE - 1)
+
+
+def _bucket_upper(index: int) -> int:
+    if index < 2 * SUB_BUCKETS:
+        return index
+    shift = index // SUB_BUCKETS - 1
+    top = index % SUB_BUCKETS + SUB_BUCKETS
+    return ((top + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """
+    Contagens em buckets log-lineares de microssegundos.
+    """
+
+    __slots__ = ("counts", "count", "total_us", "max_us")
+
+    def __init__(self) -> None:
+        self.counts = [0] * HISTOGRAM_SIZE
+        self.count = 0
+        self.total_us = 0
+        self.max_us = 0
+
+    def record(self, us: int) -> None:
+        self.counts[_bucket_index(us)] += 1
+        self.count += 1
+        self.total_us += us
+        if us > self.max_us:
+            self.max_us = us
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        counts = self.counts
+        for i, n in enumerate(other.counts):
+            if n:
+                counts[i] += n
+        self.count += other.count
+        self.total_us += other.total_us
+        self.max_us = max(self.max_us, other.max_us)
+
+    def percentile(self, pct: float) -> int:
+        if not self.count:
+            return 0
+        target = max(1, round(self.count * pct / 100))
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return min(_bucket_upper(i), self.max_us)
+        return self.max_us
+
+    def summary(self) -> dict:
+        result = {"count": self.count}
+        if self.count:
+            result["mean_ms"] = round(self.total_us / self.count / 1000, 3)
+            for pct in PERCENTILES:
+                result[f"p{pct}_ms"] = round(self.percentile(pct) / 1000, 3)
+            result["max_ms"] = round(self.max_us / 1000, 3)
+        return result
+
+
+class _LabelStats:
+    __slots__ = ("total", "slots")
+
+    def __init__(self) -> None:
+        self.total = LatencyHistogram()
+        # (início da fatia, histograma da fatia)
+        self.slots: deque[tuple[int, LatencyHistogram]] = deque()
+
+    def record(self, us: int, now: float) -> None:
+        self.total.record(us)
+
+        slot = int(now // PROFILE_SLOT_SECONDS) * PROFILE_SLOT_SECONDS
+        slots = self.slots
+        if not slots or slots[-1][0] != slot:
+            slots.append((slot, LatencyHistogram()))
+            oldest = slot - PROFILE_MAX_WINDOW_SECONDS
+            while slots[0][0] < oldest:
+                slots.popleft()
+        slots[-1][1].record(us)
+
+    def window(self, seconds: float, now: float) -> LatencyHistogram:
+        merged = LatencyHistogram()
+        since = now - seconds
+        for start, hist in list(self.slots):
+            # fatia conta se terminou dentro da janela
+            if start + PROFILE_SLOT_SECONDS > since:
+                merged.merge(hist)
+        return merged
+
+
+class Profiler:
+    def __init__(self) -> None:
+        self._labels: dict[str, _LabelStats] = {}
+        self.started_at = time.time()
+
+    def record(self, label: str, seconds: float) -> None:
+        stats = self._labels.get(label)
+        if stats is None:
+            stats = self._labels.setdefault(label, _LabelStats())
+        stats.record(int(seconds * 1_000_000), time.time())
+
+    @contextmanager
+    def timer(self, label: str):
+        """
+        with profiler.timer("chatwoot.send"): ...
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(label, time.perf_counter() - start)
+
+    def timed(self, label: str | None = None):
+        """
+        Decorator (sync ou async). Label padrão: modulo.funcao.
+        """
+        def decorator(fn):
+            name = label or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__qualname__}"
+
+            if inspect.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    start = time.perf_counter()
+                    try:
+                        return await fn(*args, **kwargs)
+                    finally:
+                        self.record(name, time.perf_counter() - start)
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.record(name, time.perf_counter() - start)
+            return wrapper
+
+        return decorator
+
+    def report(self, window_seconds: float | None = None, prefix: str | None = None) -> dict:
+        """
+        {label: {count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}}
+        window_seconds=None → desde o startup.
+        """
+        now = time.time()
+        labels = {}
+        for label, stats in sorted(list(self._labels.items())):
+            if prefix and not label.startswith(prefix):
+                continue
+            hist = stats.total if window_seconds is None else stats.window(window_seconds, now)
+            if hist.count:
+                labels[label] = hist.summary()
+
+        return {
+            "since": self.started_at if window_seconds is None else now - window_seconds,
+            "window_seconds": window_seconds,
+            "labels": labels,
+        }
+
+    def reset(self) -> None:
+        self._labels.clear()
+        self.started_at = time.time()
+
+
+profiler = Profiler()
+timed = profiler.timed
+timer = profiler.timer
+
+
+# ============================================================
+# Compatibilidade (antigo profiler por log)
+# ============================================================
+
 def now():
-    return time.time()
+    return time.perf_counter()
+
 
 def step(start_ts: float, label: str) -> float:
-    elapsed = (time.time() - start_ts) * 1000
-    logger.info(f"[IMAGE PROFILER] {label}: {elapsed:.2f} ms")
-    return time.time()
+    """
+    Grava o tempo desde start_ts no label e devolve o novo início.
+    """
+    end = time.perf_counter()
+    profiler.record(label, end - start_ts)
+    return end
@@ -0,0 +1,184 @@
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+
+# ============================================================
+# 🔥 Sampler de pilhas (sys._current_frames)
+# ============================================================
+#
+# Uma thread acorda a cada 1/hz s e copia a pilha de todas as outras
+# threads (event loop + threadpool). Saída no formato "collapsed"
+# (stack;stack;leaf count) pronta para flamegraph.pl / speedscope.
+#
+# Na thread do event loop, toda amostra fora do select() significa
+# loop ocupado: essas amostras são atribuídas ao call site do app
+# (frame mais interno em app.*) + a primeira chamada de biblioteca
+# feita a partir dele — ex.:
+#   app.services.zapi_service:ZAPIClient._post_json → requests.sessions:Session.post
+
+DEFAULT_HZ = 100
+MAX_HZ = 1000
+MAX_SAMPLE_SECONDS = 60
+MAX_STACK_DEPTH = 128
+
+APP_PREFIX = "app."
+
+# folhas que indicam thread parada esperando (não consome CPU nem trava o loop)
+IDLE_LEAVES = {
+    ("selectors", "select"),
+    ("selectors", "EpollSelector.select"),
+    ("selectors", "KqueueSelector.select"),
+    ("selectors", "PollSelector.select"),
+    ("selectors", "SelectSelector.select"),
+    ("threading", "Condition.wait"),
+    ("threading", "Event.wait"),
+    ("threading", "Thread.join"),
+    ("threading", "Thread._wait_for_tstate_lock"),
+    ("queue", "Queue.get"),
+    ("concurrent.futures.thread", "_worker"),
+    ("aiosqlite.core", "_connection_worker_thread"),
+    # uvloop: o loop em C não aparece na pilha Python
+    ("asyncio.base_events", "BaseEventLoop.run_forever"),
+    ("asyncio.runners", "Runner.run"),
+    ("asyncio.runners", "run"),
+    ("uvloop", "run"),
+}
+
+
+def _frame_name(frame: FrameType) -> tuple[str, str]:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    func = code.co_qualname
+
+    # boto3: todas as operações passam por _make_api_call → mostra qual
+    if func == "BaseClient._make_api_call":
+        operation = frame.f_locals.get("operation_name")
+        if operation:
+            func = f"{func}[{operation}]"
+
+    return module, func
+
+
+def frame_stack(frame: FrameType | None) -> list[tuple[str, str]]:
+    """
+    Pilha da raiz para a folha.
+    """
+    stack = []
+    while frame is not None and len(stack) < MAX_STACK_DEPTH:
+        stack.append(_frame_name(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def blocking_site(stack: list[tuple[str, str]]) -> str:
+    app_index = None
+    for i, (module, _) in enumerate(stack):
+        if module.startswith(APP_PREFIX):
+            app_index = i
+
+    if app_index is None:
+        module, func = stack[-1]
+        return f"{module}:{func}"
+
+    module, func = stack[app_index]
+    site = f"{module}:{func}"
+    if app_index + 1 < len(stack):
+        callee_module, callee_func = stack[app_index + 1]
+        site += f" → {callee_module}:{callee_func}"
+    return site
+
+
+class StackSampler:
+    """
+    Uma amostragem por vez (sample() é bloqueante: rode em thread).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+
+    @property
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+    def sample(
+        self,
+        seconds: float,
+        hz: int = DEFAULT_HZ,
+        loop_thread_id: int | None = None,
+        include_idle: bool = False,
+    ) -> dict:
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("sampler_busy")
+
+        try:
+            return self._sample(seconds, hz, loop_thread_id, include_idle)
+        finally:
+            self._lock.release()
+
+    def _sample(self, seconds: float, hz: int, loop_thread_id: int | None, include_idle: bool) -> dict:
+        interval = 1.0 / hz
+        me = threading.get_ident()
+
+        collapsed: Counter[str] = Counter()
+        blocked: Counter[str] = Counter()
+        samples = 0
+        loop_samples = 0
+
+        started = time.perf_counter()
+        deadline = started + seconds
+        next_tick = started
+
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            if now < next_tick:
+                time.sleep(next_tick - now)
+            next_tick += interval
+
+            names = {t.ident: t.name for t in threading.enumerate()}
+            frames = sys._current_frames()
+            samples += 1
+
+            for thread_id, frame in frames.items():
+                if thread_id == me:
+                    continue
+
+                stack = frame_stack(frame)
+                if not stack:
+                    continue
+
+                idle = stack[-1] in IDLE_LEAVES
+                is_loop = thread_id == loop_thread_id
+
+                if is_loop:
+                    loop_samples += 1
+                    if not idle:
+                        blocked[blocking_site(stack)] += 1
+
+                if idle and not include_idle:
+                    continue
+
+                thread_name = "event-loop" if is_loop else names.get(thread_id, str(thread_id))
+                collapsed[";".join([thread_name] + [f"{m}:{f}" for m, f in stack])] += 1
+
+        elapsed = time.perf_counter() - started
+        ms_per_sample = elapsed * 1000 / samples if samples else 0
+
+        return {
+            "seconds": round(elapsed, 3),
+            "hz": hz,
+            "samples": samples,
+            "loop_busy_pct": round(100 * sum(blocked.values()) / loop_samples, 1) if loop_samples else None,
+            "loop_blocked_sites": [
+                {"site": site, "samples": n, "approx_ms": round(n * ms_per_sample, 1)}
+                for site, n in blocked.most_common()
+            ],
+            "collapsed": "\n".join(f"{stack} {n}" for stack, n in collapsed.most_common()),
+        }
+
+
+stack_sampler = StackSampler()
@@ -0,0 +1,153 @@
+import json
+import logging
+import os
+import queue
+import threading
+from pathlib import Path
+from typing import Any
+
+from app.core.logging_setup import Redactor, known_secrets
+from app.core.settings import settings
+
+logger = logging.getLogger("traffic_capture")
+
+
+# ============================================================
+# 📼 Captura de tráfego dos webhooks (NDJSON rotativo)
+# ============================================================
+#
+# 1 linha por webhook recebido:
+#   {"ts", "route", "status_code", "outcome", "reason", "payload"}
+# - payload como chegou, só com tokens/segredos removidos (telefones
+#   ficam: o replay precisa deles para reproduzir o roteamento)
+# - escrita e redação numa thread própria; fila cheia → descarta
+#   e conta (a captura nunca segura o webhook)
+# - rotação por tamanho: webhooks.ndjson → .1 → .2 ... (backup_count)
+#
+# Replay: python -m benchmarks.replay data/capture/webhooks.ndjson*
+
+CAPTURE_QUEUE_MAX = 10_000
+
+
+class TrafficCapture:
+    def __init__(self) -> None:
+        self.path = Path(settings.CAPTURE_PATH)
+        self.max_bytes = settings.CAPTURE_MAX_BYTES
+        self.backup_count = settings.CAPTURE_BACKUP_COUNT
+        self.enabled = False
+        self.captured = 0
+        self.dropped = 0
+
+        self._redactor = Redactor(known_secrets(), phones=False)
+        self._queue: queue.Queue[dict | None] = queue.Queue(maxsize=CAPTURE_QUEUE_MAX)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    # --------------------------------------------------------
+    # Controle
+    # --------------------------------------------------------
+    def start(self, path: str | None = None) -> dict:
+        if path and Path(path) != self.path:
+            # troca de arquivo: fecha o atual antes
+            self.stop()
+        with self._lock:
+            if path:
+                self.path = Path(path)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="traffic-capture", daemon=True)
+                self._thread.start()
+            self.enabled = True
+        logger.info(f"📼 Captura de webhooks ligada → {self.path}")
+        return self.status()
+
+    def stop(self) -> dict:
+        """
+        Para de capturar e espera a fila ser gravada.
+        """
+        with self._lock:
+            self.enabled = False
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout=10)
+            logger.info(f"📼 Captura de webhooks desligada ({self.captured} gravados)")
+        return self.status()
+
+    def status(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "path": str(self.path),
+            "max_bytes": self.max_bytes,
+            "backup_count": self.backup_count,
+            "captured": self.captured,
+            "dropped": self.dropped,
+            "pending": self._queue.qsize(),
+        }
+
+    # --------------------------------------------------------
+    # Gravação
+    # --------------------------------------------------------
+    def record(
+        self,
+        route: str,
+        payload: Any,
+        received_at: float,
+        outcome: str,
+        reason: str = "",
+        status_code: int = 200,
+    ) -> None:
+        if not self.enabled:
+            return
+        try:
+            self._queue.put_nowait({
+                "ts": round(received_at, 6),
+                "route": route,
+                "status_code": status_code,
+                "outcome": outcome,
+                "reason": reason,
+                "payload": payload,
+            })
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        f = open(self.path, "ab")
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    return
+
+                item["payload"] = self._redactor.value(item["payload"])
+                line = (json.dumps(item, default=str, ensure_ascii=False) + "\n").encode()
+
+                if self.max_bytes and f.tell() + len(line) > self.max_bytes and f.tell() > 0:
+                    f.close()
+                    self._rotate()
+                    f = open(self.path, "ab")
+
+                f.write(line)
+                self.captured += 1
+                if self._queue.empty():
+                    f.flush()
+        except Exception as e:
+            logger.error(f"❌ [capture] erro gravando captura: {e}")
+            self.enabled = False
+            self._thread = None
+        finally:
+            f.close()
+
+    def _rotate(self) -> None:
+        for i in range(self.backup_count - 1, 0, -1):
+            src = self.path.with_name(f"{self.path.name}.{i}")
+            if src.exists():
+                os.replace(src, self.path.with_name(f"{self.path.name}.{i + 1}"))
+        if self.backup_count > 0:
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink(missing_ok=True)
+
+
+traffic_capture = TrafficCapture()
+
@@ -0,0 +1,466 @@
+# file: benchmarks/load.py
+
+"""
+Teste de carga ponta a ponta: sobe o app (uvicorn, processo separado)
+contra upstreams locais e mede o caminho completo dos webhooks.
+
+- Chatwoot, Z-API, R2 (S3) e mídia: benchmarks.standins.FakeUpstreams
+- Redis: FakeRedis em memória (padrão) ou um Redis real (--redis host:port)
+- Banco: SQLite temporário (create_all + vendors de teste)
+
+Carga em malha aberta: as requisições saem no horário programado
+(--rate por segundo) mesmo que o app atrase; a latência é medida a
+partir do horário programado (sem coordinated omission).
+
+Mix de webhooks (--mix, pesos):
+- text          : Z-API → Chatwoot, texto de contato individual
+- media         : Z-API → R2 → Chatwoot, imagem/vídeo/áudio/documento
+- group         : Z-API → Chatwoot, texto de grupo
+- redelivery    : reenvio de um payload Z-API já enviado (mesmo messageId)
+- outgoing      : Chatwoot → Z-API, texto (processado em background)
+- outgoing_media: Chatwoot → R2 → Z-API, imagem (background)
+
+Saída: JSON (stdout) com throughput, p50/p99 por tipo, erros, chamadas
+aos upstreams por rota, pico de RSS do app e o /debug/profile do app.
+--output acrescenta o resultado como 1 linha em um .jsonl (por commit).
+
+Uso:
+    python -m benchmarks.load --rate 50 --duration 30
+    python -m benchmarks.load --rate 200 --duration 60 --mix text=70,media=10,group=10,redelivery=5,outgoing=5 \\
+        --output data/load.jsonl
+
+Upstream degradado (app.core.fault_injection, variáveis herdadas pelo app):
+    FAULT_INJECTION_ENABLED=true FAULT_INJECTION='[{"target": "chatwoot", "latency": "fixed:5000"}]' \
+        python -m benchmarks.load --rate 20 --duration 60
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+import aiohttp
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.db import models_registry  # noqa: F401 — registra os models
+from app.db.fulltext import create_fulltext
+from app.models.vendors import Vendor
+from app.schemas.vendors import VendorCreate
+
+from benchmarks.standins import FakeRedis, FakeUpstreams
+
+ROOT = Path(__file__).resolve().parent.parent
+ADMIN_TOKEN = "load-test"
+
+DEFAULT_MIX = "text=55,media=10,group=15,redelivery=5,outgoing=10,outgoing_media=5"
+MEDIA_KINDS = (("image", "imageUrl", "jpg"), ("video", "videoUrl", "mp4"), ("audio", "audioUrl", "ogg"), ("document", "documentUrl", "pdf"))
+
+
+# ============================================================
+# Banco + vendors de teste
+# ============================================================
+
+def _prepare_db(path: Path, vendors: int) -> tuple[str, list[VendorCreate]]:
+    url = f"sqlite:///{path.as_posix()}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    # create_all não cria o FTS5 (triggers no INSERT, como em produção)
+    with engine.begin() as conn:
+        create_fulltext(conn)
+
+    created = []
+    with Session(engine) as db:
+        for i in range(vendors):
+            data = VendorCreate(
+                name=f"Vendedor {i}",
+                phone=f"5547990{i:06d}",
+                agent_id=900000 + i,
+                inbox_identifier=f"inbox-{i}",
+                instance_id=f"INSTANCE{i:04d}",
+                instance_token=f"TOKEN{i:04d}",
+            )
+            # direto no model: create_vendor publicaria a invalidação no Redis
+            db.add(Vendor(**data.model_dump()))
+            created.append(data)
+        db.commit()
+
+    engine.dispose()
+    return url, created
+
+
+# ============================================================
+# App (uvicorn em processo separado)
+# ============================================================
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_app(port: int, env: dict, log_path: Path) -> subprocess.Popen:
+    cmd = [
+        sys.executable, "-m", "uvicorn", "app.main:app",
+        "--host", "127.0.0.1", "--port", str(port),
+        "--no-access-log", "--log-level", "warning",
+    ]
+    log = open(log_path, "wb")
+    return subprocess.Popen(cmd, cwd=ROOT, env={**os.environ, **env}, stdout=log, stderr=subprocess.STDOUT)
+
+
+async def _wait_ready(session: aiohttp.ClientSession, base: str, proc: subprocess.Popen, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"app saiu com código {proc.returncode}")
+        try:
+            async with session.get(f"{base}/health") as resp:
+                if resp.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("app não respondeu /health")
+
+
+def _peak_rss_mb(pid: int) -> float | None:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ============================================================
+# Payloads
+# ============================================================
+
+class PayloadFactory:
+    def __init__(self, vendors: list[VendorCreate], upstreams: FakeUpstreams, contacts: int, seed: int) -> None:
+        self.vendors = vendors
+        self.upstreams = upstreams
+        self.contacts = contacts
+        self.random = random.Random(seed)
+        self.sent: list[dict] = []
+
+    def _contact(self) -> tuple[VendorCreate, str]:
+        n = self.random.randrange(self.contacts)
+        return self.vendors[n % len(self.vendors)], f"55119{n:08d}"
+
+    def _zapi_base(self, vendor: VendorCreate, phone: str) -> dict:
+        return {
+            "type": "ReceivedCallback",
+            "instanceId": vendor.instance_id,
+            "messageId": uuid.uuid4().hex.upper(),
+            "phone": phone,
+            "fromMe": False,
+            "isGroup": False,
+            "senderName": f"Cliente {phone[-4:]}",
+            "momment": int(time.time() * 1000),
+        }
+
+    def text(self) -> tuple[str, dict]:
+        vendor, phone = self._contact()
+        payload = self._zapi_base(vendor, phone)
+        payload["text"] = {"message": f"Olá, quero um orçamento ({self.random.randrange(10_000)})"}
+        self.sent.append(payload)
+        return "zapi", payload
+
+    def media(self) -> tuple[str, dict]:
+        vendor, phone = self._contact()
+        kind, field, ext = self.random.choice(MEDIA_KINDS)
+        payload = self._zapi_base(vendor, phone)
+        payload[kind] = {field: self.upstreams.media_url(f"{uuid.uuid4().hex}.{ext}"), "caption": "segue"}
+        self.sent.append(payload)
+        return "zapi", payload
+
+    def group(self) -> tuple[str, dict]:
+        vendor, phone = self._contact()
+        payload = self._zapi_base(vendor, f"1203634{phone[-8:]}-group")
+        payload.update({
+            "isGroup": True,
+            "chatName": f"Obra {phone[-4:]}",
+            "participantPhone": phone,
+            "text": {"message": "bom dia pessoal"},
+        })
+        self.sent.append(payload)
+        return "zapi", payload
+
+    def redelivery(self) -> tuple[str, dict]:
+        if not self.sent:
+            return self.text()
+        return "zapi", self.random.choice(self.sent[-1000:])
+
+    def _outgoing(self, content: str, attachments: list[dict]) -> tuple[str, dict]:
+        vendor, phone = self._contact()
+        return "chatwoot", {
+            "event": "message_created",
+            "message_type": "outgoing",
+            "private": False,
+            "id": self.random.randrange(1, 10**9),
+            "content": content,
+            "content_type": "text",
+            "sender": {"id": vendor.agent_id, "type": "user"},
+            "conversation": {
+                "id": self.random.randrange(1, 10**6),
+                "meta": {"sender": {"identifier": f"+{phone}"}},
+            },
+            "attachments": attachments,
+        }
+
+    def outgoing(self) -> tuple[str, dict]:
+        return self._outgoing("Olá! Já vou te ajudar.", [])
+
+    def outgoing_media(self) -> tuple[str, dict]:
+        url = self.upstreams.media_url(f"{uuid.uuid4().hex}.jpg")
+        return self._outgoing("", [{"file_type": "image", "data_url": url}])
+
+
+def _parse_mix(raw: str) -> dict[str, float]:
+    mix = {}
+    for item in raw.split(","):
+        name, _, weight = item.strip().partition("=")
+        if not hasattr(PayloadFactory, name):
+            raise SystemExit(f"tipo desconhecido no --mix: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+# ============================================================
+# Carga (malha aberta)
+# ============================================================
+
+def _summary(latencies: list[float]) -> dict:
+    if not latencies:
+        return {"count": 0}
+    latencies = sorted(latencies)
+    return {
+        "count": len(latencies),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p99_ms": round(latencies[max(int(len(latencies) * 0.99) - 1, 0)], 2),
+        "max_ms": round(latencies[-1], 2),
+    }
+
+
+async def _run_load(
+    session: aiohttp.ClientSession,
+    base: str,
+    factory: PayloadFactory,
+    mix: dict[str, float],
+    rate: float,
+    duration: float,
+) -> dict:
+    total = int(rate * duration)
+    kinds = factory.random.choices(list(mix), weights=list(mix.values()), k=total)
+    urls = {"zapi": f"{base}/api/v1/webhooks/zapi", "chatwoot": f"{base}/api/v1/webhooks/chatwoot"}
+
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors: Counter[str] = Counter()
+    last_done = 0.0
+
+    async def one(kind: str, scheduled: float):
+        nonlocal last_done
+        target, payload = getattr(factory, kind)()
+        try:
+            async with session.post(urls[target], json=payload) as resp:
+                await resp.read()
+                if resp.status >= 400:
+                    errors[f"{kind}:{resp.status}"] += 1
+                    return
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            errors[f"{kind}:{type(e).__name__}"] += 1
+            return
+        done = time.perf_counter()
+        last_done = max(last_done, done)
+        latencies[kind].append((done - scheduled) * 1000)
+
+    tasks = []
+    started = time.perf_counter()
+    for i, kind in enumerate(kinds):
+        scheduled = started + i / rate
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(kind, scheduled)))
+    await asyncio.gather(*tasks)
+
+    elapsed = (last_done or time.perf_counter()) - started
+    ok = sum(len(v) for v in latencies.values())
+    return {
+        "requests": total,
+        "ok": ok,
+        "errors": dict(errors),
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(ok / elapsed, 1) if elapsed else None,
+        "latency": {
+            "all": _summary([x for v in latencies.values() for x in v]),
+            **{kind: _summary(v) for kind, v in sorted(latencies.items())},
+        },
+    }
+
+
+async def _drain(upstreams: FakeUpstreams, quiet: float, timeout: float) -> None:
+    """
+    Espera os processamentos em background (webhook do Chatwoot)
+    terminarem: nenhuma chamada nova aos upstreams por `quiet` s.
+    """
+    deadline = time.monotonic() + timeout
+    last = sum(upstreams.calls.values())
+    last_change = time.monotonic()
+    while time.monotonic() < deadline:
+        await asyncio.sleep(0.1)
+        current = sum(upstreams.calls.values())
+        if current != last:
+            last, last_change = current, time.monotonic()
+        elif time.monotonic() - last_change >= quiet:
+            return
+
+
+# ============================================================
+# Main
+# ============================================================
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=50, help="requisições por segundo")
+    parser.add_argument("--duration", type=float, default=30, help="segundos de carga")
+    parser.add_argument("--warmup", type=float, default=2, help="segundos de aquecimento (fora da medição)")
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--vendors", type=int, default=5)
+    parser.add_argument("--contacts", type=int, default=500)
+    parser.add_argument("--media-kb", type=int, default=256)
+    parser.add_argument("--upstream-latency-ms", type=float, default=0.0)
+    parser.add_argument("--redis", default="memory", help="memory | host:port")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="acrescenta o resultado (1 linha) neste .jsonl")
+    parser.add_argument("--app-log", help="arquivo para stdout/stderr do app (padrão: temporário)")
+    args = parser.parse_args()
+
+    mix = _parse_mix(args.mix)
+
+    upstreams = FakeUpstreams(media_kb=args.media_kb, latency_ms=args.upstream_latency_ms)
+    upstream_base = await upstreams.start()
+
+    fake_redis = None
+    if args.redis == "memory":
+        fake_redis = FakeRedis()
+        redis_host, redis_port = "127.0.0.1", await fake_redis.start()
+    else:
+        redis_host, _, port = args.redis.partition(":")
+        redis_port = int(port or 6379)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        db_url, vendors = _prepare_db(tmp / "load.db", args.vendors)
+
+        port = _free_port()
+        base = f"http://127.0.0.1:{port}"
+        proc = _start_app(port, {
+            "DATABASE_URL": db_url,
+            "CHATWOOT_BASE_URL": upstream_base,
+            "ZAPI_BASE_URL": upstream_base,
+            "R2_ENDPOINT": upstream_base,
+            "R2_PUBLIC_URL": f"{upstream_base}/public",
+            "REDIS_HOST": redis_host,
+            "REDIS_PORT": str(redis_port),
+            "REDIS_PASSWORD": "",
+            "ARCHIVE_DIR": str(tmp / "archive"),
+            "TRACE_EXPORTER": "none",
+            "LOG_LEVEL": "WARNING",
+            "ADMIN_TOKEN": ADMIN_TOKEN,
+            "AWS_EC2_METADATA_DISABLED": "true",
+            "NO_PROXY": "127.0.0.1,localhost",
+        }, Path(args.app_log) if args.app_log else tmp / "app.log")
+
+        try:
+            connector = aiohttp.TCPConnector(limit=0)
+            timeout = aiohttp.ClientTimeout(total=60)
+            async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+                await _wait_ready(session, base, proc)
+
+                factory = PayloadFactory(vendors, upstreams, args.contacts, args.seed)
+                if args.warmup > 0:
+                    await _run_load(session, base, factory, mix, args.rate, args.warmup)
+                    await _drain(upstreams, quiet=0.5, timeout=30)
+
+                upstreams.calls.clear()
+                if fake_redis:
+                    fake_redis.calls.clear()
+                headers = {"X-Admin-Token": ADMIN_TOKEN}
+                async with session.delete(f"{base}/api/v1/debug/profile", headers=headers):
+                    pass
+
+                load = await _run_load(session, base, factory, mix, args.rate, args.duration)
+                await _drain(upstreams, quiet=1.0, timeout=60)
+
+                async with session.get(f"{base}/api/v1/debug/profile", headers=headers) as resp:
+                    profile = (await resp.json()).get("labels", {}) if resp.status == 200 else {}
+
+            peak_rss = _peak_rss_mb(proc.pid)
+        finally:
+            proc.terminate()
+            try:
+                proc.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+        result = {
+            "benchmark": "load",
+            "commit": _git_commit(),
+            "at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "params": {
+                "rate": args.rate,
+                "duration": args.duration,
+                "mix": mix,
+                "vendors": args.vendors,
+                "contacts": args.contacts,
+                "media_kb": args.media_kb,
+                "upstream_latency_ms": args.upstream_latency_ms,
+                "redis": args.redis,
+            },
+            **load,
+            "upstream_calls": dict(sorted(upstreams.calls.items())),
+            "redis_calls": dict(sorted(fake_redis.calls.items())) if fake_redis else None,
+            "app_peak_rss_mb": peak_rss,
+            "app_profile": profile,
+        }
+
+    await upstreams.stop()
+    if fake_redis:
+        await fake_redis.stop()
+
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+    if args.output:
+        with open(args.output, "a") as f:
+            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
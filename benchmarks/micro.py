@@ -0,0 +1,417 @@
+# file: benchmarks/micro.py
+
+"""
+Microbenchmarks dos serviços do caminho quente, com baseline e
+tolerância (falha quando uma função regride).
+
+Casos:
+- ensure_conversation / ensure_session : conversa/sessão existentes
+  (sessão de banco nova por chamada, como no webhook)
+- log_message                          : insert + commit em messages_log
+- get_customer_by_cnpj.hit / .miss     : DuckDB sobre o Parquet de clientes
+- cache_service.save / .get            : sessão em cache (Redis em memória)
+- get_active_bot_session               : sessão do bot existente no Redis
+- detect_message_type.chatwoot / .zapi : funções puras de classificação
+
+Tamanhos parametrizados: --messages (linhas em messages_log; conversas
+= messages/20) e --parquet-rows (linhas no Parquet de clientes).
+O banco é SQLite temporário com o perfil do app; o Redis é o FakeRedis
+de benchmarks.standins (mede serialização + round-trip local).
+
+Baselines ficam em benchmarks/baselines/micro.json, uma por perfil de
+tamanho, com o commit medido. São por máquina: rode --update-baseline
+no mesmo runner que vai comparar, com a árvore limpa (senão o commit
+sai como "<hash>-dirty").
+
+Uso:
+    python -m benchmarks.micro                          # compara com a baseline
+    python -m benchmarks.micro --update-baseline        # grava/atualiza a baseline
+    python -m benchmarks.micro --messages 1000000 --parquet-rows 500000 --tolerance 0.3
+    python -m benchmarks.micro --only ensure_conversation,log_message
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import duckdb
+
+from benchmarks.standins import FakeRedis
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines" / "micro.json"
+
+CONVERSATIONS_PER_MESSAGE = 20
+SEED_CHUNK = 10_000
+
+
+# ============================================================
+# Dados
+# ============================================================
+
+def _write_customers_parquet(path: Path, rows: int) -> None:
+    duckdb.execute(f"""
+        COPY (
+            SELECT
+                printf('%02d.%03d.%03d/0001-%02d', i // 1000000 % 100, i // 1000 % 1000, i % 1000, i % 97)
+                    AS "CNPJ / CPF",
+                'Parceiro ' || i AS "Nome Parceiro",
+                'Cidade ' || (i % 5000) AS "Nome (Cidade)",
+                ['SC', 'PR', 'RS', 'SP', 'RJ', 'MG'][i % 6 + 1] AS "UF"
+            FROM range({rows}) t(i)
+        ) TO '{path.as_posix()}' (FORMAT parquet)
+    """)
+
+
+def _cnpj(i: int) -> str:
+    return f"{i // 1000000 % 100:02d}.{i // 1000 % 1000:03d}.{i % 1000:03d}/0001-{i % 97:02d}"
+
+
+def _prepare_db(path: Path, messages: int) -> tuple[str, dict]:
+    from sqlalchemy import create_engine
+
+    from app.db.base import Base
+    from app.db import models_registry  # noqa: F401 — registra os models
+    from app.models.conversation_sessions import ConversationSession
+    from app.models.conversations import Conversation
+    from app.models.messages_log import MessageLog
+    from app.models.vendors import Vendor
+    from app.utils.ids import new_id
+
+    url = f"sqlite:///{path.as_posix()}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+
+    vendor_id = new_id()
+    conversations = max(messages // CONVERSATIONS_PER_MESSAGE, 1)
+    phones = [f"+55119{i:08d}" for i in range(conversations)]
+    conversation_ids = [new_id() for _ in range(conversations)]
+
+    with engine.begin() as conn:
+        conn.execute(Vendor.__table__.insert(), {
+            "vendor_id": vendor_id,
+            "name": "Bench",
+            "phone": "5547990000000",
+            "agent_id": 1,
+            "inbox_identifier": "inbox-bench",
+            "instance_id": "INSTANCE-BENCH",
+            "instance_token": "TOKEN-BENCH",
+            "active": True,
+        })
+        conn.execute(Conversation.__table__.insert(), [
+            {"conversation_id": cid, "customer_phone": phone, "current_vendor_id": vendor_id, "status": "open"}
+            for cid, phone in zip(conversation_ids, phones)
+        ])
+        conn.execute(ConversationSession.__table__.insert(), [
+            {
+                "session_id": new_id(),
+                "conversation_id": cid,
+                "vendor_id": vendor_id,
+                "chatwoot_conv_id": str(i),
+                "zapi_chat_lid": "",
+            }
+            for i, cid in enumerate(conversation_ids)
+        ])
+
+    for start in range(0, messages, SEED_CHUNK):
+        with engine.begin() as conn:
+            conn.execute(MessageLog.__table__.insert(), [
+                {
+                    "log_id": new_id(),
+                    "conversation_id": conversation_ids[i % conversations],
+                    "vendor_id": vendor_id,
+                    "direction": "incoming" if i % 2 else "outgoing",
+                    "source": "zapi" if i % 2 else "chatwoot",
+                    "message_type": "text",
+                    "content": f"mensagem {i}",
+                }
+                for i in range(start, min(start + SEED_CHUNK, messages))
+            ])
+
+    engine.dispose()
+    return url, {
+        "vendor_id": vendor_id,
+        "phones": phones,
+        "conversation_ids": conversation_ids,
+    }
+
+
+# ============================================================
+# Casos
+# ============================================================
+
+async def _build_cases(db_url: str, data: dict, parquet_rows: int) -> tuple[dict, list]:
+    """
+    {nome: (função, chamadas por rodada)} — imports do app só aqui:
+    settings lê o ambiente preparado em main().
+    """
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+    from app.api.v1.webhooks_chatwoot import _detect_message_type
+    from app.db.session import create_app_async_engine
+    from app.schemas.bot_sessions import BotSessionKnown
+    from app.schemas.messages_log import MessageLogCreate
+    from app.services.bot_sessions_cache import build_bot_session, get_active_bot_session, save_bot_session
+    from app.services.cache_service import get_cached_session, save_cached_session
+    from app.services.chatwoot_service import detect_zapi_message_type
+    from app.services.conversations_service import ensure_conversation_async
+    from app.services.customers_service import get_customer_by_cnpj
+    from app.services.messages_service import log_message_async
+    from app.services.sessions_service import ensure_session_async
+
+    engine = create_app_async_engine(db_url)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    rng = random.Random(42)
+    vendor_id = data["vendor_id"]
+    phones = data["phones"]
+    conversation_ids = data["conversation_ids"]
+
+    async def ensure_conversation():
+        async with factory() as db:
+            await ensure_conversation_async(db, rng.choice(phones), vendor_id, commit=False)
+
+    async def ensure_session():
+        i = rng.randrange(len(conversation_ids))
+        async with factory() as db:
+            await ensure_session_async(db, conversation_ids[i], vendor_id, "", str(i), commit=False)
+
+    async def log_message():
+        msg = MessageLogCreate(
+            conversation_id=rng.choice(conversation_ids),
+            vendor_id=vendor_id,
+            direction="incoming",
+            source="zapi",
+            message_type="text",
+            content="olá, quero um orçamento",
+        )
+        async with factory() as db:
+            await log_message_async(db, msg)
+
+    def customer_hit():
+        result = get_customer_by_cnpj(_cnpj(rng.randrange(parquet_rows)))
+        assert result["found"]
+
+    def customer_miss():
+        get_customer_by_cnpj("99.999.999/9999-99")
+
+    async def cache_save():
+        await save_cached_session(vendor_id, rng.choice(phones), rng.choice(conversation_ids), "123")
+
+    async def cache_get():
+        await get_cached_session(vendor_id, rng.choice(phones))
+
+    bot_conversation = conversation_ids[0]
+    await save_bot_session(build_bot_session(
+        conversation_id=bot_conversation,
+        entity_type="lead",
+        known=BotSessionKnown(cnpj=_cnpj(1), state="SC"),
+    ))
+
+    async def bot_session():
+        assert await get_active_bot_session(bot_conversation)
+
+    chatwoot_payloads = [
+        {"content": "oi", "attachments": []},
+        {"content": "", "attachments": [{"file_type": "image"}]},
+        {"content": "", "attachments": [{"file_type": "application/pdf"}]},
+    ]
+    zapi_payloads = [
+        {"text": {"message": "oi"}},
+        {"image": {"imageUrl": "x"}},
+        {"document": {"documentUrl": "x"}},
+    ]
+
+    def detect_chatwoot():
+        for p in chatwoot_payloads:
+            _detect_message_type(p)
+
+    def detect_zapi():
+        for p in zapi_payloads:
+            detect_zapi_message_type(p)
+
+    cases = {
+        "ensure_conversation": (ensure_conversation, 200),
+        "ensure_session": (ensure_session, 200),
+        "log_message": (log_message, 200),
+        "get_customer_by_cnpj.hit": (customer_hit, 20),
+        "get_customer_by_cnpj.miss": (customer_miss, 20),
+        "cache_service.save": (cache_save, 500),
+        "cache_service.get": (cache_get, 500),
+        "get_active_bot_session": (bot_session, 500),
+        "detect_message_type.chatwoot": (detect_chatwoot, 20_000),
+        "detect_message_type.zapi": (detect_zapi, 20_000),
+    }
+    return cases, [engine]
+
+
+async def _measure(fn, number: int, rounds: int) -> dict:
+    is_async = asyncio.iscoroutinefunction(fn)
+    per_call = []
+
+    # rodada 0 = aquecimento (caches, planos de consulta, conexões)
+    for r in range(rounds + 1):
+        start = time.perf_counter()
+        if is_async:
+            for _ in range(number):
+                await fn()
+        else:
+            for _ in range(number):
+                fn()
+        elapsed = time.perf_counter() - start
+        if r:
+            per_call.append(elapsed / number * 1_000_000)
+
+    return {
+        "median_us": round(statistics.median(per_call), 3),
+        "min_us": round(min(per_call), 3),
+        "calls": number * rounds,
+    }
+
+
+# ============================================================
+# Baseline
+# ============================================================
+
+def _load_baselines() -> dict:
+    if BASELINE_PATH.exists():
+        return json.loads(BASELINE_PATH.read_text())
+    return {"profiles": {}}
+
+
+def _compare(results: dict, baseline: dict, tolerance: float, min_delta_us: float) -> dict:
+    comparison = {}
+    for name, current in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            comparison[name] = {"status": "new"}
+            continue
+
+        ratio = current["median_us"] / base["median_us"] if base["median_us"] else None
+        delta = current["median_us"] - base["median_us"]
+        regressed = ratio is not None and ratio > 1 + tolerance and delta > min_delta_us
+        comparison[name] = {
+            "status": "regressed" if regressed else "ok",
+            "baseline_us": base["median_us"],
+            "current_us": current["median_us"],
+            "ratio": round(ratio, 3) if ratio is not None else None,
+        }
+    return comparison
+
+
+def _git_commit() -> str | None:
+    """
+    HEAD curto; "-dirty" se arquivos versionados têm mudanças (a medida
+    não corresponde a nenhum commit). As próprias baselines não contam.
+    """
+    def git(*args: str) -> str:
+        return subprocess.run(
+            ["git", *args], cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+
+    try:
+        commit = git("rev-parse", "--short", "HEAD")
+        dirty = git("status", "--porcelain", "--untracked-files=no", "--", ".", f":!{BASELINE_PATH.parent.relative_to(ROOT).as_posix()}")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f"{commit}-dirty" if dirty else commit
+
+
+# ============================================================
+# Main
+# ============================================================
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=100_000, help="linhas em messages_log")
+    parser.add_argument("--parquet-rows", type=int, default=100_000, help="linhas no Parquet de clientes")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--only", help="casos separados por vírgula (prefixo)")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="regressão = mediana > baseline * (1 + tolerância)")
+    parser.add_argument("--min-delta-us", type=float, default=1.0, help="ignora regressões menores que isso (ruído)")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    profile = f"messages={args.messages},parquet_rows={args.parquet_rows}"
+
+    fake_redis = FakeRedis()
+    redis_port = await fake_redis.start()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        parquet = tmp / "parceiros.parquet"
+        _write_customers_parquet(parquet, args.parquet_rows)
+
+        # antes de qualquer import de app.* (settings lê o ambiente uma vez)
+        os.environ.update({
+            "CUSTOMERS_PARQUET_PATH": str(parquet),
+            "DATABASE_URL": f"sqlite:///{(tmp / 'app.db').as_posix()}",
+            "REDIS_HOST": "127.0.0.1",
+            "REDIS_PORT": str(redis_port),
+            "REDIS_PASSWORD": "",
+            "TRACE_EXPORTER": "none",
+        })
+
+        db_url, data = _prepare_db(tmp / "bench.db", args.messages)
+        cases, engines = await _build_cases(db_url, data, args.parquet_rows)
+
+        selected = [p.strip() for p in args.only.split(",")] if args.only else None
+        results = {}
+        for name, (fn, number) in cases.items():
+            if selected and not any(name.startswith(p) for p in selected):
+                continue
+            results[name] = await _measure(fn, number, args.rounds)
+            print(f"{name:32s} {results[name]['median_us']:>12.1f} µs", file=sys.stderr)
+
+        for engine in engines:
+            await engine.dispose()
+
+    await fake_redis.stop()
+
+    baselines = _load_baselines()
+    baseline = baselines["profiles"].get(profile, {})
+    comparison = _compare(results, baseline, args.tolerance, args.min_delta_us)
+    regressions = sorted(n for n, c in comparison.items() if c["status"] == "regressed")
+
+    output = {
+        "benchmark": "micro",
+        "commit": _git_commit(),
+        "at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "profile": profile,
+        "tolerance": args.tolerance,
+        "baseline_commit": baseline.get("commit"),
+        "results": results,
+        "comparison": comparison,
+        "regressions": regressions,
+    }
+    print(json.dumps(output, indent=2, ensure_ascii=False))
+
+    if args.update_baseline:
+        merged = {**baseline.get("results", {}), **results}
+        baselines["profiles"][profile] = {
+            "commit": output["commit"],
+            "at": output["at"],
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": dict(sorted(merged.items())),
+        }
+        BASELINE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        BASELINE_PATH.write_text(json.dumps(baselines, indent=2, ensure_ascii=False) + "\n")
+        print(f"baseline gravada em {BASELINE_PATH} ({profile})", file=sys.stderr)
+        return 0
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,268 @@
+# file: benchmarks/replay.py
+
+"""
+Replay determinístico de uma captura de webhooks (app.utils.traffic_capture)
+contra qualquer ambiente, com diff dos resultados.
+
+Os registros são reenviados na ordem de chegada (ts) para a mesma rota
+(/api/v1/webhooks/zapi ou /chatwoot), no ritmo escolhido:
+- --speed 1  : tempo original entre os webhooks
+- --speed N  : N× mais rápido
+- --speed 0  : sem esperar (limite de --concurrency em voo)
+
+No fim compara a contagem de resultados (rota:outcome:reason) da
+captura com a do replay e lista os registros que mudaram de resultado.
+Chatwoot: o webhook só aceita e processa em background → o resultado
+comparado é o da aceitação ("accepted"/"ignored").
+
+Uso:
+    python -m benchmarks.replay data/capture/webhooks.ndjson* --target http://localhost:8000
+    python -m benchmarks.replay captura.ndjson --speed 10 --route zapi
+    python -m benchmarks.replay captura.ndjson --speed 0 --concurrency 50 --fail-on-diff
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+import aiohttp
+
+ROUTES = {
+    "zapi": "/api/v1/webhooks/zapi",
+    "chatwoot": "/api/v1/webhooks/chatwoot",
+}
+MAX_MISMATCHES_SHOWN = 50
+
+
+# ============================================================
+# Captura
+# ============================================================
+
+def load_capture(paths: list[str], routes: set[str] | None = None, limit: int | None = None) -> list[dict]:
+    records = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for n, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"⚠️ {path}:{n} linha inválida, ignorada", file=sys.stderr)
+                    continue
+                if routes and record.get("route") not in routes:
+                    continue
+                records.append(record)
+
+    # ordem estável: arquivos rotacionados podem vir em qualquer ordem
+    records.sort(key=lambda r: r["ts"])
+    return records[:limit] if limit else records
+
+
+def outcome_key(route: str, outcome: str, reason: str) -> str:
+    return f"{route}:{outcome}:{reason}" if reason else f"{route}:{outcome}"
+
+
+def _classify(status: int, body) -> tuple[str, str]:
+    """
+    Mesmo vocabulário que os routers gravam na captura.
+    """
+    if status >= 400:
+        detail = body.get("detail") if isinstance(body, dict) else None
+        return "error", str(detail) if detail is not None else f"http_{status}"
+    if isinstance(body, dict):
+        if body.get("ignored"):
+            return "ignored", body.get("reason") or ""
+        if body.get("status") == "accepted":
+            return "accepted", ""
+    return "ok", ""
+
+
+# ============================================================
+# Replay
+# ============================================================
+
+async def replay(
+    records: list[dict],
+    target: str,
+    speed: float,
+    concurrency: int,
+    headers: dict[str, str],
+    timeout: float,
+) -> tuple[list[dict], float]:
+    results: list[dict | None] = [None] * len(records)
+    semaphore = asyncio.Semaphore(concurrency) if speed <= 0 else None
+    target = target.rstrip("/")
+
+    async def one(session: aiohttp.ClientSession, i: int, record: dict):
+        url = target + ROUTES[record["route"]]
+        start = time.perf_counter()
+        try:
+            async with session.post(url, json=record["payload"], headers=headers) as resp:
+                raw = await resp.read()
+                try:
+                    body = json.loads(raw) if raw else None
+                except ValueError:
+                    body = None
+                outcome, reason = _classify(resp.status, body)
+                status = resp.status
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            outcome, reason, status = "error", type(e).__name__, None
+
+        results[i] = {
+            "status_code": status,
+            "outcome": outcome,
+            "reason": reason,
+            "latency_ms": (time.perf_counter() - start) * 1000,
+        }
+
+    async def limited(session, i, record):
+        async with semaphore:
+            await one(session, i, record)
+
+    connector = aiohttp.TCPConnector(limit=0)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout) as session:
+        tasks = []
+        started = time.perf_counter()
+        first_ts = records[0]["ts"] if records else 0.0
+
+        for i, record in enumerate(records):
+            if semaphore:
+                tasks.append(asyncio.create_task(limited(session, i, record)))
+                continue
+
+            due = started + (record["ts"] - first_ts) / speed
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(one(session, i, record)))
+
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    return results, elapsed
+
+
+# ============================================================
+# Relatório
+# ============================================================
+
+def _summary(latencies: list[float]) -> dict:
+    if not latencies:
+        return {"count": 0}
+    latencies = sorted(latencies)
+    return {
+        "count": len(latencies),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p99_ms": round(latencies[max(int(len(latencies) * 0.99) - 1, 0)], 2),
+        "max_ms": round(latencies[-1], 2),
+    }
+
+
+def diff_outcomes(records: list[dict], results: list[dict]) -> dict:
+    captured: Counter[str] = Counter()
+    replayed: Counter[str] = Counter()
+    mismatches = []
+
+    for i, (record, result) in enumerate(zip(records, results)):
+        expected = outcome_key(record["route"], record.get("outcome", ""), record.get("reason", ""))
+        got = outcome_key(record["route"], result["outcome"], result["reason"])
+        captured[expected] += 1
+        replayed[got] += 1
+        if expected != got:
+            mismatches.append({"index": i, "ts": record["ts"], "expected": expected, "got": got})
+
+    keys = sorted(set(captured) | set(replayed))
+    return {
+        "counts": {
+            key: {"captured": captured[key], "replayed": replayed[key], "delta": replayed[key] - captured[key]}
+            for key in keys
+        },
+        "changed_counts": [key for key in keys if captured[key] != replayed[key]],
+        "mismatched_records": len(mismatches),
+        "mismatches": mismatches[:MAX_MISMATCHES_SHOWN],
+    }
+
+
+# ============================================================
+# Main
+# ============================================================
+
+def _parse_headers(raw: list[str]) -> dict[str, str]:
+    headers = {}
+    for item in raw:
+        name, sep, value = item.partition(":")
+        if not sep:
+            raise SystemExit(f"header inválido (use 'Nome: valor'): {item}")
+        headers[name.strip()] = value.strip()
+    return headers
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("captures", nargs="+", help="arquivos NDJSON (inclui rotacionados .1, .2 ...)")
+    parser.add_argument("--target", default="http://localhost:8000")
+    parser.add_argument("--speed", type=float, default=1.0, help="1 = tempo original, N = N× mais rápido, 0 = sem esperar")
+    parser.add_argument("--concurrency", type=int, default=20, help="em voo com --speed 0")
+    parser.add_argument("--route", help="zapi,chatwoot (padrão: todas)")
+    parser.add_argument("--limit", type=int)
+    parser.add_argument("--header", action="append", default=[], help="'Nome: valor' (repetível)")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--output", help="acrescenta o resultado (1 linha) neste .jsonl")
+    parser.add_argument("--fail-on-diff", action="store_true", help="código de saída 1 se algum resultado mudou")
+    args = parser.parse_args()
+
+    routes = set(args.route.split(",")) if args.route else None
+    records = load_capture(args.captures, routes, args.limit)
+    if not records:
+        print("nenhum registro na captura", file=sys.stderr)
+        return 1
+
+    original_seconds = records[-1]["ts"] - records[0]["ts"]
+    print(
+        f"▶️ {len(records)} webhooks ({original_seconds:.1f} s capturados) → {args.target} "
+        f"speed={'max' if args.speed <= 0 else args.speed}",
+        file=sys.stderr,
+    )
+
+    results, elapsed = await replay(
+        records, args.target, args.speed, args.concurrency, _parse_headers(args.header), args.timeout,
+    )
+    diff = diff_outcomes(records, results)
+
+    by_route: dict[str, list[float]] = {}
+    for record, result in zip(records, results):
+        by_route.setdefault(record["route"], []).append(result["latency_ms"])
+
+    output = {
+        "benchmark": "replay",
+        "at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "captures": [str(Path(p)) for p in args.captures],
+        "target": args.target,
+        "speed": args.speed,
+        "records": len(records),
+        "original_seconds": round(original_seconds, 3),
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(records) / elapsed, 1) if elapsed else None,
+        "latency": {route: _summary(v) for route, v in sorted(by_route.items())},
+        **diff,
+    }
+    print(json.dumps(output, indent=2, ensure_ascii=False))
+
+    if args.output:
+        with open(args.output, "a") as f:
+            f.write(json.dumps(output, ensure_ascii=False) + "\n")
+
+    return 1 if args.fail_on_diff and diff["mismatched_records"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,129 @@
+# file: benchmarks/sqlite_writer.py
+
+"""
+Benchmark do perfil SQLite: escritas concorrentes em messages_log.
+
+Cenários (mesmo volume de escritas, mesma concorrência):
+- default : engine async sem perfil (journal padrão, commit por escrita)
+- wal     : perfil SQLite (WAL + pragmas), commit por escrita
+- writer  : perfil SQLite + SQLiteWriter (fila única com group commit)
+
+Uso:
+    python -m benchmarks.sqlite_writer --writes 2000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.base import Base
+from app.db import models_registry  # noqa: F401 — registra os models
+from app.db.session import create_app_async_engine
+from app.db.writer import SQLiteWriter
+from app.models.conversations import Conversation
+from app.models.messages_log import MessageLog
+
+
+def _new_message(conversation_id: str, i: int) -> MessageLog:
+    return MessageLog(
+        conversation_id=conversation_id,
+        direction="incoming",
+        source="zapi",
+        message_type="text",
+        content=f"mensagem {i}",
+    )
+
+
+def _prepare_db(path: Path) -> str:
+    url = f"sqlite:///{path.as_posix()}"
+    sync_engine = create_engine(url)
+    Base.metadata.create_all(sync_engine)
+    with sync_engine.begin() as conn:
+        conn.execute(
+            Conversation.__table__.insert(),
+            {"conversation_id": "bench", "customer_phone": "+5500000000000", "status": "open"},
+        )
+    sync_engine.dispose()
+    return url
+
+
+async def _run(scenario: str, url: str, writes: int, concurrency: int) -> dict:
+    if scenario == "default":
+        engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://", 1))
+    else:
+        engine = create_app_async_engine(url)
+
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    writer = SQLiteWriter(factory) if scenario == "writer" else None
+    if writer:
+        writer.start()
+
+    latencies: list[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        nonlocal errors
+        async with semaphore:
+            t0 = time.perf_counter()
+            try:
+                if writer:
+                    async def job(db: AsyncSession):
+                        db.add(_new_message("bench", i))
+                    await writer.submit(job)
+                else:
+                    async with factory() as db:
+                        db.add(_new_message("bench", i))
+                        await db.commit()
+                latencies.append((time.perf_counter() - t0) * 1000)
+            except Exception:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(writes)))
+    elapsed = time.perf_counter() - started
+
+    if writer:
+        await writer.stop()
+    await engine.dispose()
+
+    ok = len(latencies)
+    latencies.sort()
+    return {
+        "scenario": scenario,
+        "writes": writes,
+        "concurrency": concurrency,
+        "ok": ok,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "writes_per_second": round(ok / elapsed, 1) if elapsed else None,
+        "p50_ms": round(statistics.median(latencies), 2) if latencies else None,
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1], 2) if latencies else None,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writes", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--scenarios", default="default,wal,writer")
+    args = parser.parse_args()
+
+    results = []
+    for scenario in args.scenarios.split(","):
+        with tempfile.TemporaryDirectory() as tmp:
+            url = _prepare_db(Path(tmp) / "bench.db")
+            results.append(await _run(scenario, url, args.writes, args.concurrency))
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
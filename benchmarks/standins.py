@@ -0,0 +1,454 @@
+# file: benchmarks/standins.py
+
+"""
+Stand-ins locais dos upstreams (benchmarks e testes de carga).
+
+- FakeUpstreams: um servidor aiohttp com a API pública do Chatwoot,
+  a Z-API, um storage S3 path-style (R2) com URL pública e arquivos
+  de mídia de origem
+- FakeRedis: subconjunto do protocolo RESP em memória (o que o app
+  usa: strings, contadores, HyperLogLog aproximado por set, zsets e
+  pub/sub)
+
+Toda chamada é contada por rota em `calls` para o relatório.
+"""
+
+import asyncio
+import fnmatch
+import itertools
+import time
+import uuid
+from collections import Counter, defaultdict
+
+from aiohttp import web
+
+MEDIA_TYPES = {
+    "jpg": "image/jpeg",
+    "mp4": "video/mp4",
+    "ogg": "audio/ogg",
+    "pdf": "application/pdf",
+}
+
+
+# ============================================================
+# Chatwoot + Z-API + S3 (R2) + mídia
+# ============================================================
+
+class FakeUpstreams:
+    """
+    Base única; o app aponta para:
+      CHATWOOT_BASE_URL = base
+      ZAPI_BASE_URL     = base
+      R2_ENDPOINT       = base              (bucket no path)
+      R2_PUBLIC_URL     = base + "/public"
+    Mídia de origem: base + "/media/<nome>.<jpg|mp4|ogg|pdf>"
+    """
+
+    def __init__(self, media_kb: int = 256, latency_ms: float = 0.0) -> None:
+        self.media = bytes(range(256)) * (media_kb * 4)
+        self.latency = latency_ms / 1000
+        self.calls: Counter[str] = Counter()
+        self.objects: dict[str, tuple[bytes, str]] = {}
+
+        self._ids = itertools.count(1)
+        self._conversations: dict[str, str] = {}
+        self._runner: web.AppRunner | None = None
+        self.base_url = ""
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        app = web.Application(client_max_size=256 * 1024 * 1024)
+        prefix = "/public/api/v1/inboxes/{inbox}/contacts"
+        app.add_routes([
+            web.post(prefix, self._create_contact),
+            web.get(prefix + "/{contact}/conversations", self._list_conversations),
+            web.post(prefix + "/{contact}/conversations", self._create_conversation),
+            web.post(prefix + "/{contact}/conversations/{conv}/messages", self._create_message),
+            web.post("/instances/{instance}/token/{token}/{endpoint}", self._zapi_send),
+            web.get("/media/{name}", self._media),
+            web.get("/public/{key}", self._public_object),
+            web.put("/{bucket}/{key}", self._put_object),
+        ])
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{port}"
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def media_url(self, name: str) -> str:
+        return f"{self.base_url}/media/{name}"
+
+    async def _count(self, route: str) -> None:
+        self.calls[route] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    # --------------------------------------------------------
+    # Chatwoot (API pública do inbox)
+    # --------------------------------------------------------
+    async def _create_contact(self, request: web.Request) -> web.Response:
+        await self._count("chatwoot.create_contact")
+        data = await request.json()
+        return web.json_response({
+            "source_id": str(uuid.uuid5(uuid.NAMESPACE_URL, data.get("identifier") or "")),
+            "name": data.get("name"),
+        })
+
+    async def _list_conversations(self, request: web.Request) -> web.Response:
+        await self._count("chatwoot.list_conversations")
+        conv = self._conversations.get(request.match_info["contact"])
+        return web.json_response([{"id": conv, "status": "open"}] if conv else [])
+
+    async def _create_conversation(self, request: web.Request) -> web.Response:
+        await self._count("chatwoot.create_conversation")
+        conv = str(next(self._ids))
+        self._conversations[request.match_info["contact"]] = conv
+        return web.json_response({"id": conv, "status": "open"})
+
+    async def _create_message(self, request: web.Request) -> web.Response:
+        multipart = request.content_type.startswith("multipart/")
+        await self._count("chatwoot.create_message_media" if multipart else "chatwoot.create_message")
+        await request.read()
+        return web.json_response({"id": next(self._ids), "message_type": 0})
+
+    # --------------------------------------------------------
+    # Z-API
+    # --------------------------------------------------------
+    async def _zapi_send(self, request: web.Request) -> web.Response:
+        await self._count(f"zapi.{request.match_info['endpoint']}")
+        await request.read()
+        message_id = uuid.uuid4().hex.upper()
+        return web.json_response({"zaapId": message_id, "messageId": message_id, "id": message_id})
+
+    # --------------------------------------------------------
+    # Mídia de origem + S3 (R2)
+    # --------------------------------------------------------
+    async def _media(self, request: web.Request) -> web.Response:
+        await self._count("media.download")
+        ext = request.match_info["name"].rsplit(".", 1)[-1]
+        return web.Response(body=self.media, content_type=MEDIA_TYPES.get(ext, "application/octet-stream"))
+
+    async def _put_object(self, request: web.Request) -> web.Response:
+        await self._count("s3.put_object")
+        body = await request.read()
+        key = request.match_info["key"]
+        self.objects[key] = (body, request.headers.get("Content-Type", "application/octet-stream"))
+        return web.Response(headers={"ETag": f'"{uuid.uuid4().hex}"'})
+
+    async def _public_object(self, request: web.Request) -> web.Response:
+        await self._count("s3.get_public")
+        obj = self.objects.get(request.match_info["key"])
+        if obj is None:
+            return web.Response(status=404)
+        body, mime = obj
+        return web.Response(body=body, content_type=mime)
+
+
+# ============================================================
+# Redis em memória (RESP2 / RESP3)
+# ============================================================
+
+class _Simple(str):
+    """Resposta +OK / +PONG."""
+
+
+class _Scored(list):
+    """[(membro, score)] → lista plana (RESP2) ou pares com double (RESP3)."""
+
+
+class _Push(list):
+    """Mensagem de pub/sub (push no RESP3)."""
+
+
+class RedisCommandError(Exception):
+    pass
+
+
+class FakeRedis:
+    """
+    Sem persistência nem transações; comandos desconhecidos → -ERR.
+    Responde em RESP2 ou RESP3 conforme o HELLO do cliente (redis-py 8
+    usa RESP3 por padrão).
+    Suficiente para o app rodar com Redis "de verdade" no caminho
+    (latência de socket incluída) sem depender de um redis-server.
+    """
+
+    def __init__(self) -> None:
+        self.calls: Counter[str] = Counter()
+        self._data: dict[str, object] = {}
+        self._expires: dict[str, float] = {}
+        self._subscribers: dict[str, set[asyncio.StreamWriter]] = defaultdict(set)
+        self._resp3: set[asyncio.StreamWriter] = set()
+        self._clients: set[asyncio.StreamWriter] = set()
+        self._server: asyncio.AbstractServer | None = None
+        self.port = 0
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        self._server = await asyncio.start_server(self._client, host, port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def stop(self) -> None:
+        if self._server:
+            self._server.close()
+            # EOF nos clientes: os handlers terminam sem cancelamento
+            for writer in list(self._clients):
+                writer.close()
+            await self._server.wait_closed()
+            while self._clients:
+                await asyncio.sleep(0.01)
+            self._server = None
+
+    # --------------------------------------------------------
+    # Protocolo
+    # --------------------------------------------------------
+    async def _client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._clients.add(writer)
+        try:
+            while True:
+                command = await self._read_command(reader)
+                if command is None:
+                    break
+                name = command[0].upper()
+                self.calls[f"redis.{name}"] += 1
+
+                if name in ("SUBSCRIBE", "UNSUBSCRIBE"):
+                    self._subscribe(name, command[1:], writer)
+                elif name == "HELLO":
+                    self._hello(command[1:], writer)
+                else:
+                    try:
+                        reply = self._execute(name, command[1:])
+                    except RedisCommandError as e:
+                        writer.write(f"-ERR {e}\r\n".encode())
+                    else:
+                        writer.write(_encode(reply, writer in self._resp3))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for writers in self._subscribers.values():
+                writers.discard(writer)
+            self._resp3.discard(writer)
+            self._clients.discard(writer)
+            writer.close()
+
+    @staticmethod
+    async def _read_command(reader: asyncio.StreamReader) -> list[str] | None:
+        header = await reader.readline()
+        if not header:
+            return None
+        if not header.startswith(b"*"):
+            # comando inline (redis-cli / telnet)
+            return header.decode().split()
+
+        args = []
+        for _ in range(int(header[1:])):
+            size = int((await reader.readline())[1:])
+            args.append((await reader.readexactly(size + 2))[:-2].decode())
+        return args
+
+    def _subscribe(self, name: str, channels: list[str], writer: asyncio.StreamWriter) -> None:
+        for channel in channels:
+            if name == "SUBSCRIBE":
+                self._subscribers[channel].add(writer)
+            else:
+                self._subscribers[channel].discard(writer)
+            count = sum(writer in w for w in self._subscribers.values())
+            writer.write(_encode(_Push([name.lower(), channel, count]), writer in self._resp3))
+
+    def _hello(self, args: list[str], writer: asyncio.StreamWriter) -> None:
+        protocol = int(args[0]) if args else 2
+        if protocol == 3:
+            self._resp3.add(writer)
+        else:
+            self._resp3.discard(writer)
+        info = {"server": "redis", "version": "7.2.0", "proto": protocol, "mode": "standalone", "role": "master"}
+        writer.write(_encode(info, protocol == 3))
+
+    # --------------------------------------------------------
+    # Comandos
+    # --------------------------------------------------------
+    def _alive(self, key: str):
+        expires = self._expires.get(key)
+        if expires is not None and expires <= time.monotonic():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return self._data.get(key)
+
+    def _typed(self, key: str, factory):
+        value = self._alive(key)
+        if value is None:
+            value = self._data[key] = factory()
+        elif not isinstance(value, factory):
+            raise RedisCommandError("WRONGTYPE Operation against a key holding the wrong kind of value")
+        return value
+
+    def _execute(self, name: str, args: list[str]):
+        if name in ("PING",):
+            return _Simple("PONG")
+        if name in ("CLIENT", "SELECT"):
+            return _Simple("OK")
+
+        if name == "GET":
+            value = self._alive(args[0])
+            if value is not None and not isinstance(value, str):
+                raise RedisCommandError("WRONGTYPE Operation against a key holding the wrong kind of value")
+            return value
+        if name == "MGET":
+            return [v if isinstance(v, str) else None for v in map(self._alive, args)]
+        if name == "SET":
+            key, value, options = args[0], args[1], [o.upper() for o in args[2:]]
+            previous = self._alive(key)
+            if "NX" in options and previous is not None:
+                return None
+            self._data[key] = value
+            self._expires.pop(key, None)
+            if "EX" in options:
+                self._expires[key] = time.monotonic() + int(args[2 + options.index("EX") + 1])
+            # GET: devolve o valor anterior em vez de OK
+            return previous if "GET" in options else _Simple("OK")
+        if name == "SETEX":
+            self._data[args[0]] = args[2]
+            self._expires[args[0]] = time.monotonic() + int(args[1])
+            return _Simple("OK")
+        if name == "DEL":
+            removed = sum(self._alive(k) is not None for k in args)
+            for key in args:
+                self._data.pop(key, None)
+                self._expires.pop(key, None)
+            return removed
+        if name == "EXISTS":
+            return sum(self._alive(k) is not None for k in args)
+        if name == "EXPIRE":
+            if self._alive(args[0]) is None:
+                return 0
+            self._expires[args[0]] = time.monotonic() + int(args[1])
+            return 1
+        if name in ("INCR", "INCRBY"):
+            value = int(self._alive(args[0]) or 0) + (int(args[1]) if name == "INCRBY" else 1)
+            self._data[args[0]] = str(value)
+            return value
+
+        # HyperLogLog: set exato (contagem exata ≈ estimativa do Redis)
+        if name == "PFADD":
+            members = self._typed(args[0], set)
+            before = len(members)
+            members.update(args[1:])
+            return int(len(members) != before)
+        if name == "PFCOUNT":
+            return len(set().union(*(self._alive(k) or set() for k in args)))
+
+        if name == "ZADD":
+            return self._zadd(args)
+        if name == "ZREM":
+            zset = self._alive(args[0]) or {}
+            return sum(zset.pop(m, None) is not None for m in args[1:])
+        if name == "ZCARD":
+            return len(self._alive(args[0]) or {})
+        if name == "ZREMRANGEBYSCORE":
+            zset = self._alive(args[0]) or {}
+            low, high = _bound(args[1]), _bound(args[2])
+            doomed = [m for m, s in zset.items() if low <= s <= high]
+            for member in doomed:
+                del zset[member]
+            return len(doomed)
+        if name == "ZREMRANGEBYRANK":
+            zset = self._alive(args[0]) or {}
+            ordered = [m for m, _ in sorted(zset.items(), key=lambda kv: (kv[1], kv[0]))]
+            start, stop = int(args[1]), int(args[2])
+            start = max(start + len(ordered) if start < 0 else start, 0)
+            stop = stop + len(ordered) if stop < 0 else stop
+            doomed = ordered[start:stop + 1] if stop >= start else []
+            for member in doomed:
+                del zset[member]
+            return len(doomed)
+        if name == "ZRANGE":
+            zset = self._alive(args[0]) or {}
+            ordered = sorted(zset.items(), key=lambda kv: (kv[1], kv[0]))
+            start, stop = int(args[1]), int(args[2])
+            stop = len(ordered) if stop == -1 else stop + 1
+            items = ordered[start:stop]
+            if "WITHSCORES" in (a.upper() for a in args[3:]):
+                return _Scored(items)
+            return [m for m, _ in items]
+        if name == "ZRANGEBYSCORE":
+            zset = self._alive(args[0]) or {}
+            low, high = _bound(args[1]), _bound(args[2])
+            members = [m for m, s in sorted(zset.items(), key=lambda kv: (kv[1], kv[0])) if low <= s <= high]
+            rest = [a.upper() for a in args[3:]]
+            if "LIMIT" in rest:
+                i = rest.index("LIMIT")
+                offset, count = int(args[4 + i]), int(args[5 + i])
+                members = members[offset:] if count < 0 else members[offset:offset + count]
+            return members
+
+        if name == "KEYS":
+            return [k for k in list(self._data) if self._alive(k) is not None and fnmatch.fnmatchcase(k, args[0])]
+        if name == "PUBLISH":
+            writers = list(self._subscribers.get(args[0], ()))
+            for writer in writers:
+                writer.write(_encode(_Push(["message", args[0], args[1]]), writer in self._resp3))
+            return len(writers)
+
+        raise RedisCommandError(f"unknown command '{name}'")
+
+    def _zadd(self, args: list[str]) -> int:
+        key, rest = args[0], args[1:]
+        flags = set()
+        while rest and rest[0].upper() in ("NX", "XX", "GT", "LT", "CH"):
+            flags.add(rest.pop(0).upper())
+
+        zset = self._typed(key, dict)
+        added = 0
+        for score, member in zip(rest[::2], rest[1::2]):
+            exists = member in zset
+            if ("NX" in flags and exists) or ("XX" in flags and not exists):
+                continue
+            added += not exists
+            zset[member] = float(score)
+        return added
+
+
+def _score(value: float) -> str:
+    return repr(int(value)) if value == int(value) else repr(value)
+
+
+def _bound(raw: str) -> float:
+    if raw in ("-inf", "+inf", "inf"):
+        return float(raw)
+    return float(raw.lstrip("("))
+
+
+def _encode(value, resp3: bool = False) -> bytes:
+    if value is None:
+        return b"_\r\n" if resp3 else b"$-1\r\n"
+    if isinstance(value, _Simple):
+        return f"+{value}\r\n".encode()
+    if isinstance(value, bool):
+        value = int(value)
+    if isinstance(value, int):
+        return f":{value}\r\n".encode()
+    if isinstance(value, _Scored):
+        if resp3:
+            pairs = [b"*2\r\n" + _encode(m) + f",{_score(s)}\r\n".encode() for m, s in value]
+            return f"*{len(value)}\r\n".encode() + b"".join(pairs)
+        value = [x for m, s in value for x in (m, _score(s))]
+    if isinstance(value, dict):
+        items = b"".join(_encode(k, resp3) + _encode(v, resp3) for k, v in value.items())
+        if resp3:
+            return f"%{len(value)}\r\n".encode() + items
+        return f"*{len(value) * 2}\r\n".encode() + items
+    if isinstance(value, (list, tuple)):
+        kind = ">" if resp3 and isinstance(value, _Push) else "*"
+        return f"{kind}{len(value)}\r\n".encode() + b"".join(_encode(v, resp3) for v in value)
+    data = str(value).encode()
+    return b"$%d\r\n%s\r\n" % (len(data), data)
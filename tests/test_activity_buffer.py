@@ -0,0 +1,172 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from app.db import models_registry  # noqa: F401 — registra os models
+from app.db.base import Base
+from app.db.session import create_app_async_engine, create_app_engine
+from app.db.writer import SQLiteWriter
+from app.models.conversations import Conversation
+from app.services import activity_buffer
+from app.services.activity_buffer import (
+    PendingActivity,
+    flush_activity,
+    flush_activity_async,
+    get_pending_activity,
+    pending_count,
+    record_activity,
+)
+
+T0 = datetime(2024, 5, 1, 12)
+
+
+@pytest.fixture(autouse=True)
+def pending(monkeypatch):
+    buffer: dict[str, PendingActivity] = {}
+    monkeypatch.setattr(activity_buffer, "_pending", buffer)
+    return buffer
+
+
+class CommitFails(AsyncSession):
+    async def commit(self) -> None:
+        raise RuntimeError("disk I/O error")
+
+
+def test_keeps_newest_activity_and_its_vendor():
+    record_activity("c1", T0, "v1")
+    record_activity("c1", T0 + timedelta(minutes=5), "v2")
+    record_activity("c1", T0 + timedelta(minutes=1), "v3")  # fora de ordem
+    assert get_pending_activity("c1") == PendingActivity(T0 + timedelta(minutes=5), "v2")
+    assert pending_count() == 1
+
+
+# ------------------------------------------------------------
+# Pela fila do writer
+# ------------------------------------------------------------
+def _with_writer(tmp_path, monkeypatch, scenario, session_class=AsyncSession):
+    async def main():
+        engine = create_app_async_engine(f"sqlite:///{tmp_path / 'activity.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(insert(Conversation), [
+                {"conversation_id": cid, "customer_phone": "5547999990000", "last_active_at": T0}
+                for cid in ("c1", "c2")
+            ])
+
+        writer = SQLiteWriter(async_sessionmaker(engine, class_=session_class, expire_on_commit=False))
+        writer.start()
+        monkeypatch.setattr(activity_buffer, "sqlite_writer", writer)
+        try:
+            await scenario()
+            async with engine.connect() as conn:
+                rows = await conn.execute(select(
+                    Conversation.conversation_id, Conversation.last_active_at, Conversation.current_vendor_id,
+                ).order_by(Conversation.conversation_id))
+                return [tuple(row) for row in rows]
+        finally:
+            await writer.stop()
+            await engine.dispose()
+
+    return asyncio.run(main())
+
+
+def test_async_flush_writes_the_batch(tmp_path, monkeypatch):
+    record_activity("c1", T0 + timedelta(hours=1), "v1")
+    record_activity("c2", T0 + timedelta(hours=2), "v2")
+
+    async def scenario():
+        assert await flush_activity_async() == 2
+        assert await flush_activity_async() == 0
+
+    rows = _with_writer(tmp_path, monkeypatch, scenario)
+    assert rows == [("c1", T0 + timedelta(hours=1), "v1"), ("c2", T0 + timedelta(hours=2), "v2")]
+    assert pending_count() == 0
+
+
+def test_async_flush_restores_the_batch_when_the_commit_fails(tmp_path, monkeypatch):
+    record_activity("c1", T0 + timedelta(hours=1), "v1")
+    record_activity("c2", T0 + timedelta(hours=2), "v2")
+
+    async def scenario():
+        with pytest.raises(RuntimeError, match="disk I/O error"):
+            await flush_activity_async()
+
+    rows = _with_writer(tmp_path, monkeypatch, scenario, session_class=CommitFails)
+    assert [row[1] for row in rows] == [T0, T0]  # nada gravado
+    assert get_pending_activity("c1") == PendingActivity(T0 + timedelta(hours=1), "v1")
+    assert get_pending_activity("c2") == PendingActivity(T0 + timedelta(hours=2), "v2")
+
+
+class BlockedWriter:
+    """
+    Writer que registra atividade nova enquanto o lote está em voo e
+    então falha (ou fica preso até ser cancelado).
+    """
+
+    def __init__(self, error: Exception | None = None) -> None:
+        self.error = error
+        self.submitted = asyncio.Event()
+
+    async def submit(self, fn):
+        # mensagem nova de c1 durante o flush (outro vendedor)
+        record_activity("c1", T0 + timedelta(hours=3), "v9")
+        # e uma mais antiga de c2, que não deve ganhar do lote
+        record_activity("c2", T0 - timedelta(hours=1), "v8")
+        self.submitted.set()
+        if self.error is not None:
+            raise self.error
+        await asyncio.Event().wait()
+
+
+def _batch():
+    record_activity("c1", T0 + timedelta(hours=1), "v1")
+    record_activity("c2", T0 + timedelta(hours=2), "v2")
+
+
+def _assert_restored_without_overwriting():
+    assert get_pending_activity("c1") == PendingActivity(T0 + timedelta(hours=3), "v9")
+    assert get_pending_activity("c2") == PendingActivity(T0 + timedelta(hours=2), "v2")
+    assert pending_count() == 2
+
+
+def test_failed_flush_keeps_newer_activity(monkeypatch):
+    monkeypatch.setattr(activity_buffer, "sqlite_writer", BlockedWriter(RuntimeError("locked")))
+    _batch()
+    with pytest.raises(RuntimeError):
+        asyncio.run(flush_activity_async())
+    _assert_restored_without_overwriting()
+
+
+def test_cancelled_flush_restores_the_batch(monkeypatch):
+    writer = BlockedWriter()
+    monkeypatch.setattr(activity_buffer, "sqlite_writer", writer)
+    _batch()
+
+    async def scenario():
+        task = asyncio.create_task(flush_activity_async())
+        await writer.submitted.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+    _assert_restored_without_overwriting()
+
+
+# ------------------------------------------------------------
+# Caminho síncrono
+# ------------------------------------------------------------
+def test_sync_flush_restores_on_failure(tmp_path):
+    engine = create_app_engine(f"sqlite:///{tmp_path / 'empty.db'}")  # sem tabelas
+    _batch()
+    try:
+        with Session(engine) as db, pytest.raises(Exception):
+            flush_activity(db)
+    finally:
+        engine.dispose()
+    assert get_pending_activity("c1") == PendingActivity(T0 + timedelta(hours=1), "v1")
+    assert pending_count() == 2
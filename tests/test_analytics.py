@@ -0,0 +1,115 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.services import analytics_service
+from app.services.analytics_service import BUCKETS, _align, get_metric, to_utc_naive
+
+HOUR, DAY = BUCKETS["hour"], BUCKETS["day"]
+
+
+# ------------------------------------------------------------
+# Alinhamento
+# ------------------------------------------------------------
+@pytest.mark.parametrize("value, step, up, expected", [
+    (datetime(2024, 5, 1, 13, 45), HOUR, False, datetime(2024, 5, 1, 13)),
+    (datetime(2024, 5, 1, 13, 45), HOUR, True, datetime(2024, 5, 1, 14)),
+    (datetime(2024, 5, 1, 13), HOUR, True, datetime(2024, 5, 1, 13)),
+    (datetime(2024, 5, 1, 13, 45), DAY, False, datetime(2024, 5, 1)),
+    (datetime(2024, 5, 1, 13, 45), DAY, True, datetime(2024, 5, 2)),
+    (datetime(2024, 5, 1), DAY, True, datetime(2024, 5, 1)),
+    (datetime(2024, 5, 1, 0, 0, 0, 1), DAY, True, datetime(2024, 5, 2)),
+])
+def test_align(value, step, up, expected):
+    assert _align(value, step, up) == expected
+
+
+def test_to_utc_naive():
+    naive = datetime(2024, 5, 1, 12)
+    assert to_utc_naive(naive) is naive
+
+    sao_paulo = timezone(timedelta(hours=-3))
+    assert to_utc_naive(datetime(2024, 5, 1, 22, tzinfo=sao_paulo)) == datetime(2024, 5, 2, 1)
+    assert to_utc_naive(datetime(2024, 5, 1, 12, tzinfo=timezone.utc)) == datetime(2024, 5, 1, 12)
+
+
+# ------------------------------------------------------------
+# Buckets e cache
+# ------------------------------------------------------------
+@pytest.fixture
+def calls(monkeypatch):
+    """
+    Substitui cache e DuckDB; registra chaves e argumentos das consultas.
+    """
+    calls = {"keys": [], "sql": []}
+    cache = {}
+
+    async def cache_get(key):
+        calls["keys"].append(key)
+        return cache.get(key)
+
+    async def cache_set(key, value, ttl_seconds):
+        cache[key] = value
+
+    def fake_sql(name):
+        def build(*args):
+            calls["sql"].append((name, args))
+            return name, []
+        return build
+
+    monkeypatch.setattr(analytics_service, "cache_get", cache_get)
+    monkeypatch.setattr(analytics_service, "cache_set", cache_set)
+    monkeypatch.setattr(analytics_service, "_run_query", lambda sql, params: [{"metric": sql}])
+    for name in analytics_service.METRICS:
+        monkeypatch.setitem(analytics_service.METRICS, name, fake_sql(name))
+    return calls
+
+
+def test_volume_is_bucketed(calls):
+    since = datetime(2024, 5, 1, 10, 30)
+    until = datetime(2024, 5, 3, 9, 15)
+    result = asyncio.run(get_metric("volume", since, until, bucket="day", vendor_id="v1"))
+
+    assert result["bucket"] == "day"
+    assert result["since"] == "2024-05-01T00:00:00"
+    assert result["until"] == "2024-05-04T00:00:00"
+    assert calls["sql"] == [("volume", (datetime(2024, 5, 1), datetime(2024, 5, 4), "day", "v1"))]
+    assert calls["keys"] == ["analytics:volume:day:v1:2024050100:2024050400"]
+
+
+@pytest.mark.parametrize("metric", ["first_response", "media_mix"])
+def test_other_metrics_ignore_the_bucket(calls, metric):
+    since = datetime(2024, 5, 1, 10, 30)
+    until = datetime(2024, 5, 3, 9, 15)
+    by_day = asyncio.run(get_metric(metric, since, until, bucket="day"))
+    by_hour = asyncio.run(get_metric(metric, since, until, bucket="hour"))
+
+    assert by_day == by_hour
+    assert by_day["bucket"] is None
+    assert by_day["since"] == "2024-05-01T10:00:00"
+    assert by_day["until"] == "2024-05-03T10:00:00"
+    # a mesma chave: a segunda chamada vem do cache
+    key = f"analytics:{metric}:all:*:2024050110:2024050310"
+    assert calls["keys"] == [key, key]
+    assert calls["sql"] == [(metric, (datetime(2024, 5, 1, 10), datetime(2024, 5, 3, 10), None))]
+
+
+def test_aware_dates_share_the_utc_key(calls):
+    sao_paulo = timezone(timedelta(hours=-3))
+    asyncio.run(get_metric("volume", datetime(2024, 5, 1, 7, tzinfo=sao_paulo),
+                           datetime(2024, 5, 1, 9, tzinfo=sao_paulo), bucket="hour"))
+    asyncio.run(get_metric("volume", datetime(2024, 5, 1, 10), datetime(2024, 5, 1, 12), bucket="hour"))
+
+    assert calls["keys"][0] == calls["keys"][1] == "analytics:volume:hour:*:2024050110:2024050112"
+    assert len(calls["sql"]) == 1
+
+
+def test_redis_down_still_answers(calls, monkeypatch):
+    async def broken(*args, **kwargs):
+        raise ConnectionError("redis fora")
+
+    monkeypatch.setattr(analytics_service, "cache_get", broken)
+    monkeypatch.setattr(analytics_service, "cache_set", broken)
+    result = asyncio.run(get_metric("media_mix", datetime(2024, 5, 1), datetime(2024, 5, 2)))
+    assert result["rows"] == [{"metric": "media_mix"}]
@@ -0,0 +1,163 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import circuit_breaker as cb
+from app.core.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+class Clock:
+    def __init__(self, now: float = 1_000_000.0) -> None:
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cb, "time", SimpleNamespace(time=clock.time))
+    monkeypatch.setattr(cb.settings, "CIRCUIT_BREAKER_ENABLED", True)
+    monkeypatch.setattr(cb.settings, "CIRCUIT_WINDOW_SECONDS", 30.0)
+    monkeypatch.setattr(cb.settings, "CIRCUIT_MIN_CALLS", 4)
+    monkeypatch.setattr(cb.settings, "CIRCUIT_ERROR_RATE", 0.5)
+    monkeypatch.setattr(cb.settings, "CIRCUIT_OPEN_SECONDS", 10.0)
+    return clock
+
+
+def _open(breaker: CircuitBreaker) -> None:
+    for _ in range(4):
+        breaker.record(False)
+    assert breaker.state == OPEN
+
+
+def test_stays_closed_below_min_calls(clock):
+    breaker = CircuitBreaker("test:min_calls")
+    for _ in range(3):
+        breaker.record(False)
+    assert breaker.state == CLOSED
+    assert breaker.before() is False
+
+
+def test_opens_at_error_rate_and_fails_fast(clock):
+    breaker = CircuitBreaker("test:opens")
+    breaker.record(True)
+    breaker.record(True)
+    breaker.record(False)
+    assert breaker.state == CLOSED  # 1/3 e abaixo do mínimo
+    breaker.record(False)
+    assert breaker.state == OPEN  # 2/4 = 50%
+
+    clock.advance(4)
+    with pytest.raises(CircuitOpenError) as exc:
+        breaker.before()
+    assert exc.value.retry_after == pytest.approx(6)
+
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+
+def test_old_failures_leave_the_window(clock):
+    breaker = CircuitBreaker("test:window")
+    for _ in range(3):
+        breaker.record(False)
+    clock.advance(31)
+    breaker.record(False)
+    assert breaker.state == CLOSED
+    assert breaker.status()["calls"] == 1
+
+
+def test_half_open_allows_a_single_probe(clock):
+    breaker = CircuitBreaker("test:probe")
+    _open(breaker)
+    clock.advance(10)
+
+    assert breaker.before() is True
+    assert breaker.state == HALF_OPEN
+    # prova em voo: as demais chamadas falham na hora
+    with pytest.raises(CircuitOpenError):
+        breaker.before()
+    # check() não consome a prova nem recusa no half-open
+    breaker.check()
+
+
+def test_successful_probe_closes(clock):
+    breaker = CircuitBreaker("test:probe_ok")
+    _open(breaker)
+    clock.advance(10)
+
+    probe = breaker.before()
+    breaker.record(True, probe)
+    assert breaker.state == CLOSED
+    assert breaker.status()["calls"] == 0
+    assert breaker.before() is False
+
+
+def test_failed_probe_reopens(clock):
+    breaker = CircuitBreaker("test:probe_fail")
+    _open(breaker)
+    clock.advance(10)
+
+    probe = breaker.before()
+    breaker.record(False, probe)
+    assert breaker.state == OPEN
+    assert breaker.status()["retry_after"] == pytest.approx(10)
+
+
+def test_late_response_does_not_count_while_open(clock):
+    breaker = CircuitBreaker("test:late")
+    _open(breaker)
+    breaker.record(True)
+    assert breaker.state == OPEN
+
+
+def test_call_records_status_and_exceptions(clock):
+    breaker = CircuitBreaker("test:call")
+
+    with breaker.call() as call:
+        call.status(404)  # 4xx comum: o upstream respondeu
+    with breaker.call() as call:
+        call.status(503)
+    with breaker.call() as call:
+        call.status(429)
+    with pytest.raises(RuntimeError):
+        with breaker.call():
+            raise RuntimeError("boom")
+
+    assert breaker.state == OPEN  # 3 erros em 4
+
+
+def test_cancelled_probe_releases_the_slot(clock):
+    breaker = CircuitBreaker("test:cancel")
+    _open(breaker)
+    clock.advance(10)
+
+    with pytest.raises(asyncio.CancelledError):
+        with breaker.call():
+            raise asyncio.CancelledError()
+
+    assert breaker.state == HALF_OPEN
+    assert breaker.before() is True
+
+
+def test_disabled_never_opens(clock, monkeypatch):
+    monkeypatch.setattr(cb.settings, "CIRCUIT_BREAKER_ENABLED", False)
+    breaker = CircuitBreaker("test:disabled")
+    for _ in range(10):
+        with pytest.raises(RuntimeError):
+            with breaker.call():
+                raise RuntimeError("boom")
+    assert breaker.state == CLOSED
+    breaker.check()
+
+
+def test_registry_reuses_breakers():
+    breakers = cb.CircuitBreakers()
+    assert breakers.get("zapi:a") is breakers.get("zapi:a")
+    assert breakers.get("zapi:a") is not breakers.get("zapi:b")
+    assert set(breakers.status()) == {"zapi:a", "zapi:b"}
@@ -0,0 +1,130 @@
+import asyncio
+
+import pytest
+
+from app.core import fault_injection
+from app.core.fault_injection import FaultInjector, FaultRule, InjectedFault, _parse_latency
+
+
+# ------------------------------------------------------------
+# Latência
+# ------------------------------------------------------------
+@pytest.mark.parametrize("spec", [None, "", 0])
+def test_no_latency(spec):
+    assert _parse_latency(spec) is None
+
+
+@pytest.mark.parametrize("spec", ["250", 250, "fixed:250"])
+def test_fixed_latency(spec):
+    assert _parse_latency(spec)() == 0.25
+
+
+def test_random_latencies(monkeypatch):
+    assert 0.1 <= _parse_latency("uniform:100-500")() <= 0.5
+
+    monkeypatch.setattr(fault_injection.random, "gauss", lambda mean, std: mean + std)
+    assert _parse_latency("normal:300,50")() == pytest.approx(0.35)
+    monkeypatch.setattr(fault_injection.random, "gauss", lambda mean, std: -1.0)
+    assert _parse_latency("normal:300,50")() == 0.0  # nunca negativa
+
+    monkeypatch.setattr(fault_injection.random, "expovariate", lambda rate: rate)
+    assert _parse_latency("exp:200")() == pytest.approx(5.0)  # λ = 1 / 0.2s
+
+
+@pytest.mark.parametrize("spec", ["abc", "fixed:", "uniform:100", "normal:300", "exp:0", "gamma:3", "fixed:x"])
+def test_invalid_latency(spec):
+    with pytest.raises(ValueError):
+        _parse_latency(spec)
+
+
+# ------------------------------------------------------------
+# Regras
+# ------------------------------------------------------------
+def test_rule_defaults():
+    rule = FaultRule({"target": "zapi"})
+    assert rule.spec == {
+        "target": "zapi",
+        "endpoint": "*",
+        "latency": None,
+        "error_rate": 0.0,
+        "error_status": 503,
+        "slow_body_kbps": None,
+    }
+    assert rule.delay() == 0.0
+    assert rule.fails() is False
+    assert rule.body_delay(1024) == 0.0
+
+
+@pytest.mark.parametrize("spec", [
+    {},
+    {"target": "s3"},
+    {"target": "zapi", "error_rate": 1.5},
+    {"target": "zapi", "error_rate": -0.1},
+    {"target": "zapi", "slow_body_kbps": -1},
+    {"target": "zapi", "latency": "uniform:x-y"},
+])
+def test_invalid_rules(spec):
+    with pytest.raises(ValueError):
+        FaultRule(spec)
+
+
+def test_rule_matching():
+    rule = FaultRule({"target": "chatwoot", "endpoint": "send_*"})
+    assert rule.matches("chatwoot", "send_text_message")
+    assert not rule.matches("chatwoot", "create_contact")
+    assert not rule.matches("zapi", "send_text_message")
+    # fnmatchcase: sem diferença por plataforma
+    assert not rule.matches("chatwoot", "SEND_text_message")
+
+
+def test_slow_body():
+    rule = FaultRule({"target": "r2", "slow_body_kbps": 64})
+    assert rule.body_delay(128 * 1024) == 2.0
+
+
+# ------------------------------------------------------------
+# Injetor
+# ------------------------------------------------------------
+def test_disabled_injector_refuses_rules():
+    injector = FaultInjector(enabled=False)
+    with pytest.raises(RuntimeError, match="fault_injection_disabled"):
+        injector.configure([{"target": "zapi"}])
+    injector.configure([])
+    assert injector.config() == {"enabled": False, "rules": []}
+
+
+def test_invalid_rules_keep_the_current_ones():
+    injector = FaultInjector(enabled=True)
+    injector.configure([{"target": "zapi", "error_rate": 1}])
+    with pytest.raises(ValueError):
+        injector.configure([{"target": "zapi"}, {"target": "nope"}])
+    assert [r["target"] for r in injector.config()["rules"]] == ["zapi"]
+
+
+def test_first_matching_rule_wins():
+    injector = FaultInjector(enabled=True)
+    injector.configure([
+        {"target": "zapi", "endpoint": "send-text", "error_rate": 1, "error_status": 429},
+        {"target": "zapi", "error_rate": 1},
+    ])
+
+    with pytest.raises(InjectedFault) as exc:
+        injector.before_sync("zapi", "send-text")
+    assert exc.value.status_code == 429
+
+    with pytest.raises(InjectedFault) as exc:
+        asyncio.run(injector.before("zapi", "send-image"))
+    assert exc.value.status_code == 503
+
+    injector.before_sync("chatwoot", "send_text_message")  # nenhuma regra
+
+
+def test_latency_is_applied(monkeypatch):
+    slept = []
+    monkeypatch.setattr(fault_injection.time, "sleep", slept.append)
+    injector = FaultInjector(enabled=True)
+    injector.configure([{"target": "r2", "latency": "fixed:1500", "slow_body_kbps": 1}])
+
+    injector.before_sync("r2", "put_object")
+    injector.body_sync("r2", "download", 512)
+    assert slept == [1.5, 0.5]
@@ -0,0 +1,262 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import aiohttp
+import pytest
+import redis.asyncio as aioredis
+
+from app.core.circuit_breaker import CircuitOpenError
+from app.services import outbound_service
+from app.services.outbound_service import (
+    DLQ_KEY,
+    RETRY_KEY,
+    OutboundDelivery,
+    backoff_seconds,
+    chatwoot_failure,
+)
+from app.services.zapi_service import ZAPIError
+from benchmarks.standins import FakeRedis
+
+VENDOR = SimpleNamespace(instance_id="inst-1", instance_token="tok-1")
+
+
+@pytest.fixture
+def run(monkeypatch):
+    """
+    Roda o cenário com um FakeRedis novo no lugar do get_redis.
+    """
+    def runner(scenario):
+        async def main():
+            server = FakeRedis()
+            port = await server.start()
+            client = aioredis.Redis(host="127.0.0.1", port=port, decode_responses=True)
+
+            async def get_redis():
+                return client
+
+            monkeypatch.setattr(outbound_service, "get_redis", get_redis)
+            try:
+                return await scenario(client)
+            finally:
+                await client.aclose()
+                await server.stop()
+
+        return asyncio.run(main())
+
+    return runner
+
+
+@pytest.fixture
+def vendor(monkeypatch):
+    async def get_by_instance(instance_id):
+        return VENDOR if instance_id == VENDOR.instance_id else None
+
+    monkeypatch.setattr(outbound_service.vendor_registry, "get_by_instance", get_by_instance)
+
+
+def _zapi_raises(monkeypatch, error: Exception) -> list:
+    calls = []
+
+    def send_text(instance_id, token, phone, message):
+        calls.append((instance_id, token, phone, message))
+        raise error
+
+    monkeypatch.setattr(outbound_service.zapi_client, "send_text", send_text, raising=False)
+    return calls
+
+
+def _zapi_job() -> dict:
+    return OutboundDelivery._job("zapi", {
+        "instance_id": VENDOR.instance_id,
+        "method": "send_text",
+        "args": ["5511999990000", "oi"],
+        "kwargs": {},
+    })
+
+
+# ------------------------------------------------------------
+# Backoff
+# ------------------------------------------------------------
+def test_backoff_is_full_jitter_capped(monkeypatch):
+    monkeypatch.setattr(outbound_service.settings, "OUTBOUND_RETRY_BASE_SECONDS", 2.0)
+    monkeypatch.setattr(outbound_service.settings, "OUTBOUND_RETRY_MAX_SECONDS", 30.0)
+    monkeypatch.setattr(outbound_service.random, "uniform", lambda low, high: (low, high))
+
+    assert backoff_seconds(1) == (0, 2.0)
+    assert backoff_seconds(3) == (0, 8.0)
+    assert backoff_seconds(10) == (0, 30.0)
+
+
+def test_backoff_stays_in_range():
+    for attempt in range(1, 8):
+        for _ in range(50):
+            delay = backoff_seconds(attempt)
+            assert 0 <= delay <= outbound_service.settings.OUTBOUND_RETRY_MAX_SECONDS
+
+
+# ------------------------------------------------------------
+# Classificação das falhas
+# ------------------------------------------------------------
+@pytest.mark.parametrize("result, expected", [
+    ({"id": 1}, None),
+    ({"ignored": True, "error": "x"}, None),
+    ({"status": 200}, None),
+    ({"error": "contact_failed"}, (True, "contact_failed")),
+    ({"status": 503}, (True, "http_503")),
+    ({"status": 429}, (True, "http_429")),
+    ({"status": 500}, (False, "http_500")),
+    ({"status": 422}, (False, "http_422")),
+    (None, None),
+])
+def test_chatwoot_failure(result, expected):
+    assert chatwoot_failure(result) == expected
+
+
+@pytest.mark.parametrize("error, expected", [
+    (ZAPIError("x", status_code=503), (True, "http_503")),
+    (ZAPIError("x", status_code=502), (False, "http_502")),
+    (ZAPIError("x", status_code=400), (False, "http_400")),
+    (ZAPIError("x", sent=False), (True, "not_sent")),
+    (ZAPIError("x"), (False, "no_response")),
+])
+def test_attempt_classifies_zapi_errors(monkeypatch, vendor, error, expected):
+    calls = _zapi_raises(monkeypatch, error)
+    result, failure = asyncio.run(OutboundDelivery()._attempt(_zapi_job()))
+    assert result is None
+    assert failure == expected
+    # token resolvido do registry, não do job
+    assert calls == [("inst-1", "tok-1", "5511999990000", "oi")]
+
+
+def test_attempt_without_vendor_is_final(monkeypatch, vendor):
+    job = _zapi_job()
+    job["data"]["instance_id"] = "gone"
+    assert asyncio.run(OutboundDelivery()._attempt(job)) == (None, (False, "vendor_not_found"))
+
+
+@pytest.mark.parametrize("error, expected", [
+    (aiohttp.ConnectionTimeoutError(), (True, "ConnectionTimeoutError")),
+    (aiohttp.ServerDisconnectedError(), (False, "ServerDisconnectedError")),
+    (asyncio.TimeoutError(), (False, "TimeoutError")),
+])
+def test_attempt_classifies_chatwoot_errors(monkeypatch, error, expected):
+    async def send_from_zapi_payload(payload, inbox_identifier):
+        raise error
+
+    monkeypatch.setattr(outbound_service.chatwoot_client, "send_from_zapi_payload", send_from_zapi_payload)
+    job = OutboundDelivery._job("chatwoot", {"payload": {}, "inbox_identifier": "inbox"})
+    assert asyncio.run(OutboundDelivery()._attempt(job)) == (None, expected)
+
+
+# ------------------------------------------------------------
+# Retry, dead-letter e replay
+# ------------------------------------------------------------
+def test_retryable_failure_is_scheduled(run, monkeypatch, vendor):
+    _zapi_raises(monkeypatch, ZAPIError("x", sent=False))
+
+    async def scenario(redis):
+        result = await OutboundDelivery().send_zapi("inst-1", "send_text", "5511999990000", "oi")
+        assert result["deferred"] is True
+        assert result["error"] == "not_sent"
+        [member] = await redis.zrange(RETRY_KEY, 0, -1)
+        job = json.loads(member)
+        assert job["attempts"] == 1
+        assert "tok-1" not in member
+        assert await redis.zcard(DLQ_KEY) == 0
+
+    run(scenario)
+
+
+def test_final_failure_goes_to_dead_letter(run, monkeypatch, vendor):
+    _zapi_raises(monkeypatch, ZAPIError("x"))
+
+    async def scenario(redis):
+        result = await OutboundDelivery().send_zapi("inst-1", "send_text", "5511999990000", "oi")
+        assert result["dead_letter"] is True
+        assert result["error"] == "no_response"
+        assert await redis.zcard(RETRY_KEY) == 0
+        assert await redis.zcard(DLQ_KEY) == 1
+
+    run(scenario)
+
+
+def test_max_attempts_goes_to_dead_letter(run, monkeypatch, vendor):
+    monkeypatch.setattr(outbound_service.settings, "OUTBOUND_MAX_ATTEMPTS", 2)
+    _zapi_raises(monkeypatch, ZAPIError("x", status_code=429))
+
+    async def scenario(redis):
+        delivery = OutboundDelivery()
+        job = _zapi_job()
+        assert (await delivery._deliver(job))["deferred"] is True
+        assert (await delivery._deliver(job))["dead_letter"] is True
+        [dead] = await delivery.dead_letters(10)
+        assert dead["attempts"] == 2
+        assert dead["last_error"] == "http_429"
+
+    run(scenario)
+
+
+def test_open_circuit_defers_without_spending_an_attempt(run, monkeypatch):
+    async def send_from_zapi_payload(payload, inbox_identifier):
+        raise CircuitOpenError("chatwoot", 5.0)
+
+    monkeypatch.setattr(outbound_service.chatwoot_client, "send_from_zapi_payload", send_from_zapi_payload)
+
+    async def scenario(redis):
+        delivery = OutboundDelivery()
+        job = OutboundDelivery._job("chatwoot", {"payload": {}, "inbox_identifier": "inbox"})
+        result = await delivery._deliver(job)
+        assert result == {"deferred": True, "job_id": job["id"], "error": "circuit_open"}
+        assert job["attempts"] == 0
+        [(_, due)] = await redis.zrange(RETRY_KEY, 0, -1, withscores=True)
+        assert due >= time.time() + 4
+
+        # adiado além da idade máxima: dead-letter
+        job["created_at"] -= outbound_service.settings.OUTBOUND_MAX_AGE_SECONDS
+        result = await delivery._deliver(job)
+        assert result["dead_letter"] is True
+        assert result["error"] == "circuit_open:expired"
+
+    run(scenario)
+
+
+def test_dead_letter_is_capped(run, monkeypatch):
+    monkeypatch.setattr(outbound_service.settings, "OUTBOUND_DLQ_MAX_JOBS", 3)
+
+    async def scenario(redis):
+        delivery = OutboundDelivery()
+        jobs = [_zapi_job() for _ in range(5)]
+        for job in jobs:
+            await delivery._dead_letter(job)
+        kept = [j["id"] for j in await delivery.dead_letters(10)]
+        assert kept == [j["id"] for j in jobs[2:]]
+
+    run(scenario)
+
+
+def test_replay_and_discard(run):
+    async def scenario(redis):
+        delivery = OutboundDelivery()
+        jobs = [_zapi_job() for _ in range(3)]
+        for job in jobs:
+            job["attempts"] = 6
+            await delivery._dead_letter(job)
+
+        assert await delivery.replay(jobs[0]["id"]) == 1
+        assert await delivery.replay("missing") == 0
+        [member] = await redis.zrange(RETRY_KEY, 0, -1)
+        replayed = json.loads(member)
+        assert replayed["id"] == jobs[0]["id"]
+        assert replayed["attempts"] == 0
+        assert "dead_at" not in replayed
+
+        assert await delivery.discard(jobs[1]["id"]) is True
+        assert await delivery.discard(jobs[1]["id"]) is False
+        assert await delivery.stats() == {"retry": 1, "dead": 1, "inflight": 0}
+
+        assert await delivery.replay() == 1
+        assert await redis.zcard(DLQ_KEY) == 0
+
+    run(scenario)
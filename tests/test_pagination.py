@@ -0,0 +1,110 @@
+import asyncio
+import base64
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import Column, DateTime, MetaData, String, Table
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.schemas.vendors import VendorRead
+from app.services.vendors_service import VENDOR_KEYSET
+from app.utils.pagination import Keyset, decode_cursor, encode_cursor, fetch_page, iter_chunks
+
+metadata = MetaData()
+items = Table(
+    "items",
+    metadata,
+    Column("item_id", String, primary_key=True),
+    Column("name", String),
+    Column("created_at", DateTime),
+)
+ITEMS = Keyset(items, "item_id")
+
+
+# ------------------------------------------------------------
+# Cursor
+# ------------------------------------------------------------
+def test_cursor_roundtrip():
+    created_at = datetime(2024, 5, 1, 12, 30, 0, 123456)
+    cursor = encode_cursor(created_at, "abc")
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == ("2024-05-01 12:30:00.123456", "abc")
+
+
+def test_cursor_keeps_raw_text():
+    # SQLite: created_at chega como texto cru da coluna
+    assert decode_cursor(encode_cursor("2024-05-01 12:30:00", 42)) == ("2024-05-01 12:30:00", "42")
+
+
+@pytest.mark.parametrize("cursor", [
+    "not-base64!",
+    base64.urlsafe_b64encode(b"{}").decode(),
+    base64.urlsafe_b64encode(b'["only-one"]').decode(),
+    base64.urlsafe_b64encode(b"null").decode(),
+])
+def test_invalid_cursor_is_400(cursor):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor)
+    assert exc.value.status_code == 400
+    assert exc.value.detail == "invalid_cursor"
+
+
+# ------------------------------------------------------------
+# Campos
+# ------------------------------------------------------------
+def test_fields_default_to_every_column():
+    assert ITEMS.parse_fields(None) == ["item_id", "name", "created_at"]
+    assert ITEMS.parse_fields(" name, item_id ,name") == ["name", "item_id"]
+
+
+@pytest.mark.parametrize("fields", ["name,secret", ",", "instance_token"])
+def test_unknown_fields_are_400(fields):
+    with pytest.raises(HTTPException) as exc:
+        ITEMS.parse_fields(fields)
+    assert exc.value.status_code == 400
+    assert exc.value.detail.startswith("invalid_fields")
+
+
+def test_vendor_token_is_not_exposed():
+    assert "instance_token" in VENDOR_KEYSET.table.c
+    assert "instance_token" not in VENDOR_KEYSET.field_names
+    assert "instance_token" not in VendorRead.__fields__
+    with pytest.raises(HTTPException):
+        VENDOR_KEYSET.parse_fields("vendor_id,instance_token")
+
+
+# ------------------------------------------------------------
+# Páginas
+# ------------------------------------------------------------
+def test_pages_walk_every_row_once():
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            await conn.run_sync(metadata.create_all)
+            start = datetime(2024, 1, 1)
+            # timestamps repetidos: o desempate é pelo id
+            await conn.execute(items.insert(), [
+                {"item_id": f"i{n:02d}", "name": f"n{n}", "created_at": start + timedelta(minutes=n // 3)}
+                for n in range(10)
+            ])
+
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        seen, cursor = [], None
+        async with session_factory() as db:
+            while True:
+                page = await fetch_page(db, ITEMS, ["item_id"], cursor=cursor, limit=4)
+                seen += [row["item_id"] for row in page["items"]]
+                cursor = page["next_cursor"]
+                if cursor is None:
+                    break
+
+        chunks = [chunk async for chunk in iter_chunks(session_factory, ITEMS, ["item_id"], chunk_size=3)]
+        await engine.dispose()
+        return seen, chunks
+
+    seen, chunks = asyncio.run(scenario())
+    expected = [f"i{n:02d}" for n in reversed(range(10))]
+    assert seen == expected
+    assert [row["item_id"] for chunk in chunks for row in chunk] == expected
+    assert [len(chunk) for chunk in chunks] == [3, 3, 3, 1]
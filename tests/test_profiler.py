@@ -0,0 +1,112 @@
+import asyncio
+import random
+
+import pytest
+
+from app.utils import profiler as profiler_module
+from app.utils.profiler import HISTOGRAM_SIZE, PROFILE_SLOT_SECONDS, LatencyHistogram, Profiler
+
+# 32 sub-buckets por potência de 2
+MAX_RELATIVE_ERROR = 1 / 32
+
+
+def _exact(values: list[int], pct: float) -> int:
+    ordered = sorted(values)
+    return ordered[max(1, round(len(ordered) * pct / 100)) - 1]
+
+
+def test_empty_histogram():
+    hist = LatencyHistogram()
+    assert hist.percentile(50) == 0
+    assert hist.summary() == {"count": 0}
+
+
+def test_small_values_are_exact():
+    hist = LatencyHistogram()
+    for us in range(1, 64):
+        hist.record(us)
+    assert hist.percentile(50) == 32
+    assert hist.percentile(100) == 63
+
+
+@pytest.mark.parametrize("pct", [1, 50, 90, 95, 99, 99.9, 100])
+def test_percentiles_within_relative_error(pct):
+    rng = random.Random(42)
+    # latências log-normais: de dezenas de µs a segundos
+    values = [int(rng.lognormvariate(9, 2)) for _ in range(20_000)]
+    hist = LatencyHistogram()
+    for us in values:
+        hist.record(us)
+
+    exact = _exact(values, pct)
+    assert hist.percentile(pct) >= exact
+    assert hist.percentile(pct) <= exact * (1 + MAX_RELATIVE_ERROR) + 1
+
+
+def test_never_above_max_and_huge_values_clamped():
+    hist = LatencyHistogram()
+    hist.record(1_000_003)
+    assert hist.percentile(99) == 1_000_003
+
+    hist.record(1 << 60)  # fora da faixa: vai para o último bucket
+    assert hist.counts[HISTOGRAM_SIZE - 1] == 1
+    # o percentil fica no teto do último bucket; o máximo exato vem em max_ms
+    assert hist.percentile(100) == profiler_module._bucket_upper(HISTOGRAM_SIZE - 1)
+    assert hist.summary()["max_ms"] == round((1 << 60) / 1000, 3)
+
+
+def test_merge_equals_recording_everything():
+    rng = random.Random(7)
+    values = [rng.randrange(1, 5_000_000) for _ in range(5_000)]
+    whole, left, right = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    for i, us in enumerate(values):
+        whole.record(us)
+        (left if i % 2 else right).record(us)
+
+    left.merge(right)
+    assert left.counts == whole.counts
+    assert left.summary() == whole.summary()
+
+
+def test_summary_in_milliseconds():
+    hist = LatencyHistogram()
+    for us in (1_000, 2_000, 3_000):
+        hist.record(us)
+    summary = hist.summary()
+    assert summary["count"] == 3
+    assert summary["mean_ms"] == 2.0
+    assert summary["max_ms"] == 3.0
+    assert summary["p50_ms"] == pytest.approx(2.0, rel=MAX_RELATIVE_ERROR)
+
+
+def test_report_window(monkeypatch):
+    clock = [1_000_000.0]
+    monkeypatch.setattr(profiler_module.time, "time", lambda: clock[0])
+    profiler = Profiler()
+
+    profiler.record("db.query", 0.010)
+    clock[0] += 5 * PROFILE_SLOT_SECONDS
+    profiler.record("db.query", 0.020)
+    profiler.record("zapi.send", 0.5)
+
+    assert profiler.report()["labels"]["db.query"]["count"] == 2
+    recent = profiler.report(window_seconds=PROFILE_SLOT_SECONDS)["labels"]
+    assert recent["db.query"]["count"] == 1
+    assert set(profiler.report(prefix="zapi")["labels"]) == {"zapi.send"}
+
+
+def test_timed_decorator_sync_and_async():
+    profiler = Profiler()
+
+    @profiler.timed()
+    def work():
+        return 1
+
+    @profiler.timed("custom.label")
+    async def async_work():
+        return 2
+
+    assert work() == 1
+    assert asyncio.run(async_work()) == 2
+    labels = profiler.report()["labels"]
+    assert set(labels) == {"test_profiler.test_timed_decorator_sync_and_async.<locals>.work", "custom.label"}
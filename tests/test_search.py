@@ -0,0 +1,81 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db import models_registry  # noqa: F401 — registra os models
+from app.db.base import Base
+from app.db.fulltext import create_fulltext
+from app.models.messages_log import MessageLog
+from app.services.search_service import SearchUnavailable, _fts5_query, search_messages_async
+
+
+@pytest.mark.parametrize("q, expected", [
+    ("boleto", '"boleto"'),
+    ("segunda via boleto", '"segunda" "via" "boleto"'),
+    ("bol*", '"bol"*'),
+    ("pedido 123*", '"pedido" "123"*'),
+    ("ação", '"ação"'),
+    # sintaxe FTS5 do usuário não passa: operadores viram termos ou somem
+    ('"boleto" OR NOT x', '"boleto" "OR" "NOT" "x"'),
+    ("col:valor", '"col" "valor"'),
+    ("a-b (c)", '"a" "b" "c"'),
+    ("", ""),
+    ("  *** ()", ""),
+])
+def test_fts5_query(q, expected):
+    assert _fts5_query(q) == expected
+
+
+def _search(q: str, fulltext: bool = True, **filters) -> dict:
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            conversation_id = str(uuid.uuid4())
+            await conn.execute(MessageLog.__table__.insert(), [
+                {
+                    "log_id": str(uuid.uuid4()),
+                    "conversation_id": conversation_id,
+                    "direction": direction,
+                    "source": "zapi",
+                    "message_type": "text",
+                    "content": content,
+                }
+                for direction, content in [
+                    ("incoming", "Preciso da segunda via do boleto"),
+                    ("outgoing", "Segue o boleto atualizado"),
+                    ("incoming", "Qual o prazo de entrega do pedido?"),
+                ]
+            ])
+            if fulltext:
+                await conn.run_sync(create_fulltext)
+
+        try:
+            async with async_sessionmaker(engine)() as db:
+                return await search_messages_async(db, q, limit=10, **filters)
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(scenario())
+
+
+def test_search_matches_terms_and_prefixes():
+    assert {r["content"] for r in _search("boleto")["items"]} == {
+        "Preciso da segunda via do boleto",
+        "Segue o boleto atualizado",
+    }
+    assert [r["content"] for r in _search("entreg*")["items"]] == ["Qual o prazo de entrega do pedido?"]
+    assert [r["direction"] for r in _search("boleto", direction="outgoing")["items"]] == ["outgoing"]
+    assert _search("boleto OR")["items"] == []
+
+
+def test_search_ignores_fts5_syntax():
+    assert _search('"')["items"] == []
+    assert _search("NEAR(")["items"] == []
+
+
+def test_search_without_index_is_unavailable():
+    with pytest.raises(SearchUnavailable):
+        _search("boleto", fulltext=False)
@@ -0,0 +1,130 @@
+import asyncio
+import random
+from types import SimpleNamespace
+
+import pytest
+import redis.asyncio as aioredis
+
+from app.services import vendor_metrics_service as vm
+from app.services.vendor_metrics_service import AWAITING_MAX_AGE_SECONDS, get_vendor_metrics, record_message
+from benchmarks.standins import FakeRedis
+
+START = 1_700_000_000.0  # múltiplo de 60 e de 600: início de bloco
+
+
+@pytest.fixture
+def run(monkeypatch):
+    """
+    Roda o cenário com um FakeRedis novo e relógio controlado.
+    """
+    clock = [START]
+    monkeypatch.setattr(vm, "time", SimpleNamespace(time=lambda: clock[0]))
+
+    def runner(scenario):
+        async def main():
+            server = FakeRedis()
+            port = await server.start()
+            client = aioredis.Redis(host="127.0.0.1", port=port, decode_responses=True)
+
+            async def get_redis():
+                return client
+
+            monkeypatch.setattr(vm, "get_redis", get_redis)
+            try:
+                return await scenario(clock)
+            finally:
+                await client.aclose()
+                await server.stop()
+
+        return asyncio.run(main())
+
+    return runner
+
+
+def test_window_counts_match_every_minute(run):
+    rng = random.Random(3)
+    sent = {m: rng.randrange(0, 4) for m in range(-130, 1)}
+
+    async def scenario(clock):
+        now = START + 90 * 60 + 30
+        for offset, count in sent.items():
+            for _ in range(count):
+                await record_message("v1", "incoming", f"c{offset}", at=now + offset * 60)
+        clock[0] = now
+
+        for window in (1, 2, 7, 10, 45, 120):
+            metrics = (await get_vendor_metrics(["v1"], window))["v1"]
+            expected = sum(count for offset, count in sent.items() if offset > -window)
+            assert metrics["messages_window"]["incoming"] == expected, window
+            assert metrics["messages_last_minute"]["incoming"] == sent[-1]
+            assert metrics["messages_window"]["outgoing"] == 0
+
+    run(scenario)
+
+
+def test_last_minute_is_the_last_complete_minute(run):
+    async def scenario(clock):
+        for _ in range(3):
+            await record_message("v1", "outgoing", "c1", at=START - 30)
+        await record_message("v1", "outgoing", "c1", at=START + 1)
+        clock[0] = START + 2
+
+        metrics = (await get_vendor_metrics(["v1"], 60))["v1"]
+        assert metrics["messages_last_minute"] == {"incoming": 0, "outgoing": 3}
+        assert metrics["messages_window"]["outgoing"] == 4
+
+    run(scenario)
+
+
+def test_pending_replies(run):
+    async def scenario(clock):
+        await record_message("v1", "incoming", "c1", contact="5547999990001", at=START)
+        await record_message("v1", "incoming", "c1", contact="5547999990001", at=START + 60)
+        await record_message("v1", "incoming", "c2", contact="5547999990002", at=START + 120)
+        clock[0] = START + 300
+
+        metrics = (await get_vendor_metrics(["v1"]))["v1"]
+        assert metrics["pending_replies"] == 2
+        assert metrics["oldest_pending_seconds"] == 300  # 1ª mensagem sem resposta
+        assert metrics["unique_contacts_today"] == 2
+
+        await record_message("v1", "outgoing", "c1", at=START + 300)
+        metrics = (await get_vendor_metrics(["v1"]))["v1"]
+        assert metrics["pending_replies"] == 1
+        assert metrics["oldest_pending_seconds"] == 180
+
+    run(scenario)
+
+
+def test_unanswered_conversations_expire(run):
+    async def scenario(clock):
+        await record_message("v1", "incoming", "group", at=START)
+        await record_message("v1", "incoming", "c1", at=START + AWAITING_MAX_AGE_SECONDS - 60)
+
+        # leitura poda mesmo sem escrita nova
+        clock[0] = START + AWAITING_MAX_AGE_SECONDS + 1
+        metrics = (await get_vendor_metrics(["v1"]))["v1"]
+        assert metrics["pending_replies"] == 1
+        assert metrics["oldest_pending_seconds"] == 61
+
+        # e a escrita também
+        await record_message("v2", "incoming", "old", at=START)
+        await record_message("v2", "incoming", "new", at=START + AWAITING_MAX_AGE_SECONDS + 1)
+        assert await (await vm.get_redis()).zrange("vm:v2:awaiting", 0, -1) == ["new"]
+
+    run(scenario)
+
+
+def test_reassigned_conversation_leaves_previous_vendor(run):
+    async def scenario(clock):
+        await record_message("v1", "incoming", "c1", at=START)
+        await record_message("v2", "incoming", "c1", at=START + 60)
+        clock[0] = START + 120
+
+        metrics = await get_vendor_metrics(["v1", "v2"])
+        assert metrics["v1"]["pending_replies"] == 0
+        assert metrics["v1"]["oldest_pending_seconds"] is None
+        assert metrics["v2"]["pending_replies"] == 1
+        assert metrics["v2"]["oldest_pending_seconds"] == 60
+
+    run(scenario)
@@ -0,0 +1,153 @@
+import asyncio
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, event, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.session import create_app_async_engine
+from app.db.writer import SQLiteWriter
+
+metadata = MetaData()
+notes = Table(
+    "notes",
+    metadata,
+    Column("note_id", Integer, primary_key=True),
+    Column("text", String, nullable=False),
+)
+
+
+class CommitFails(AsyncSession):
+    async def commit(self) -> None:
+        raise RuntimeError("disk I/O error")
+
+
+def _run(tmp_path, scenario, session_class=AsyncSession):
+    """
+    Cenário com um SQLiteWriter sobre um banco novo (perfil de produção).
+    """
+    async def main():
+        engine = create_app_async_engine(f"sqlite:///{tmp_path / 'writer.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(metadata.create_all)
+
+        commits = []
+        event.listen(engine.sync_engine, "commit", lambda conn: commits.append(1))
+
+        writer = SQLiteWriter(async_sessionmaker(engine, class_=session_class, expire_on_commit=False))
+        writer.start()
+        try:
+            return await scenario(writer, engine, commits)
+        finally:
+            await writer.stop()
+            await engine.dispose()
+
+    return asyncio.run(main())
+
+
+def _add(text: str, fail: Exception | None = None):
+    async def job(db):
+        result = await db.execute(insert(notes).values(text=text))
+        if fail is not None:
+            raise fail  # depois de escrever: o SAVEPOINT tem que desfazer
+        return result.inserted_primary_key[0]
+    return job
+
+
+async def _texts(engine) -> list[str]:
+    async with engine.connect() as conn:
+        return list((await conn.execute(select(notes.c.text).order_by(notes.c.note_id))).scalars())
+
+
+def test_failing_job_rolls_back_only_its_savepoint(tmp_path):
+    async def scenario(writer, engine, commits):
+        commits.clear()  # o create_all também comita
+        results = await asyncio.gather(
+            writer.submit(_add("a")),
+            writer.submit(_add("b", fail=ValueError("job b"))),
+            writer.submit(_add("c")),
+            return_exceptions=True,
+        )
+        assert isinstance(results[1], ValueError) and str(results[1]) == "job b"
+        assert results[0] != results[2]
+        assert await _texts(engine) == ["a", "c"]
+        assert len(commits) == 1  # um COMMIT para o lote inteiro
+
+    _run(tmp_path, scenario)
+
+
+def test_constraint_error_stays_in_its_job(tmp_path):
+    async def scenario(writer, engine, commits):
+        async def duplicate(db):
+            await db.execute(insert(notes).values(note_id=1, text="dup"))
+
+        first, dup, _ = await asyncio.gather(
+            writer.submit(_add("a")),
+            writer.submit(duplicate),
+            writer.submit(_add("c")),
+            return_exceptions=True,
+        )
+        assert first == 1
+        assert isinstance(dup, Exception)
+        assert await _texts(engine) == ["a", "c"]
+
+    _run(tmp_path, scenario)
+
+
+def test_commit_failure_fails_every_job(tmp_path):
+    async def scenario(writer, engine, commits):
+        results = await asyncio.gather(
+            writer.submit(_add("a")),
+            writer.submit(_add("b", fail=ValueError("job b"))),
+            writer.submit(_add("c")),
+            return_exceptions=True,
+        )
+        # nada foi gravado: todos recebem o erro do COMMIT
+        for result in results:
+            assert isinstance(result, RuntimeError) and str(result) == "disk I/O error"
+        assert await _texts(engine) == []
+
+        # o writer segue vivo depois do lote que falhou
+        assert writer.running
+
+    _run(tmp_path, scenario, session_class=CommitFails)
+
+
+def test_results_arrive_after_commit(tmp_path):
+    async def scenario(writer, engine, commits):
+        commits.clear()
+        seen = []
+
+        async def job(db):
+            await db.execute(insert(notes).values(text="x"))
+            return "done"
+
+        async def submit():
+            seen.append((await writer.submit(job), len(commits)))
+
+        await asyncio.gather(submit(), submit())
+        assert seen == [("done", 1), ("done", 1)]
+
+    _run(tmp_path, scenario)
+
+
+def test_stop_drains_the_queue(tmp_path):
+    async def scenario(writer, engine, commits):
+        pending = [asyncio.ensure_future(writer.submit(_add(str(i)))) for i in range(100)]
+        await asyncio.sleep(0)
+        await writer.stop()
+        assert all(f.done() and not f.exception() for f in pending)
+        assert len(await _texts(engine)) == 100
+        assert not writer.running
+
+    _run(tmp_path, scenario)
+
+
+def test_batches_are_capped(tmp_path):
+    async def scenario(writer, engine, commits):
+        commits.clear()
+        writer.max_batch = 4
+        await asyncio.gather(*(writer.submit(_add(str(i))) for i in range(10)))
+        assert len(commits) == 3  # 4 + 4 + 2
+        assert len(await _texts(engine)) == 10
+
+    _run(tmp_path, scenario)
+